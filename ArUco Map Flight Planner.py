@@ -2,64 +2,252 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.patches import Rectangle, Circle, Ellipse
-import re
-import json
+from matplotlib.patches import Circle, Ellipse
+from matplotlib.collections import LineCollection
+from matplotlib.colors import Normalize
+from matplotlib.image import BboxImage
+from matplotlib.transforms import Bbox, TransformedBbox
+import sys
+import time
 import numpy as np
+from concurrent.futures import CancelledError
+from aruco_planner import (
+    OBSTACLE_TYPES,
+    PLAN_MATCH_TOLERANCE,
+    PLAN_WRITERS,
+    ClearanceGrid,
+    CollisionChecker,
+    History,
+    MarkerStore,
+    ObstacleIndex,
+    Profiler,
+    RoutePlanner,
+    Trajectory,
+    VisibilityAnalysis,
+    apply_marker_diff,
+    describe_segment,
+    diff_markers,
+    drag_obstacle,
+    find_conflicts,
+    map_stamp,
+    new_obstacle,
+    new_plan,
+    obstacle_shape,
+    optimize_order,
+    path_length,
+    read_marker_map,
+    read_plan,
+    read_project,
+    resolve_conflicts,
+    sync_obstacles,
+    write_marker_map,
+    write_plan,
+    write_project,
+    write_trajectory,
+)
+from aruco_planner.project import DEFAULT_PLAN_NAME
+from aruco_planner.rendering import marker_artists, marker_scale, obstacle_artists, pick_target, set_marker_view
+from aruco_planner.tasks import TaskRunner
+from aruco_planner.widgets import PlanListView
+
+FRAME_INTERVAL_MS = 16
+TOUR_TIME_BUDGET = 2.0
+ZOOM_STEP = 1.2
+WATCH_INTERVAL_MS = 250
+TASK_SPINNER_MS = 20
+WATCH_MAX_EDITS = 4
+TRAJECTORY_ACCEL = 1.0
+TRAJECTORY_DISPLAY_POINTS = 20000
+PROFILE_LAG_MS = 50
+PROFILE_OVERLAY_MS = 500
+PROFILED_METHODS = {
+    "draw_markers": "draw",
+    "draw_obstacles": "draw",
+    "plot_path": "draw",
+    "update_collisions": "draw",
+    "update_view": "draw",
+    "blit_dirty_obstacles": "draw",
+    "highlight_marker": "draw",
+    "flush_motion": "handler",
+    "finish_map_loading": "handler",
+    "finish_map_reload": "handler",
+    "finish_project_loading": "handler",
+    "load_plan": "io",
+    "save_plan": "io",
+    "load_project": "io",
+    "save_project": "io",
+    "export_map": "io",
+    "export_trajectory": "io",
+}
+PROFILED_IO = (
+    "read_marker_map",
+    "write_marker_map",
+    "read_plan",
+    "write_plan",
+    "read_project",
+    "write_project",
+    "write_trajectory",
+)
+
+
+def read_map_task(task, file_path):
+    try:
+        stamp = map_stamp(file_path)
+    except OSError:
+        stamp = None
+    return read_marker_map(file_path, progress=task.report, cancel=task.cancel_event), file_path, stamp
+
+
+def read_project_task(task, file_path):
+    project = read_project(file_path).load("markers", "obstacles", "plans")
+    project["markers"].poses.refresh()
+    return project
+
 
 class ArucoMapApp:
     def __init__(self, root):
         self.root = root
         self.root.title("Планировщик полетов ArUco")
-        self.markers = []
-        self.marker_positions = []
+        self.markers = MarkerStore()
         self.flight_plan = []
+        self.plans = [new_plan(DEFAULT_PLAN_NAME, self.flight_plan)]
+        self.active_plan = 0
+        self.other_plan_lines = None
         self.obstacles = []
         self.selected_marker = None
-        self.highlighted_patch = None
+        self.highlighted_marker = None
+        self.marker_collection = None
+        self.marker_labels = None
+        self.marker_extent = None
+        self.view_key = None
+        self.pan_origin = None
         self.current_mode = "обычный"
         self.selected_obstacle = None
         self.dragging = False
         self.resize_handle = None
         self.obstacle_handles = {}
+        self.obstacle_patches = {}
+        self.obstacle_index = ObstacleIndex()
+        self.clearance_grid = ClearanceGrid()
+        self.clearance_image = None
+        self.dirty_obstacles = set()
+        self.drag_background = None
+        self.pending_motion = None
+        self.motion_job = None
+        self.map_loading = None
+        self.map_path = None
+        self.map_stamp = None
+        self.map_reload = None
+        self.watch_job = None
+        self.orphan_points = set()
+        self.orphan_line = None
+        self.route_planner = None
+        self.collision_checker = CollisionChecker()
+        self.collision_lines = None
+        self.path_line = None
+        self.overlay_lines = None
+        self.history = History()
+        self.drag_origin = None
+        self.profiler = None
+        self.profile_jobs = {}
+        self.profile_overlay = None
         self.create_widgets()
         self.setup_plot()
+        self.tasks = TaskRunner(self.root, on_status=self.update_status)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.root.bind_all("<Control-z>", self.undo)
+        self.root.bind_all("<Control-y>", self.redo)
 
     def create_widgets(self):
+        status_frame = ttk.Frame(self.root)
+        status_frame.pack(side=tk.BOTTOM, fill=tk.X, padx=5, pady=2)
+        self.status_label = ttk.Label(status_frame, text="Готово", anchor=tk.W)
+        self.status_label.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.cancel_task_btn = ttk.Button(status_frame, text="Отмена", state=tk.DISABLED, command=self.cancel_tasks)
+        self.cancel_task_btn.pack(side=tk.RIGHT, padx=2)
+        self.status_progress = ttk.Progressbar(status_frame, maximum=1.0, length=160)
+        self.status_progress.pack(side=tk.RIGHT, padx=2)
         control_frame = ttk.Frame(self.root)
         control_frame.pack(side=tk.LEFT, fill=tk.Y, padx=5, pady=5)
         self.load_map_btn = ttk.Button(control_frame, text="Загрузить карту", command=self.load_map)
         self.load_map_btn.pack(pady=5)
+        self.watch_map = tk.BooleanVar(value=False)
+        ttk.Checkbutton(control_frame, text="Следить за файлом карты", variable=self.watch_map, command=self.toggle_map_watch).pack(pady=2)
         self.changer_map_btn = ttk.Button(control_frame, text="Редактор карты", command=self.open_editor)
         self.changer_map_btn.pack(pady=5)
         ttk.Label(control_frame, text="Тип препятствия:").pack(pady=5)
-        self.obstacle_type = ttk.Combobox(control_frame, values=["куб", "арка", "флаг"])
+        self.obstacle_type = ttk.Combobox(control_frame, values=list(OBSTACLE_TYPES))
         self.obstacle_type.current(0)
         self.obstacle_type.pack(pady=5)
         self.obstacle_btn = ttk.Button(control_frame, text="Добавить препятствие", command=self.toggle_obstacle_mode)
         self.obstacle_btn.pack(pady=5)
+        self.show_clearance = tk.BooleanVar(value=False)
+        ttk.Checkbutton(control_frame, text="Карта зазоров", variable=self.show_clearance, command=self.toggle_clearance).pack(pady=2)
         ttk.Label(control_frame, text="Высота (z):").pack(pady=5)
         self.z_entry = ttk.Entry(control_frame)
         self.z_entry.pack(pady=5)
         self.add_point_btn = ttk.Button(control_frame, text="Добавить точку", command=self.add_waypoint)
         self.add_point_btn.pack(pady=5)
+        self.route_btn = ttk.Button(control_frame, text="Проложить маршрут", command=self.add_route)
+        self.route_btn.pack(pady=2)
         self.insert_before_btn = ttk.Button(control_frame, text="Вставить перед", command=lambda: self.insert_point("перед"))
         self.insert_before_btn.pack(pady=2)
         self.insert_after_btn = ttk.Button(control_frame, text="Вставить после", command=lambda: self.insert_point("после"))
         self.insert_after_btn.pack(pady=2)
         self.remove_point_btn = ttk.Button(control_frame, text="Удалить выбранное", command=self.remove_point)
         self.remove_point_btn.pack(pady=5)
+        self.optimize_btn = ttk.Button(control_frame, text="Оптимизировать порядок", command=self.optimize_plan_order)
+        self.optimize_btn.pack(pady=5)
+        self.keep_plan_ends = tk.BooleanVar(value=True)
+        ttk.Checkbutton(control_frame, text="Сохранять начало и конец", variable=self.keep_plan_ends).pack(pady=2)
         self.clear_btn = ttk.Button(control_frame, text="Очистить все", command=self.clear_points)
         self.clear_btn.pack(pady=5)
+        history_frame = ttk.Frame(control_frame)
+        history_frame.pack(pady=2)
+        ttk.Button(history_frame, text="Отменить", command=self.undo).pack(side=tk.LEFT, padx=2)
+        ttk.Button(history_frame, text="Повторить", command=self.redo).pack(side=tk.LEFT, padx=2)
         self.download_btn = ttk.Button(control_frame, text="Сохранить план", command=self.save_plan)
         self.download_btn.pack(pady=5)
         self.upload_plan_btn = ttk.Button(control_frame, text="Загрузить план", command=self.load_plan)
         self.upload_plan_btn.pack(pady=5)
+        self.check_plan_btn = ttk.Button(control_frame, text="Проверить план", command=self.check_plan)
+        self.check_plan_btn.pack(pady=5)
+        plans_frame = ttk.Frame(control_frame)
+        plans_frame.pack(pady=2)
+        self.plan_selector = ttk.Combobox(plans_frame, state="readonly", width=12)
+        self.plan_selector.pack(side=tk.LEFT, padx=2)
+        self.plan_selector.bind("<<ComboboxSelected>>", lambda e: self.select_plan(self.plan_selector.current()))
+        ttk.Button(plans_frame, text="+", width=2, command=self.add_plan).pack(side=tk.LEFT)
+        ttk.Button(plans_frame, text="−", width=2, command=self.remove_plan).pack(side=tk.LEFT)
+        speed_frame = ttk.Frame(control_frame)
+        speed_frame.pack(pady=2)
+        ttk.Label(speed_frame, text="Скорость, м/с:").pack(side=tk.LEFT)
+        self.speed_entry = ttk.Entry(speed_frame, width=6)
+        self.speed_entry.pack(side=tk.LEFT, padx=2)
+        self.speed_entry.bind("<Return>", self.set_plan_speed)
+        self.speed_entry.bind("<FocusOut>", self.set_plan_speed)
+        self.delay_label = ttk.Label(control_frame)
+        self.delay_label.pack(pady=2)
+        conflict_frame = ttk.Frame(control_frame)
+        conflict_frame.pack(pady=2)
+        ttk.Button(conflict_frame, text="Конфликты", command=self.check_conflicts).pack(side=tk.LEFT, padx=2)
+        ttk.Button(conflict_frame, text="Развести", command=self.resolve_plan_conflicts).pack(side=tk.LEFT, padx=2)
+        self.refresh_plan_selector()
+        trajectory_frame = ttk.Frame(control_frame)
+        trajectory_frame.pack(pady=2)
+        ttk.Button(trajectory_frame, text="Траектория", command=self.show_trajectory).pack(side=tk.LEFT, padx=2)
+        ttk.Button(trajectory_frame, text="Экспорт", command=self.export_trajectory).pack(side=tk.LEFT, padx=2)
+        ttk.Button(trajectory_frame, text="Видимость", command=self.show_visibility).pack(side=tk.LEFT, padx=2)
         self.save_project_btn = ttk.Button(control_frame, text="Сохранить проект", command=self.save_project)
         self.save_project_btn.pack(pady=5)
+        self.binary_project = tk.BooleanVar(value=False)
+        ttk.Checkbutton(control_frame, text="Бинарный формат проекта", variable=self.binary_project).pack(pady=2)
         self.load_project_btn = ttk.Button(control_frame, text="Загрузить проект", command=self.load_project)
         self.load_project_btn.pack(pady=5)
-        self.flight_plan_list = tk.Listbox(control_frame, width=30)
+        self.profiling = tk.BooleanVar(value=False)
+        ttk.Checkbutton(control_frame, text="Профилирование", variable=self.profiling, command=self.toggle_profiling).pack(pady=2)
+        ttk.Button(control_frame, text="Экспорт трассы", command=self.export_trace).pack(pady=2)
+        self.flight_plan_list = PlanListView(control_frame, self.flight_plan, width=30)
         self.flight_plan_list.pack(pady=5, fill=tk.BOTH, expand=True)
 
     def setup_plot(self):
@@ -70,6 +258,9 @@ class ArucoMapApp:
         self.canvas.mpl_connect("motion_notify_event", self.on_motion)
         self.canvas.mpl_connect("button_release_event", self.on_release)
         self.canvas.mpl_connect("key_press_event", self.on_key_press)
+        self.canvas.mpl_connect("scroll_event", self.on_scroll)
+        self.canvas.mpl_connect("resize_event", self.update_view)
+        self.connect_view_callbacks()
         self.ax.set_xlabel("X")
         self.ax.set_ylabel("Y")
         self.ax.set_title("Карта ArUco")
@@ -87,245 +278,525 @@ class ArucoMapApp:
         self.draw_obstacles()
 
     def load_map(self):
+        if self.map_loading is not None:
+            self.map_loading.cancel()
+            return
         file_path = filedialog.askopenfilename(filetypes=[("Текстовые файлы", "*.txt")])
         if not file_path:
             return
-        self.markers = []
-        self.marker_positions = []
+        self.map_loading = self.tasks.submit(
+            "Загрузка карты", read_map_task, file_path, on_done=self.finish_map_loading, on_error=self.finish_map_loading
+        )
+        self.load_map_btn.config(text="Отменить загрузку")
+
+    def finish_map_loading(self, result):
+        self.map_loading = None
+        self.load_map_btn.config(text="Загрузить карту")
+        if isinstance(result, CancelledError):
+            return
+        self.replace_markers(MarkerStore())
+        self.history.clear()
+        self.orphan_points.clear()
+        self.map_path = None
         self.clear_plot()
-        errors = []
-        seen_ids = set()
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                for line_num, line in enumerate(f, 1):
-                    line = line.strip()
-                    if not line or line.startswith("#"):
-                        continue
-                    parts = re.split(r"\s+", line)
-                    if len(parts) != 8:
-                        errors.append(f"Строка {line_num}: Некорректное количество элементов")
-                        continue
-                    try:
-                        marker = {
-                            "id": int(parts[0]),
-                            "length": float(parts[1]),
-                            "x": float(parts[2]),
-                            "y": float(parts[3]),
-                            "z": float(parts[4]),
-                            "rot_z": float(parts[5]),
-                            "rot_y": float(parts[6]),
-                            "rot_x": float(parts[7]),
-                        }
-                    except ValueError:
-                        errors.append(f"Строка {line_num}: Ошибка формата данных")
-                        continue
-                    if marker["id"] in seen_ids:
-                        errors.append(f"Строка {line_num}: Повторяющийся ID")
-                        continue
-                    seen_ids.add(marker["id"])
-                    if marker["length"] <= 0:
-                        errors.append(f"Строка {line_num}: Недопустимая длина маркера")
-                    self.markers.append(marker)
-                    self.marker_positions.append((marker["x"], marker["y"]))
-            if errors:
-                raise ValueError("\n".join(errors[:5]))
+            if isinstance(result, Exception):
+                raise result
+            markers, path, stamp = result
+            self.replace_markers(markers)
             self.draw_markers()
+            self.map_path, self.map_stamp = path, stamp
             self.draw_obstacles()
             self.canvas.draw()
         except Exception as e:
             messagebox.showerror("Ошибка", f"Ошибка загрузки карты:\n{str(e)}")
-            self.markers = []
-            self.marker_positions = []
+            self.replace_markers(MarkerStore())
         finally:
             self.ax.relim()
             self.ax.autoscale_view()
             self.canvas.draw()
 
+    def toggle_map_watch(self):
+        if self.watch_job is not None:
+            self.root.after_cancel(self.watch_job)
+            self.watch_job = None
+        if self.watch_map.get():
+            self.watch_job = self.root.after(WATCH_INTERVAL_MS, self.poll_map_file)
+
+    def poll_map_file(self):
+        self.watch_job = self.root.after(WATCH_INTERVAL_MS, self.poll_map_file)
+        if self.map_path is None or self.map_loading is not None or self.map_reload is not None:
+            return
+        try:
+            stamp = map_stamp(self.map_path)
+        except OSError:
+            return
+        if stamp == self.map_stamp:
+            return
+        self.map_stamp = stamp
+        self.map_reload = self.tasks.submit(
+            "Обновление карты", read_map_task, self.map_path, on_done=self.finish_map_reload, on_error=self.finish_map_reload
+        )
+
+    def finish_map_reload(self, result):
+        self.map_reload = None
+        if isinstance(result, CancelledError):
+            return
+        if isinstance(result, Exception):
+            self.status_label.config(text=f"Ошибка обновления карты: {str(result)}")
+            return
+        if result[1] != self.map_path:
+            return
+        self.apply_map_reload(result[0])
+
+    def apply_map_reload(self, markers):
+        points = np.array([point[:2] for plan in self.plans for point in plan["points"]], dtype=float).reshape(-1, 2)
+        matched = self.markers.nearest_many(points[:, 0], points[:, 1], PLAN_MATCH_TOLERANCE) >= 0
+        tracked = matched | np.array([tuple(point) in self.orphan_points for point in points.tolist()], dtype=bool)
+        diff = diff_markers(self.markers, markers.data)
+        edits = len(diff[0]) + len(diff[1]) + len(diff[2])
+        if not edits:
+            return
+        self.history.clear()
+        if edits > WATCH_MAX_EDITS:
+            self.replace_markers(markers)
+            for artist in (self.marker_collection, self.marker_labels, self.marker_extent):
+                if artist is not None and artist.axes is not None:
+                    artist.remove()
+            self.draw_markers()
+            self.update_view()
+            self.canvas.draw_idle()
+        else:
+            apply_marker_diff(self.markers, diff)
+        missing = self.markers.nearest_many(points[:, 0], points[:, 1], PLAN_MATCH_TOLERANCE) < 0
+        self.orphan_points = set(map(tuple, points[tracked & missing].tolist()))
+        self.plot_orphans()
+        self.canvas.draw_idle()
+        start = sum(len(plan["points"]) for plan in self.plans[: self.active_plan])
+        lost = (matched & missing)[start : start + len(self.flight_plan)]
+        if lost.any():
+            numbers = ", ".join(str(i + 1) for i in np.flatnonzero(lost)[:20])
+            messagebox.showwarning("Карта изменена", f"Маркеры точек плана удалены или перемещены: {numbers}")
+
+    def plot_orphans(self):
+        points = [point[:2] for point in self.flight_plan if tuple(point[:2]) in self.orphan_points]
+        if self.orphan_line is None or self.orphan_line.axes is None:
+            (self.orphan_line,) = self.ax.plot([], [], linestyle="none", marker="x", color="darkorange", markersize=12, mew=2, zorder=4)
+        self.orphan_line.set_data([p[0] for p in points], [p[1] for p in points])
+
+    def update_status(self, tasks):
+        if not tasks:
+            self.status_label.config(text="Готово")
+            self.status_progress.stop()
+            self.status_progress.config(mode="determinate", value=0)
+            self.cancel_task_btn.config(state=tk.DISABLED)
+            return
+        task = tasks[0]
+        text = task.name if len(tasks) == 1 else f"{task.name} (+{len(tasks) - 1})"
+        if task.progress is None:
+            if str(self.status_progress.cget("mode")) != "indeterminate":
+                self.status_progress.config(mode="indeterminate")
+                self.status_progress.start(TASK_SPINNER_MS)
+        else:
+            self.status_progress.stop()
+            self.status_progress.config(mode="determinate", value=task.progress)
+            text += f" {task.progress:.0%}"
+        self.status_label.config(text=text)
+        self.cancel_task_btn.config(state=tk.NORMAL)
+
+    def cancel_tasks(self):
+        self.tasks.cancel_all()
+
+    def report_task_error(self, error, message=None):
+        if not isinstance(error, CancelledError):
+            messagebox.showerror("Ошибка", f"{message}: {str(error)}" if message else str(error))
+
+    def on_close(self):
+        self.tasks.shutdown()
+        self.root.destroy()
+
+    def replace_markers(self, markers):
+        self.markers.unsubscribe(self.update_marker_artists)
+        self.markers.unsubscribe(self.update_editor_row)
+        self.markers = markers
+        if hasattr(self, "editor_window") and self.editor_window.winfo_exists():
+            self.load_editor_table()
+            self.markers.subscribe(self.update_editor_row)
+
     def draw_markers(self):
-        for marker in self.markers:
-            rect = Rectangle(
-                (marker["x"] - marker["length"] / 2, marker["y"] - marker["length"] / 2),
-                marker["length"],
-                marker["length"],
-                edgecolor="blue",
-                facecolor="none",
-            )
-            self.ax.add_patch(rect)
-            self.ax.text(
-                marker["x"],
-                marker["y"],
-                str(marker["id"]),
-                ha="center",
-                va="center",
-                color="blue",
-                fontsize=8,
+        self.highlighted_marker = None
+        self.marker_collection, self.marker_labels = marker_artists(self.markers)
+        self.ax.add_artist(self.marker_collection)
+        self.ax.add_artist(self.marker_labels)
+        (self.marker_extent,) = self.ax.plot([], [], linestyle="none", visible=False)
+        self.update_marker_extent()
+        self.markers.subscribe(self.update_marker_artists)
+
+    def update_marker_extent(self):
+        data = self.markers.data
+        self.marker_size, self.marker_pad = marker_scale(self.markers)
+        if not len(data):
+            self.marker_extent.set_data([], [])
+            return
+        x, y = data["x"], data["y"]
+        self.marker_extent.set_data(
+            [x.min() - self.marker_pad, x.max() + self.marker_pad],
+            [y.min() - self.marker_pad, y.max() + self.marker_pad],
+        )
+        self.view_key = None
+
+    def update_marker_artists(self, event, index):
+        if self.marker_collection is None or self.marker_collection.axes is None:
+            return
+        if event == "removed":
+            self.marker_collection.remove_quad(index)
+            self.marker_labels.remove_label(index)
+            if self.highlighted_marker == index:
+                self.highlighted_marker = None
+            elif self.highlighted_marker is not None and self.highlighted_marker > index:
+                self.highlighted_marker -= 1
+        else:
+            row = self.markers.data[index]
+            poses = self.markers.poses
+            quad = (index, poses.footprints[index], poses.kinds[index])
+            label = (index, row["x"], row["y"], str(row["id"]))
+            if event == "added":
+                self.marker_collection.insert_quad(*quad)
+                self.marker_labels.insert_label(*label)
+            else:
+                self.marker_collection.set_quad(*quad)
+                self.marker_labels.set_label(*label)
+        self.marker_collection.set_highlighted(self.highlighted_marker)
+        self.update_marker_extent()
+        self.update_view()
+        self.canvas.draw_idle()
+
+    def connect_view_callbacks(self):
+        self.ax.callbacks.connect("xlim_changed", self.update_view)
+        self.ax.callbacks.connect("ylim_changed", self.update_view)
+
+    def update_view(self, *args):
+        (x0, x1), (y0, y1) = self.ax.get_xlim(), self.ax.get_ylim()
+        if self.marker_collection is not None and self.marker_collection.axes is not None:
+            key = (x0, x1, y0, y1, self.ax.bbox.width, self.markers.version)
+            if key != self.view_key:
+                self.view_key = key
+                set_marker_view(
+                    self.markers,
+                    self.marker_collection,
+                    self.marker_labels,
+                    (x0, x1),
+                    (y0, y1),
+                    self.ax.bbox.width,
+                    self.marker_size,
+                    self.marker_pad,
+                )
+        if self.obstacle_patches:
+            index = self.obstacle_index
+            extent = index.half + index.radius[:, None]
+            lower, upper = index.centers - extent, index.centers + extent
+            inside = (
+                (upper[:, 0] >= min(x0, x1)) & (lower[:, 0] <= max(x0, x1))
+                & (upper[:, 1] >= min(y0, y1)) & (lower[:, 1] <= max(y0, y1))
             )
+            for idx, patch in self.obstacle_patches.items():
+                patch.set_visible(bool(inside[idx]))
+
+    def toggle_profiling(self):
+        if self.profiling.get():
+            self.enable_profiling()
+        else:
+            self.disable_profiling()
+
+    def enable_profiling(self):
+        self.profiler = profiler = Profiler()
+        for name, category in PROFILED_METHODS.items():
+            profiler.wrap(self, name, category=category)
+        module = sys.modules[__name__]
+        for name in PROFILED_IO:
+            profiler.wrap(module, name, category="io")
+        profiler.wrap(self.canvas, "draw", name="canvas.draw", category="frame")
+        profiler.wrap(self.canvas.callbacks, "process", name=lambda signal, *args: f"mpl:{signal}", category="event")
+        profiler.wrap(tk.CallWrapper, "__call__", name=lambda wrapper, *args: f"tk:{getattr(wrapper.func, '__name__', 'callback')}", category="event")
+        self.profile_overlay = tk.Label(self.canvas.get_tk_widget(), justify=tk.LEFT, anchor=tk.NW, bg="white", font=("TkFixedFont", 9))
+        self.profile_overlay.place(x=4, y=4)
+        self.measure_event_lag(time.perf_counter() + PROFILE_LAG_MS / 1000)
+        self.update_profile_overlay()
 
-    def draw_obstacles(self):
+    def disable_profiling(self):
+        if self.profile_overlay is None:
+            return
+        self.profiler.restore()
+        for job in self.profile_jobs.values():
+            self.root.after_cancel(job)
+        self.profile_jobs.clear()
+        self.profile_overlay.destroy()
+        self.profile_overlay = None
+
+    def measure_event_lag(self, expected):
+        now = time.perf_counter()
+        self.profiler.record("event_lag", expected, max(0.0, now - expected), "lag")
+        self.profile_jobs["lag"] = self.root.after(PROFILE_LAG_MS, self.measure_event_lag, now + PROFILE_LAG_MS / 1000)
+
+    def update_profile_overlay(self):
+        lines = []
+        for name, title in (("canvas.draw", "Кадр"), ("event_lag", "Задержка событий")):
+            stats = self.profiler.percentiles(name)
+            if stats is not None:
+                p50, p95, p99 = stats * 1000
+                lines.append(f"{title}: p50 {p50:.1f} / p95 {p95:.1f} / p99 {p99:.1f} мс")
+        self.profile_overlay.config(text="\n".join(lines) or "Нет данных")
+        self.profile_jobs["overlay"] = self.root.after(PROFILE_OVERLAY_MS, self.update_profile_overlay)
+
+    def export_trace(self):
+        if self.profiler is None:
+            messagebox.showwarning("Внимание", "Включите профилирование")
+            return
+        file_path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("Chrome trace", "*.json")])
+        if not file_path:
+            return
+        try:
+            self.profiler.export_chrome_trace(file_path)
+            slowest = sorted(self.profiler.summary().items(), key=lambda item: -item[1]["p95"])[:10]
+            lines = [f"{name}: p95 {stats['p95'] * 1000:.1f} мс ({stats['count']})" for name, stats in slowest]
+            messagebox.showinfo("Трасса сохранена", "\n".join(lines))
+        except Exception as e:
+            messagebox.showerror("Ошибка", f"Ошибка экспорта: {str(e)}")
+
+    def on_scroll(self, event):
+        if not event.inaxes:
+            return
+        factor = ZOOM_STEP if event.button == "down" else 1 / ZOOM_STEP
+        (x0, x1), (y0, y1) = self.ax.get_xlim(), self.ax.get_ylim()
+        self.ax.set_xlim(event.xdata + (x0 - event.xdata) * factor, event.xdata + (x1 - event.xdata) * factor)
+        self.ax.set_ylim(event.ydata + (y0 - event.ydata) * factor, event.ydata + (y1 - event.ydata) * factor)
+        self.canvas.draw_idle()
+
+    def draw_obstacles(self, dragged=None):
         for patch in self.ax.patches + self.ax.collections:
             if hasattr(patch, "is_obstacle") or hasattr(patch, "is_handle"):
                 patch.remove()
         self.obstacle_handles.clear()
+        self.obstacle_patches.clear()
+        self.dirty_obstacles.clear()
+        sync_obstacles(self.obstacles, self.obstacle_index, self.clearance_grid)
+        self.draw_clearance()
         for idx, obstacle in enumerate(self.obstacles):
-            x, y = obstacle["position"]
-            color = "yellow" if idx == self.selected_obstacle else "gray"
-            handles = []
-            if obstacle["type"] == "куб":
-                size = obstacle.get("size", 0.6)
-                patch = Rectangle(
-                    (x - size / 2, y - size / 2),
-                    size,
-                    size,
-                    facecolor=color,
-                    edgecolor="black",
-                    alpha=0.7,
-                )
-                if idx == self.selected_obstacle:
-                    handles.append(Circle((x + size / 2, y + size / 2), 0.1, facecolor="red"))
-                    handles.append(Circle((x - size / 2, y - size / 2), 0.1, facecolor="red"))
-            elif obstacle["type"] == "арка":
-                length = obstacle.get("length", 1.0)
-                thickness = obstacle.get("thickness", 0.2)
-                patch = Rectangle(
-                    (x - length / 2, y - thickness / 2),
-                    length,
-                    thickness,
-                    facecolor=color,
-                    alpha=0.7,
-                    edgecolor="black",
-                )
-                if idx == self.selected_obstacle:
-                    handles.append(Circle((x + length / 2, y), 0.1, facecolor="red"))
-                    handles.append(Circle((x, y + thickness / 2), 0.1, facecolor="red"))
-            elif obstacle["type"] == "флаг":
-                radius = obstacle.get("radius", 0.25)
-                patch = Circle((x, y), radius, facecolor=color, alpha=0.7, edgecolor="black")
-                if idx == self.selected_obstacle:
-                    handles.append(Circle((x + radius, y), 0.1, facecolor="red"))
+            patch, handles = obstacle_artists(obstacle, idx == self.selected_obstacle)
             patch.is_obstacle = True
             patch.obstacle_idx = idx
             self.ax.add_patch(patch)
-            if idx == self.selected_obstacle:
+            self.obstacle_patches[idx] = patch
+            if handles:
                 for handle in handles:
                     handle.is_handle = True
                     self.ax.add_patch(handle)
                 self.obstacle_handles[idx] = handles
+        self.update_collisions()
         self.ax.relim()
         self.ax.autoscale_view()
+        self.update_view()
+        if dragged is not None:
+            self.dirty_obstacles = {dragged}
+            for artist in self.drag_artists():
+                artist.set_animated(True)
         self.canvas.draw()
 
+    def draw_clearance(self):
+        grid = self.clearance_grid
+        if not self.show_clearance.get() or not grid.field.size:
+            if self.clearance_image is not None:
+                self.clearance_image.remove()
+                self.clearance_image = None
+            return
+        if self.clearance_image is None:
+            self.clearance_image = BboxImage(
+                Bbox.null(),
+                cmap="RdYlGn",
+                norm=Normalize(0.0, grid.truncation),
+                origin="lower",
+                interpolation="nearest",
+                alpha=0.4,
+                zorder=0,
+            )
+            self.ax.add_artist(self.clearance_image)
+        x0, x1, y0, y1 = grid.extent
+        self.clearance_image.set_data(grid.field)
+        self.clearance_image.bbox = TransformedBbox(Bbox.from_extents(x0, y0, x1, y1), self.ax.transData)
+
+    def toggle_clearance(self):
+        self.draw_clearance()
+        self.canvas.draw_idle()
+
+    def update_obstacle_artists(self, idx):
+        shape, handle_centers = obstacle_shape(self.obstacles[idx])
+        patch = self.obstacle_patches[idx]
+        if isinstance(patch, Circle):
+            patch.set_center(shape[:2])
+            patch.set_radius(shape[2])
+        else:
+            patch.set_bounds(*shape)
+        for handle, center in zip(self.obstacle_handles.get(idx, []), handle_centers):
+            handle.set_center(center)
+
+    def drag_artists(self):
+        artists = []
+        for idx in sorted(self.dirty_obstacles):
+            artists.append(self.obstacle_patches[idx])
+            artists.extend(self.obstacle_handles.get(idx, []))
+        return artists
+
+    def start_drag(self):
+        self.dragging = True
+        self.drag_origin = dict(self.obstacles[self.selected_obstacle])
+        self.drag_background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.blit_dirty_obstacles()
+
+    def blit_dirty_obstacles(self):
+        if self.drag_background is None:
+            return
+        self.canvas.restore_region(self.drag_background)
+        for artist in self.drag_artists():
+            self.ax.draw_artist(artist)
+        self.canvas.blit(self.ax.bbox)
+
     def on_click(self, event):
         if not event.inaxes:
             self.selected_obstacle = None
             self.draw_obstacles()
             return
+        if event.button == 3:
+            self.pan_origin = (event.x, event.y, self.ax.get_xlim(), self.ax.get_ylim())
+            return
         if self.current_mode == "добавление":
-            x, y = event.xdata, event.ydata
-            obstacle_type = self.obstacle_type.get()
-            new_obstacle = {"type": obstacle_type, "position": (x, y)}
-            if obstacle_type == "куб":
-                new_obstacle["size"] = 0.6
-            elif obstacle_type == "арка":
-                new_obstacle["length"] = 1.0
-                new_obstacle["thickness"] = 0.2
-            elif obstacle_type == "флаг":
-                new_obstacle["radius"] = 0.25
-            self.obstacles.append(new_obstacle)
-            self.draw_obstacles()
+            self.set_obstacle(len(self.obstacles), None, new_obstacle(self.obstacle_type.get(), event.xdata, event.ydata))
+            return
+        markers = self.markers if self.current_mode == "обычный" else None
+        hit, index = pick_target(self.obstacle_index, markers, event.xdata, event.ydata, self.selected_obstacle)
+        if hit is not None:
+            idx, handle_idx = hit
+            self.selected_obstacle = idx
+            self.current_mode = "редактирование"
+            self.draw_obstacles(dragged=idx)
+            if handle_idx is not None:
+                self.resize_handle = (idx, handle_idx)
+            self.start_drag()
             return
-        for patch in reversed(self.ax.patches):
-            if hasattr(patch, "contains") and patch.contains(event)[0]:
-                if hasattr(patch, "obstacle_idx"):
-                    self.selected_obstacle = patch.obstacle_idx
-                    self.current_mode = "редактирование"
-                    self.draw_obstacles()
-                    for idx, handles in self.obstacle_handles.items():
-                        for handle_idx, handle in enumerate(handles):
-                            if handle.contains(event)[0]:
-                                self.resize_handle = (idx, handle_idx)
-                                self.dragging = True
-                                return
-                    self.dragging = True
-                    return
-        if self.current_mode == "обычный":
-            x_click, y_click = event.xdata, event.ydata
-            min_dist = float("inf")
-            closest = None
-            for x, y in self.marker_positions:
-                dist = ((x - x_click) ** 2 + (y - y_click) ** 2) ** 0.5
-                if dist < min_dist:
-                    min_dist = dist
-                    closest = (x, y)
-            if min_dist <= 0.11:
-                self.selected_marker = closest
-                self.highlight_marker(closest)
-        if not any(patch.contains(event)[0] for patch in self.ax.patches):
+        if index is not None:
+            self.selected_marker = self.markers.position(index)
+            self.highlight_marker(index)
+        if self.selected_obstacle is not None or self.current_mode != "обычный":
             self.selected_obstacle = None
             self.current_mode = "обычный"
             self.draw_obstacles()
 
     def on_motion(self, event):
+        if self.pan_origin is not None:
+            px, py, (x0, x1), (y0, y1) = self.pan_origin
+            dx = (event.x - px) * (x1 - x0) / self.ax.bbox.width
+            dy = (event.y - py) * (y1 - y0) / self.ax.bbox.height
+            self.ax.set_xlim(x0 - dx, x1 - dx)
+            self.ax.set_ylim(y0 - dy, y1 - dy)
+            self.canvas.draw_idle()
+            return
         if not self.dragging or not event.inaxes:
             return
+        self.pending_motion = (event.xdata, event.ydata)
+        if self.motion_job is None:
+            self.motion_job = self.root.after(FRAME_INTERVAL_MS, self.flush_motion)
+
+    def flush_motion(self):
+        self.motion_job = None
+        if not self.dragging or self.pending_motion is None:
+            return
+        x, y = self.pending_motion
+        self.pending_motion = None
         try:
-            x, y = event.xdata, event.ydata
-            obstacle = self.obstacles[self.selected_obstacle]
-            original_x, original_y = obstacle["position"]
-            if self.resize_handle is not None:
-                idx, handle_idx = self.resize_handle
-                if obstacle["type"] == "куб":
-                    if handle_idx == 0:
-                        new_size = max(0.2, (x - (original_x - obstacle["size"] / 2)))
-                        obstacle["size"] = new_size
-                    else:
-                        new_size = max(0.2, ((original_x + obstacle["size"] / 2) - x))
-                        obstacle["size"] = new_size
-                        obstacle["position"] = (x + new_size / 2, y + new_size / 2)
-                elif obstacle["type"] == "арка":
-                    if handle_idx == 0:
-                        new_length = max(0.3, x - (original_x - obstacle["length"] / 2))
-                        obstacle["length"] = new_length
-                    elif handle_idx == 1:
-                        new_thickness = max(0.1, y - (original_y - obstacle["thickness"] / 2))
-                        obstacle["thickness"] = new_thickness
-                elif obstacle["type"] == "флаг":
-                    dx = x - original_x
-                    dy = y - original_y
-                    new_radius = max(0.1, (dx**2 + dy**2) ** 0.5)
-                    obstacle["radius"] = new_radius
-            else:
-                if obstacle["type"] in ["флаг", "куб"]:
-                    obstacle["position"] = (x, y)
-                elif obstacle["type"] == "арка":
-                    obstacle["position"] = (x, y)
-            self.draw_obstacles()
+            handle_idx = self.resize_handle[1] if self.resize_handle is not None else None
+            drag_obstacle(self.obstacles[self.selected_obstacle], handle_idx, x, y)
+            self.dirty_obstacles.add(self.selected_obstacle)
+            self.clearance_grid.update(self.obstacles)
+            for idx in self.dirty_obstacles:
+                self.update_obstacle_artists(idx)
+            self.blit_dirty_obstacles()
         except Exception as e:
             print(f"Ошибка при обработке перемещения: {str(e)}")
             self.dragging = False
             self.resize_handle = None
 
     def on_release(self, event):
+        if self.pan_origin is not None:
+            self.pan_origin = None
+            return
+        if self.motion_job is not None:
+            self.root.after_cancel(self.motion_job)
+            self.flush_motion()
         self.dragging = False
         self.resize_handle = None
+        self.pending_motion = None
+        if self.drag_background is not None:
+            for artist in self.drag_artists():
+                artist.set_animated(False)
+            self.drag_background = None
+            idx = self.selected_obstacle
+            if self.obstacles[idx] != self.drag_origin:
+                self.set_obstacle(idx, self.drag_origin, self.obstacles[idx])
+            else:
+                self.draw_obstacles()
+            self.drag_origin = None
 
-    def highlight_marker(self, position):
-        self.clear_highlights()
-        for marker in self.markers:
-            if (marker["x"], marker["y"]) == position:
-                for patch in self.ax.patches:
-                    if isinstance(patch, Rectangle) and patch.get_xy() == (
-                        marker["x"] - marker["length"] / 2,
-                        marker["y"] - marker["length"] / 2,
-                    ):
-                        patch.set_edgecolor("red")
-                        self.highlighted_patch = patch
-                        break
+    def set_obstacle(self, index, old, new):
+        if old is None:
+            self.obstacles.insert(index, dict(new))
+        elif new is None:
+            del self.obstacles[index]
+        else:
+            self.obstacles[index] = dict(new)
+        if old is None or new is None:
+            self.selected_obstacle = None
+        self.history.record(lambda: self.set_obstacle(index, new, old), lambda: self.set_obstacle(index, old, new))
+        self.draw_obstacles()
+        if self.route_planner is not None and self.route_planner.is_current(self.markers):
+            self.route_planner.sync(self.obstacles)
+
+    def set_marker(self, index, old, new):
+        if old is None:
+            self.markers.insert(index, new)
+        elif new is None:
+            del self.markers[index]
+        else:
+            self.markers[index] = new
+        self.history.record(lambda: self.set_marker(index, new, old), lambda: self.set_marker(index, old, new))
+
+    def splice_plan(self, index, count, points):
+        old = self.flight_plan[index : index + count]
+        del self.flight_plan[index : index + count]
+        if count:
+            self.flight_plan_list.removed(index, count)
+        self.flight_plan[index:index] = points
+        if points:
+            self.flight_plan_list.inserted(index, len(points))
+        self.history.record(lambda: self.splice_plan(index, len(points), old), lambda: self.splice_plan(index, count, points))
+        self.plot_path()
+
+    def undo(self, event=None):
+        if not self.dragging:
+            self.history.undo()
+
+    def redo(self, event=None):
+        if not self.dragging:
+            self.history.redo()
+
+    def highlight_marker(self, index):
+        if self.marker_collection is not None:
+            self.marker_collection.set_highlighted(index)
+            self.highlighted_marker = index
         self.canvas.draw()
 
     def clear_highlights(self):
-        if self.highlighted_patch:
-            self.highlighted_patch.set_edgecolor("blue")
-            self.highlighted_patch = None
+        if self.highlighted_marker is not None:
+            self.marker_collection.set_highlighted(None)
+            self.highlighted_marker = None
             self.canvas.draw()
 
     def add_waypoint(self):
@@ -338,9 +809,36 @@ class ArucoMapApp:
             messagebox.showerror("Ошибка", "Некорректное значение высоты")
             return
         x, y = self.selected_marker
-        self.flight_plan.append((x, y, z))
-        self.update_plan_list()
-        self.plot_path()
+        self.splice_plan(len(self.flight_plan), 0, [(x, y, z)])
+        self.flight_plan_list.see(len(self.flight_plan) - 1)
+        self.clear_highlights()
+
+    def get_route_planner(self):
+        if self.route_planner is None or not self.route_planner.is_current(self.markers):
+            self.route_planner = RoutePlanner(self.markers)
+        return self.route_planner
+
+    def add_route(self):
+        if not self.selected_marker or not self.flight_plan:
+            messagebox.showwarning("Внимание", "Добавьте начальную точку и выберите конечный маркер на карте")
+            return
+        try:
+            z = abs(float(self.z_entry.get()))
+        except ValueError:
+            messagebox.showerror("Ошибка", "Некорректное значение высоты")
+            return
+        start = self.markers.nearest(self.flight_plan[-1][0], self.flight_plan[-1][1], 0.0)
+        goal = self.markers.nearest(self.selected_marker[0], self.selected_marker[1], 0.0)
+        if start is None or goal is None:
+            messagebox.showwarning("Внимание", "Последняя точка плана не совпадает с маркером")
+            return
+        try:
+            route = self.get_route_planner().plan(start, goal, z, self.obstacles)
+        except ValueError as e:
+            messagebox.showerror("Ошибка", str(e))
+            return
+        self.splice_plan(len(self.flight_plan), 0, route[1:])
+        self.flight_plan_list.see(len(self.flight_plan) - 1)
         self.clear_highlights()
 
     def insert_point(self, position):
@@ -356,76 +854,332 @@ class ArucoMapApp:
         if position == "после":
             idx += 1
         x, y = self.selected_marker
-        self.flight_plan.insert(idx, (x, y, z))
+        self.splice_plan(idx, 0, [(x, y, z)])
+
+    def update_plan_list(self):
+        self.flight_plan_list.reset(self.flight_plan)
+
+    def refresh_plan_selector(self):
+        plan = self.plans[self.active_plan]
+        self.plan_selector.config(values=[p["name"] for p in self.plans])
+        self.plan_selector.current(self.active_plan)
+        self.speed_entry.delete(0, tk.END)
+        self.speed_entry.insert(0, f"{plan['speed']:g}")
+        self.delay_label.config(text=f"Задержка старта: {plan.get('delay', 0.0):.1f} с")
+
+    def set_plans(self, plans, active=0):
+        self.plans = plans
+        self.select_plan(active)
+
+    def select_plan(self, index):
+        self.active_plan = index
+        self.flight_plan = self.plans[index]["points"]
+        self.history.clear()
+        self.refresh_plan_selector()
         self.update_plan_list()
+        self.draw_other_plans()
         self.plot_path()
 
-    def update_plan_list(self):
-        self.flight_plan_list.delete(0, tk.END)
-        for point in self.flight_plan:
-            self.flight_plan_list.insert(tk.END, f"({point[0]:.2f}, {point[1]:.2f}, {point[2]:.2f})")
+    def add_plan(self):
+        names = {plan["name"] for plan in self.plans}
+        number = len(self.plans) + 1
+        while f"Дрон {number}" in names:
+            number += 1
+        self.plans.append(new_plan(f"Дрон {number}", [], self.plans[self.active_plan]["speed"]))
+        self.select_plan(len(self.plans) - 1)
+
+    def remove_plan(self):
+        if len(self.plans) == 1:
+            messagebox.showwarning("Внимание", "Должен остаться хотя бы один план")
+            return
+        if not messagebox.askyesno("Удаление плана", f"Удалить план «{self.plans[self.active_plan]['name']}»?"):
+            return
+        del self.plans[self.active_plan]
+        self.select_plan(min(self.active_plan, len(self.plans) - 1))
+
+    def set_plan_speed(self, event=None):
+        try:
+            speed = float(self.speed_entry.get())
+        except ValueError:
+            speed = 0.0
+        if speed > 0:
+            self.plans[self.active_plan]["speed"] = speed
+        self.refresh_plan_selector()
+
+    def plans_snapshot(self):
+        return [dict(plan, points=list(plan["points"])) for plan in self.plans]
+
+    def draw_other_plans(self):
+        if self.other_plan_lines is not None and self.other_plan_lines.axes is not None:
+            self.other_plan_lines.remove()
+        self.other_plan_lines = None
+        others = [
+            np.array([point[:2] for point in plan["points"]], dtype=float)
+            for i, plan in enumerate(self.plans)
+            if i != self.active_plan and len(plan["points"]) > 1
+        ]
+        if others:
+            self.other_plan_lines = LineCollection(others, colors="gray", linestyles="dashed", linewidths=1, zorder=2)
+            self.ax.add_collection(self.other_plan_lines, autolim=False)
+
+    def check_conflicts(self):
+        plans = self.plans_snapshot()
+        self.tasks.submit(
+            "Поиск конфликтов",
+            lambda task: find_conflicts(plans),
+            on_done=lambda conflicts: self.show_conflicts(conflicts, plans),
+            on_error=self.report_task_error,
+        )
+
+    def show_conflicts(self, conflicts, plans):
+        if plans != self.plans:
+            return
+        self.clear_overlay()
+        self.canvas.draw_idle()
+        if not conflicts:
+            messagebox.showinfo("Конфликты", "Опасных сближений дронов нет")
+            return
+        segments = []
+        for i, j, first, second, _, _ in conflicts:
+            for plan, segment in ((i, first), (j, second)):
+                points = plans[plan]["points"]
+                ends = np.clip([segment, segment + 1], 0, len(points) - 1)
+                segments.append([points[ends[0]][:2], points[ends[1]][:2]])
+        self.overlay_lines = LineCollection(
+            segments, colors="magenta", linewidths=6, alpha=0.5, capstyle="round", zorder=3
+        )
+        self.ax.add_collection(self.overlay_lines, autolim=False)
+        self.canvas.draw_idle()
+        lines = [
+            f"{plans[i]['name']} ({describe_segment(first, plans[i]['points'])}) и "
+            f"{plans[j]['name']} ({describe_segment(second, plans[j]['points'])}): t={time:.1f} с, {distance:.2f} м"
+            for i, j, first, second, time, distance in conflicts[:10]
+        ]
+        if len(conflicts) > 10:
+            lines.append(f"... всего конфликтов: {len(conflicts)}")
+        messagebox.showwarning("Конфликты", "\n".join(lines))
+
+    def resolve_plan_conflicts(self):
+        plans = self.plans_snapshot()
+        self.tasks.submit(
+            "Разведение планов",
+            lambda task: resolve_conflicts(plans),
+            on_done=lambda delays: self.apply_plan_delays(delays, plans),
+            on_error=self.report_task_error,
+        )
+
+    def apply_plan_delays(self, delays, plans):
+        if plans != self.plans:
+            return
+        for plan, delay in zip(self.plans, delays):
+            plan["delay"] = delay
+        self.refresh_plan_selector()
+        self.clear_overlay()
+        self.canvas.draw_idle()
+        lines = [f"{plan['name']}: {plan['delay']:.1f} с" for plan in self.plans]
+        messagebox.showinfo("Задержки старта", "\n".join(lines))
 
     def plot_path(self):
-        if hasattr(self, "path_line"):
-            self.path_line.remove()
-        if len(self.flight_plan) >= 2:
-            x = [p[0] for p in self.flight_plan]
-            y = [p[1] for p in self.flight_plan]
-            (self.path_line,) = self.ax.plot(x, y, "r-", marker="o", markersize=5)
-        elif len(self.flight_plan) == 1:
-            x, y, _ = self.flight_plan[0]
-            (self.path_line,) = self.ax.plot([x], [y], "ro", markersize=5)
+        if self.path_line is None or self.path_line.axes is None:
+            (self.path_line,) = self.ax.plot([], [], "r-", marker="o", markersize=5)
+        points = np.array([point[:2] for point in self.flight_plan], dtype=float).reshape(-1, 2)
+        self.path_line.set_data(points[:, 0], points[:, 1])
+        self.plot_orphans()
+        self.clear_overlay()
+        self.update_collisions()
         self.ax.relim()
         self.ax.autoscale_view()
+        self.canvas.draw_idle()
+
+    def update_collisions(self):
+        collisions = self.collision_checker.update(self.flight_plan, self.obstacles)
+        if self.collision_lines is not None and self.collision_lines.axes is not None:
+            self.collision_lines.remove()
+        self.collision_lines = None
+        segments = sorted({segment for segment, _ in collisions})
+        if segments:
+            points = np.array([point[:2] for point in self.flight_plan], dtype=float)
+            ends = np.minimum(np.array(segments) + 1, len(points) - 1)
+            self.collision_lines = LineCollection(
+                np.stack([points[segments], points[ends]], axis=1),
+                colors="red",
+                linewidths=6,
+                alpha=0.4,
+            )
+            self.ax.add_collection(self.collision_lines, autolim=False)
+        return collisions
+
+    def plan_ready(self):
+        if len(self.flight_plan) < 2:
+            messagebox.showwarning("Внимание", "В плане должно быть не меньше двух точек")
+            return False
+        return True
+
+    def clear_overlay(self):
+        if self.overlay_lines is not None and self.overlay_lines.axes is not None:
+            self.overlay_lines.remove()
+        self.overlay_lines = None
+
+    def show_trajectory(self):
+        if not self.plan_ready():
+            return
+        plan, speed = list(self.flight_plan), self.plans[self.active_plan]["speed"]
+        self.tasks.submit_process(
+            "Расчет траектории",
+            Trajectory,
+            plan,
+            speed,
+            TRAJECTORY_ACCEL,
+            on_done=lambda trajectory: self.draw_trajectory(trajectory, plan),
+            on_error=self.report_task_error,
+        )
+
+    def draw_trajectory(self, trajectory, plan):
+        if plan != self.flight_plan:
+            return
+        self.clear_overlay()
+        rate = min(50.0, TRAJECTORY_DISPLAY_POINTS / max(trajectory.duration, 1e-9))
+        samples = np.concatenate(list(trajectory.samples(rate)))
+        speed = np.linalg.norm(samples[:, 4:7], axis=1)
+        self.overlay_lines = LineCollection(
+            np.stack([samples[:-1, 1:3], samples[1:, 1:3]], axis=1),
+            array=(speed[:-1] + speed[1:]) / 2,
+            cmap="viridis",
+            linewidths=3,
+            zorder=3,
+        )
+        self.ax.add_collection(self.overlay_lines, autolim=False)
+        self.canvas.draw_idle()
+        messagebox.showinfo("Траектория", f"Длительность полета: {trajectory.duration:.1f} с")
+
+    def export_trajectory(self):
+        if not self.plan_ready():
+            return
+        file_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV", "*.csv")])
+        if not file_path:
+            return
+        plan, speed = list(self.flight_plan), self.plans[self.active_plan]["speed"]
+        self.tasks.submit(
+            "Экспорт траектории",
+            lambda task: write_trajectory(file_path, Trajectory(plan, speed, TRAJECTORY_ACCEL)),
+            on_error=lambda e: self.report_task_error(e, "Ошибка экспорта"),
+        )
+
+    def show_visibility(self):
+        if not self.plan_ready():
+            return
+        plan, markers = list(self.flight_plan), self.markers.copy()
+        self.tasks.submit(
+            "Анализ видимости",
+            lambda task: VisibilityAnalysis(plan, markers),
+            on_done=lambda analysis: self.draw_visibility(analysis, plan),
+            on_error=self.report_task_error,
+        )
+
+    def draw_visibility(self, analysis, plan):
+        if plan != self.flight_plan:
+            return
+        self.clear_overlay()
+        starts = np.arange(0, len(analysis.counts), int(np.ceil(len(analysis.counts) / TRAJECTORY_DISPLAY_POINTS)))
+        points = analysis.positions[np.append(starts, len(analysis.positions) - 1), :2]
+        self.overlay_lines = LineCollection(
+            np.stack([points[:-1], points[1:]], axis=1),
+            array=np.minimum.reduceat(analysis.counts, starts),
+            cmap="RdYlGn",
+            norm=Normalize(0, 3 * analysis.min_markers),
+            linewidths=3,
+            zorder=3,
+        )
+        self.ax.add_collection(self.overlay_lines, autolim=False)
+        self.canvas.draw_idle()
+        spans = analysis.weak_spans()
+        if not spans:
+            messagebox.showinfo("Видимость маркеров", "Маркеры видны на всем маршруте")
+            return
+        lines = [
+            f"Отрезки {first + 1}-{last + 1}: {start:.1f}-{end:.1f} м" if first != last else f"Отрезок {first + 1}: {start:.1f}-{end:.1f} м"
+            for first, last, start, end in spans[:10]
+        ]
+        if len(spans) > 10:
+            lines.append(f"... всего участков: {len(spans)}")
+        messagebox.showwarning("Видимость маркеров", "Участки без маркеров в кадре:\n" + "\n".join(lines))
+
+    def check_plan(self):
+        collisions = self.update_collisions()
         self.canvas.draw()
+        if not collisions:
+            messagebox.showinfo("Проверка плана", "Пересечений с препятствиями нет")
+            return
+        lines = [f"Отрезок {segment + 1}: препятствие {obstacle + 1}" for segment, obstacle in collisions[:10]]
+        if len(collisions) > 10:
+            lines.append(f"... всего пересечений: {len(collisions)}")
+        messagebox.showwarning("Проверка плана", "\n".join(lines))
 
     def remove_point(self):
         selected = self.flight_plan_list.curselection()
         if selected:
-            self.flight_plan.pop(selected[0])
-            self.update_plan_list()
-            self.plot_path()
+            self.splice_plan(selected[0], 1, [])
+
+    def optimize_plan_order(self):
+        if len(self.flight_plan) < 3:
+            return
+        keep_ends = self.keep_plan_ends.get()
+        plan = list(self.flight_plan)
+        self.tasks.submit(
+            "Оптимизация порядка",
+            lambda task: optimize_order(plan, fixed_start=keep_ends, fixed_end=keep_ends, time_budget=TOUR_TIME_BUDGET),
+            on_done=lambda order: self.apply_plan_order(order, plan),
+            on_error=self.report_task_error,
+        )
+
+    def apply_plan_order(self, order, plan):
+        if plan != self.flight_plan:
+            return
+        before = path_length(self.flight_plan)
+        if path_length(self.flight_plan, order) >= before:
+            return
+        self.splice_plan(0, len(self.flight_plan), [self.flight_plan[i] for i in order])
+        messagebox.showinfo("Оптимизация", f"Длина маршрута: {before:.2f} -> {path_length(self.flight_plan):.2f}")
 
     def clear_points(self):
-        self.flight_plan = []
-        self.update_plan_list()
-        self.plot_path()
+        self.splice_plan(0, len(self.flight_plan), [])
 
     def save_plan(self):
         if not self.flight_plan:
             return
-        file_path = filedialog.asksaveasfilename(defaultextension=".txt", filetypes=[("Текстовые файлы", "*.txt")])
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".txt",
+            filetypes=[(writer.description, "*" + writer.extension) for writer in PLAN_WRITERS.values()],
+        )
         if not file_path:
             return
-        with open(file_path, "w") as f:
-            points = [f"({x:.2f},{y:.2f},{z:.2f})" for x, y, z in self.flight_plan]
-            f.write(f"[{','.join(points)}]")
+        plan = self.plans[self.active_plan]
+        points, speed, delay = list(self.flight_plan), plan["speed"], plan.get("delay", 0.0)
+        self.tasks.submit(
+            "Сохранение плана",
+            lambda task: write_plan(file_path, points, speed=speed, delay=delay),
+            on_error=lambda e: self.report_task_error(e, "Ошибка сохранения"),
+        )
 
     def load_plan(self):
         file_path = filedialog.askopenfilename(filetypes=[("Текстовые файлы", "*.txt")])
         if not file_path:
             return
         try:
-            with open(file_path, "r") as f:
-                content = f.read()
-            pattern = r"\(([\d.]+),([\d.]+),([\d.]+)\)"
-            matches = re.findall(pattern, content)
-            if not matches:
-                raise ValueError("Некорректный формат файла")
-            new_plan = []
-            for match in matches:
-                x, y, z = map(float, match)
-                if (x, y) not in self.marker_positions:
-                    raise ValueError(f"Маркер не найден: ({x:.2f}, {y:.2f})")
-                new_plan.append((x, y, z))
-            self.flight_plan = new_plan
-            self.update_plan_list()
-            self.plot_path()
+            self.splice_plan(0, len(self.flight_plan), read_plan(file_path, self.markers))
         except Exception as e:
             messagebox.showerror("Ошибка", str(e))
 
     def clear_plot(self):
         self.ax.clear()
+        self.overlay_lines = None
+        self.clearance_image = None
+        self.connect_view_callbacks()
+        self.collision_lines = None
+        self.orphan_line = None
+        self.other_plan_lines = None
+        self.marker_collection = None
+        self.highlighted_marker = None
         self.ax.set_xlabel("X")
         self.ax.set_ylabel("Y")
         self.ax.set_title("Карта ArUco")
@@ -446,9 +1200,7 @@ class ArucoMapApp:
         if self.selected_obstacle is not None:
             try:
                 if 0 <= self.selected_obstacle < len(self.obstacles):
-                    del self.obstacles[self.selected_obstacle]
-                    self.selected_obstacle = None
-                    self.draw_obstacles()
+                    self.set_obstacle(self.selected_obstacle, self.obstacles[self.selected_obstacle], None)
             except Exception as e:
                 messagebox.showerror("Ошибка", f"Не удалось удалить препятствие: {str(e)}")
 
@@ -456,55 +1208,60 @@ class ArucoMapApp:
         file_path = filedialog.asksaveasfilename(defaultextension=".aproject", filetypes=[("Проект ArUco", "*.aproject")])
         if not file_path:
             return
-        project_data = {
-            "metadata": {"version": "1.0", "type": "aruco_project"},
-            "markers": self.markers,
-            "obstacles": self.obstacles,
-            "flight_plan": self.flight_plan,
-        }
-        try:
-            with open(file_path, "w") as f:
-                json.dump(project_data, f, indent=2)
-            messagebox.showinfo("Успех", "Проект успешно сохранен")
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Ошибка сохранения: {str(e)}")
+        markers, obstacles, plans = self.markers.copy(), [dict(o) for o in self.obstacles], self.plans_snapshot()
+        binary = self.binary_project.get()
+        self.tasks.submit(
+            "Сохранение проекта",
+            lambda task: write_project(file_path, markers, obstacles, plans[0]["points"], binary=binary, plans=plans),
+            on_done=lambda result: messagebox.showinfo("Успех", "Проект успешно сохранен"),
+            on_error=lambda e: self.report_task_error(e, "Ошибка сохранения"),
+        )
 
     def load_project(self):
         file_path = filedialog.askopenfilename(filetypes=[("Проект ArUco", "*.aproject")])
         if not file_path:
             return
+        self.tasks.submit(
+            "Загрузка проекта",
+            read_project_task,
+            file_path,
+            on_done=self.finish_project_loading,
+            on_error=self.finish_project_loading,
+        )
+
+    def finish_project_loading(self, project):
+        if isinstance(project, CancelledError):
+            return
         try:
-            with open(file_path, "r") as f:
-                project_data = json.load(f)
-            if project_data.get("metadata", {}).get("type") != "aruco_project":
-                raise ValueError("Неверный формат файла проекта")
-            self.markers = []
+            if isinstance(project, Exception):
+                raise project
+            self.history.clear()
+            self.orphan_points.clear()
+            self.map_path = None
+            self.replace_markers(MarkerStore())
             self.obstacles = []
             self.flight_plan = []
             self.clear_plot()
-            self.markers = project_data["markers"]
-            self.marker_positions = [(m["x"], m["y"]) for m in self.markers]
-            self.obstacles = project_data["obstacles"]
-            self.flight_plan = [tuple(point) for point in project_data["flight_plan"]]
+            self.replace_markers(project["markers"])
+            self.obstacles = project["obstacles"]
             self.draw_markers()
             self.draw_obstacles()
-            self.update_plan_list()
-            self.plot_path()
+            self.set_plans(project["plans"])
             messagebox.showinfo("Успех", "Проект успешно загружен")
         except Exception as e:
             messagebox.showerror("Ошибка", f"Ошибка загрузки: {str(e)}")
-            self.markers = []
+            self.replace_markers(MarkerStore())
             self.obstacles = []
-            self.flight_plan = []
             self.clear_plot()
+            self.set_plans([new_plan(DEFAULT_PLAN_NAME)])
 
     def open_editor(self):
         self.editor_window = tk.Toplevel(self.root)
         self.editor_window.title("Редактор карты")
         self.editor_window.geometry("800x600")
-        self.editing_markers = [m.copy() for m in self.markers]
         self.create_editor_widgets()
         self.load_editor_table()
+        self.markers.subscribe(self.update_editor_row)
         self.editor_window.protocol("WM_DELETE_WINDOW", self.close_editor)
 
     def create_editor_widgets(self):
@@ -523,10 +1280,19 @@ class ArucoMapApp:
         self.marker_table.bind("<Double-1>", self.edit_marker)
 
     def load_editor_table(self):
-        for item in self.marker_table.get_children():
-            self.marker_table.delete(item)
-        for marker in self.editing_markers:
-            self.marker_table.insert("", tk.END, values=(marker["id"], f"{marker['x']:.2f}", f"{marker['y']:.2f}", f"{marker['length']:.2f}"))
+        self.marker_table.delete(*self.marker_table.get_children())
+        self.editor_rows = [self.marker_table.insert("", tk.END, values=self.editor_row_values(marker)) for marker in self.markers]
+
+    def editor_row_values(self, marker):
+        return (marker["id"], f"{marker['x']:.2f}", f"{marker['y']:.2f}", f"{marker['length']:.2f}")
+
+    def update_editor_row(self, event, index):
+        if event == "removed":
+            self.marker_table.delete(self.editor_rows.pop(index))
+        elif event == "added":
+            self.editor_rows.insert(index, self.marker_table.insert("", index, values=self.editor_row_values(self.markers[index])))
+        else:
+            self.marker_table.item(self.editor_rows[index], values=self.editor_row_values(self.markers[index]))
 
     def add_marker_dialog(self):
         dialog = tk.Toplevel(self.editor_window)
@@ -549,9 +1315,7 @@ class ArucoMapApp:
                     "rot_y": 0.0,
                     "rot_x": 0.0,
                 }
-                self.editing_markers.append(new_marker)
-                self.load_editor_table()
-                self.update_main_display()
+                self.set_marker(len(self.markers), None, new_marker)
                 dialog.destroy()
             except ValueError:
                 messagebox.showerror("Ошибка", "Некорректные данные")
@@ -562,7 +1326,7 @@ class ArucoMapApp:
         if not selected:
             return
         index = self.marker_table.index(selected[0])
-        marker = self.editing_markers[index]
+        marker = self.markers[index]
         dialog = tk.Toplevel(self.editor_window)
         dialog.title("Редактирование маркера")
         entries = {}
@@ -574,7 +1338,7 @@ class ArucoMapApp:
             entries[label].grid(row=i, column=1, padx=5, pady=2)
         def save_changes():
             try:
-                self.editing_markers[index] = {
+                self.set_marker(index, marker, {
                     "id": int(entries["ID"].get()),
                     "x": float(entries["X"].get()),
                     "y": float(entries["Y"].get()),
@@ -583,9 +1347,7 @@ class ArucoMapApp:
                     "rot_z": marker["rot_z"],
                     "rot_y": marker["rot_y"],
                     "rot_x": marker["rot_x"],
-                }
-                self.load_editor_table()
-                self.update_main_display()
+                })
                 dialog.destroy()
             except ValueError:
                 messagebox.showerror("Ошибка", "Некорректные данные")
@@ -595,44 +1357,22 @@ class ArucoMapApp:
         selected = self.marker_table.selection()
         if selected:
             index = self.marker_table.index(selected[0])
-            del self.editing_markers[index]
-            self.load_editor_table()
-            self.update_main_display()
+            self.set_marker(index, self.markers[index], None)
 
     def close_editor(self):
-        self.markers = [m.copy() for m in self.editing_markers]
-        self.update_main_display()
+        self.markers.unsubscribe(self.update_editor_row)
         self.editor_window.destroy()
 
     def export_map(self):
         file_path = filedialog.asksaveasfilename(defaultextension=".txt", filetypes=[("Text files", "*.txt")])
         if file_path:
-            try:
-                with open(file_path, "w") as f:
-                    f.write("# id\tlength\tx\ty\tz\trot_z\trot_y\trot_x\n")
-                    for marker in self.editing_markers:
-                        line = (f"{marker['id']}\t{marker['length']}\t"
-                                f"{marker['x']}\t{marker['y']}\t{marker['z']}\t"
-                                f"{marker['rot_z']}\t{marker['rot_y']}\t{marker['rot_x']}\n")
-                        f.write(line)
-                messagebox.showinfo("Успех", "Карта успешно экспортирована")
-            except Exception as e:
-                messagebox.showerror("Ошибка", f"Ошибка экспорта: {str(e)}")
-
-    def update_main_display(self):
-        self.marker_positions = [(m["x"], m["y"]) for m in self.markers]
-        self.ax.clear()
-        self.draw_markers()
-        self.draw_obstacles()
-        self.plot_path()
-        self.ax.relim()
-        self.ax.autoscale_view()
-        self.ax.set_xlabel("X")
-        self.ax.set_ylabel("Y")
-        self.ax.set_title("Карта ArUco")
-        self.ax.grid(True)
-        self.ax.set_aspect("equal")
-        self.canvas.draw()
+            markers = self.markers.copy()
+            self.tasks.submit(
+                "Экспорт карты",
+                lambda task: write_marker_map(file_path, markers),
+                on_done=lambda result: messagebox.showinfo("Успех", "Карта успешно экспортирована"),
+                on_error=lambda e: self.report_task_error(e, "Ошибка экспорта"),
+            )
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -0,0 +1,93 @@
+from .clearance import ClearanceGrid
+from .collision import CollisionChecker, check_plan
+from .deconflict import describe_segment, find_conflicts, plan_times, resolve_conflicts
+from .history import History
+from .mapio import LoadCancelled, map_stamp, read_marker_map, write_marker_map
+from .markers import MARKER_DTYPE, MARKER_FIELDS, MarkerStore, apply_marker_diff, diff_markers, marker_corners
+from .obstacles import (
+    HANDLE_RADIUS,
+    OBSTACLE_TYPES,
+    ObstacleIndex,
+    drag_obstacle,
+    new_obstacle,
+    obstacle_arrays,
+    obstacle_key,
+    obstacle_shape,
+    segment_clearance,
+    segment_hits,
+    sync_obstacles,
+)
+from .plan import (
+    PLAN_MATCH_TOLERANCE,
+    PLAN_WRITERS,
+    PlanWriter,
+    new_plan,
+    plan_format,
+    read_plan,
+    read_plan_points,
+    write_plan,
+)
+from .pose import MARKER_KINDS, MarkerPoses, marker_corners_3d, marker_kinds, rotation_matrices
+from .profiling import Profiler
+from .project import BinaryProject, is_binary_project, read_project, write_project
+from .routing import RoutePlanner
+from .tour import optimize_order, path_length
+from .trajectory import Trajectory, write_trajectory
+from .visibility import Camera, VisibilityAnalysis
+
+__all__ = [
+    "BinaryProject",
+    "Camera",
+    "ClearanceGrid",
+    "CollisionChecker",
+    "LoadCancelled",
+    "MARKER_DTYPE",
+    "MARKER_FIELDS",
+    "MARKER_KINDS",
+    "MarkerPoses",
+    "MarkerStore",
+    "HANDLE_RADIUS",
+    "History",
+    "OBSTACLE_TYPES",
+    "PLAN_MATCH_TOLERANCE",
+    "PLAN_WRITERS",
+    "PlanWriter",
+    "ObstacleIndex",
+    "Profiler",
+    "RoutePlanner",
+    "Trajectory",
+    "VisibilityAnalysis",
+    "apply_marker_diff",
+    "check_plan",
+    "describe_segment",
+    "diff_markers",
+    "drag_obstacle",
+    "find_conflicts",
+    "is_binary_project",
+    "map_stamp",
+    "marker_corners",
+    "marker_corners_3d",
+    "marker_kinds",
+    "new_obstacle",
+    "new_plan",
+    "obstacle_arrays",
+    "obstacle_key",
+    "obstacle_shape",
+    "optimize_order",
+    "path_length",
+    "plan_format",
+    "plan_times",
+    "read_marker_map",
+    "read_plan",
+    "read_plan_points",
+    "read_project",
+    "resolve_conflicts",
+    "rotation_matrices",
+    "segment_clearance",
+    "segment_hits",
+    "sync_obstacles",
+    "write_marker_map",
+    "write_plan",
+    "write_project",
+    "write_trajectory",
+]
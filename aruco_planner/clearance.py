@@ -0,0 +1,124 @@
+import numpy as np
+
+from .collision import common_ends
+from .obstacles import obstacle_arrays, obstacle_key
+
+CLEARANCE_RESOLUTION = 0.05
+CLEARANCE_TRUNCATION = 2.0
+CLEARANCE_PADDING = 2.0
+CLEARANCE_MAX_CELLS = 1 << 24
+
+
+def box_distance(xs, ys, center, half, radius):
+    dx = np.abs(xs - center[0]) - half[0]
+    dy = np.abs(ys - center[1]) - half[1]
+    outside = np.hypot(np.maximum(dx, 0.0)[None, :], np.maximum(dy, 0.0)[:, None])
+    inside = np.minimum(np.maximum(dx[None, :], dy[:, None]), 0.0)
+    return outside + inside - radius
+
+
+class ClearanceGrid:
+    def __init__(self, resolution=CLEARANCE_RESOLUTION, truncation=CLEARANCE_TRUNCATION, padding=CLEARANCE_PADDING):
+        if resolution <= 0 or truncation <= 0:
+            raise ValueError("Шаг сетки и предел расстояния должны быть положительными")
+        self.resolution = resolution
+        self.truncation = truncation
+        self.padding = padding
+        self.cell = resolution
+        self.origin = np.zeros(2)
+        self.field = np.full((0, 0), truncation, dtype=np.float32)
+        self.keys = []
+        self.centers, self.half, self.radius = obstacle_arrays([])
+        self.windows = np.empty((0, 4), dtype=np.int64)
+
+    @property
+    def extent(self):
+        ny, nx = self.field.shape
+        x0, y0 = self.origin
+        return x0, x0 + nx * self.cell, y0, y0 + ny * self.cell
+
+    def update(self, obstacles):
+        keys = [obstacle_key(obstacle) for obstacle in obstacles]
+        prefix, suffix = common_ends(self.keys, keys, lambda a, b: a == b)
+        if prefix == len(keys) == len(self.keys):
+            return False
+        old, new = slice(prefix, len(self.keys) - suffix), slice(prefix, len(keys) - suffix)
+        centers, half, radius = obstacle_arrays(obstacles[new])
+        tail = slice(len(self.keys) - suffix, len(self.keys))
+        self.centers = np.concatenate([self.centers[:prefix], centers, self.centers[tail]])
+        self.half = np.concatenate([self.half[:prefix], half, self.half[tail]])
+        self.radius = np.concatenate([self.radius[:prefix], radius, self.radius[tail]])
+        self.keys = keys
+        lower, upper = self._bounds(centers, half, radius)
+        ny, nx = self.field.shape
+        x0, x1, y0, y1 = self.extent
+        if not nx or np.any(lower < (x0, y0)) or np.any(upper > (x1, y1)):
+            self.rebuild()
+            return True
+        windows = self._windows(lower, upper)
+        changed = np.concatenate([self.windows[old], windows])
+        self.windows = np.concatenate([self.windows[:prefix], windows, self.windows[tail]])
+        if len(changed):
+            self._fill(*changed[:, :2].min(axis=0), *changed[:, 2:].max(axis=0))
+        return True
+
+    def rebuild(self):
+        if not len(self.keys):
+            self.field = np.full((0, 0), self.truncation, dtype=np.float32)
+            self.windows = np.empty((0, 4), dtype=np.int64)
+            return
+        lower, upper = self._bounds(self.centers, self.half, self.radius)
+        lower, upper = lower.min(axis=0) - self.padding, upper.max(axis=0) + self.padding
+        size = upper - lower
+        self.cell = max(self.resolution, float(np.sqrt(size[0] * size[1] / CLEARANCE_MAX_CELLS)))
+        self.origin = lower
+        nx, ny = np.ceil(size / self.cell).astype(np.int64)
+        self.field = np.full((ny, nx), self.truncation, dtype=np.float32)
+        self.windows = self._windows(*self._bounds(self.centers, self.half, self.radius))
+        self._fill(0, 0, nx, ny)
+
+    def _bounds(self, centers, half, radius):
+        reach = half + radius[:, None] + self.truncation
+        return centers - reach, centers + reach
+
+    def _windows(self, lower, upper):
+        ny, nx = self.field.shape
+        first = np.floor((lower - self.origin) / self.cell).astype(np.int64)
+        last = np.ceil((upper - self.origin) / self.cell).astype(np.int64)
+        return np.column_stack([np.clip(first, 0, (nx, ny)), np.clip(last, 0, (nx, ny))])
+
+    def _fill(self, col0, row0, col1, row1):
+        block = self.field[row0:row1, col0:col1]
+        block[:] = self.truncation
+        windows = self.windows
+        near = np.flatnonzero(
+            (windows[:, 0] < col1) & (windows[:, 2] > col0) & (windows[:, 1] < row1) & (windows[:, 3] > row0)
+        )
+        for i in near:
+            c0, r0 = max(windows[i, 0], col0), max(windows[i, 1], row0)
+            c1, r1 = min(windows[i, 2], col1), min(windows[i, 3], row1)
+            xs = self.origin[0] + (np.arange(c0, c1) + 0.5) * self.cell
+            ys = self.origin[1] + (np.arange(r0, r1) + 0.5) * self.cell
+            target = block[r0 - row0 : r1 - row0, c0 - col0 : c1 - col0]
+            np.minimum(target, box_distance(xs, ys, self.centers[i], self.half[i], self.radius[i]), out=target)
+        np.maximum(block, -self.truncation, out=block)
+
+    def clearance(self, x, y):
+        ny, nx = self.field.shape
+        col = int((x - self.origin[0]) // self.cell)
+        row = int((y - self.origin[1]) // self.cell)
+        if 0 <= col < nx and 0 <= row < ny:
+            return float(self.field[row, col])
+        return self.truncation
+
+    def clearance_many(self, points):
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        ny, nx = self.field.shape
+        cells = np.floor((points - self.origin) / self.cell).astype(np.int64)
+        inside = (cells[:, 0] >= 0) & (cells[:, 0] < nx) & (cells[:, 1] >= 0) & (cells[:, 1] < ny)
+        result = np.full(len(points), self.truncation)
+        result[inside] = self.field[cells[inside, 1], cells[inside, 0]]
+        return result
+
+    def occupied(self, margin=0.0):
+        return self.field < margin
@@ -0,0 +1,327 @@
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from .collision import check_plan
+from .deconflict import MAX_SHIFT, SEPARATION, SHIFT_STEP, describe_segment, find_conflicts, resolve_conflicts
+from .mapio import read_marker_map
+from .plan import PLAN_PRECISION, PLAN_WRITERS, write_plan
+from .project import is_binary_project, read_project, write_project
+from .routing import RoutePlanner
+from .tour import optimize_order, path_length
+from .trajectory import TRAJECTORY_RATE, Trajectory, write_trajectory
+from .visibility import VISIBILITY_MIN_MARKERS, VISIBILITY_SPACING, Camera, VisibilityAnalysis
+
+
+def validate_maps(args):
+    failed = 0
+    for path in args.maps:
+        try:
+            markers = read_marker_map(path)
+        except Exception as e:
+            failed += 1
+            print(f"{path}: ошибка\n{str(e)}", file=sys.stderr)
+            continue
+        print(f"{path}: OK, маркеров: {len(markers)}")
+    return 1 if failed else 0
+
+
+def plan_target(path, output, index, extension):
+    stem = os.path.join(output if output else os.path.dirname(path), os.path.splitext(os.path.basename(path))[0])
+    return f"{stem}_{index + 1}{extension}" if index else stem + extension
+
+
+def plan_title(path, plans, index):
+    return f"{path} [{plans[index]['name']}]" if len(plans) > 1 else path
+
+
+def export_project_plans(path, output, fmt, precision):
+    writer = PLAN_WRITERS[fmt]
+    targets = []
+    try:
+        for i, plan in enumerate(read_project(path)["plans"]):
+            target = plan_target(path, output, i, writer.extension)
+            write_plan(target, plan["points"], fmt, precision, plan["speed"], plan.get("delay", 0.0))
+            targets.append(target)
+    except Exception as e:
+        return targets, str(e)
+    return targets, None
+
+
+def convert_plans(args):
+    failed = 0
+    jobs = [(path, args.output, args.format, args.precision) for path in args.projects]
+    workers = min(args.workers or os.cpu_count() or 1, len(jobs))
+    results = None
+    if workers > 1:
+        try:
+            with ProcessPoolExecutor(workers) as pool:
+                results = list(pool.map(export_project_plans, *zip(*jobs)))
+        except (OSError, RuntimeError):
+            results = None
+    if results is None:
+        results = [export_project_plans(*job) for job in jobs]
+    for path, (targets, error) in zip(args.projects, results):
+        if error is not None:
+            failed += 1
+            print(f"{path}: ошибка\n{error}", file=sys.stderr)
+            continue
+        print(f"{path} -> {', '.join(targets)}")
+    return 1 if failed else 0
+
+
+def plan_route(args):
+    project = read_project(args.project)
+    markers = project["markers"]
+    start, goal = markers.index_of(args.start), markers.index_of(args.goal)
+    if start is None or goal is None:
+        print("Маркер с указанным ID не найден", file=sys.stderr)
+        return 1
+    try:
+        route = RoutePlanner(markers, args.radius, args.margin).plan(start, goal, args.altitude, project["obstacles"])
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    if args.output:
+        write_plan(args.output, route)
+    else:
+        for x, y, z in route:
+            print(f"({x:.2f}, {y:.2f}, {z:.2f})")
+    return 0
+
+
+def check_projects(args):
+    failed = 0
+    for path in args.projects:
+        try:
+            project = read_project(path)
+            plans = project["plans"]
+        except Exception as e:
+            failed += 1
+            print(f"{path}: ошибка\n{str(e)}", file=sys.stderr)
+            continue
+        for i, plan in enumerate(plans):
+            title = plan_title(path, plans, i)
+            collisions = check_plan(plan["points"], project["obstacles"], args.margin)
+            if collisions:
+                failed += 1
+                print(f"{title}: пересечений с препятствиями: {len(collisions)}")
+                for segment, obstacle in collisions:
+                    print(f"  отрезок {segment + 1}: препятствие {obstacle + 1} ({project['obstacles'][obstacle]['type']})")
+            else:
+                print(f"{title}: OK")
+    return 1 if failed else 0
+
+
+def optimize_plans(args):
+    failed = 0
+    for path in args.projects:
+        try:
+            plans = read_project(path)["plans"]
+        except Exception as e:
+            failed += 1
+            print(f"{path}: ошибка\n{str(e)}", file=sys.stderr)
+            continue
+        for i, plan in enumerate(plans):
+            title, target = plan_title(path, plans, i), plan_target(path, args.output, i, ".txt")
+            points = plan["points"]
+            try:
+                order = optimize_order(points, args.fixed_start, args.fixed_end, args.time, args.restarts, args.workers)
+                if path_length(points, order) < path_length(points):
+                    points = [points[k] for k in order]
+                write_plan(target, points)
+            except Exception as e:
+                failed += 1
+                print(f"{title}: ошибка\n{str(e)}", file=sys.stderr)
+                continue
+            print(f"{title} -> {target}, длина маршрута: {path_length(points):.2f}")
+    return 1 if failed else 0
+
+
+def repack_projects(args):
+    failed = 0
+    for path in args.projects:
+        target = os.path.join(args.output, os.path.basename(path)) if args.output else path
+        try:
+            project = read_project(path).load()
+            write_project(
+                target,
+                project["markers"],
+                project["obstacles"],
+                project["flight_plan"],
+                binary=args.format == "binary",
+                plans=project["plans"],
+            )
+        except Exception as e:
+            failed += 1
+            print(f"{path}: ошибка\n{str(e)}", file=sys.stderr)
+            continue
+        print(f"{path} -> {target} ({args.format})")
+    return 1 if failed else 0
+
+
+def export_trajectories(args):
+    failed = 0
+    for path in args.projects:
+        try:
+            plans = read_project(path)["plans"]
+        except Exception as e:
+            failed += 1
+            print(f"{path}: ошибка\n{str(e)}", file=sys.stderr)
+            continue
+        for i, plan in enumerate(plans):
+            title, target = plan_title(path, plans, i), plan_target(path, args.output, i, ".csv")
+            try:
+                trajectory = Trajectory(plan["points"], args.speed or plan["speed"], args.accel, args.deviation)
+                write_trajectory(target, trajectory, args.rate)
+            except Exception as e:
+                failed += 1
+                print(f"{title}: ошибка\n{str(e)}", file=sys.stderr)
+                continue
+            print(f"{title} -> {target}, длительность: {trajectory.duration:.1f} с")
+    return 1 if failed else 0
+
+
+def check_visibility(args):
+    failed = 0
+    camera = Camera(args.fov, args.pitch, args.width, args.height, args.min_pixels)
+    for path in args.projects:
+        try:
+            project = read_project(path)
+            plans = project["plans"]
+            analyses = [
+                VisibilityAnalysis(plan["points"], project["markers"], camera, args.spacing, args.min_markers, args.workers)
+                for plan in plans
+            ]
+        except Exception as e:
+            failed += 1
+            print(f"{path}: ошибка\n{str(e)}", file=sys.stderr)
+            continue
+        for i, analysis in enumerate(analyses):
+            title = plan_title(path, plans, i)
+            spans = analysis.weak_spans()
+            if spans:
+                failed += 1
+                print(f"{title}: участков без маркеров в кадре: {len(spans)}")
+                for first, last, start, end in spans:
+                    segments = f"отрезки {first + 1}-{last + 1}" if first != last else f"отрезок {first + 1}"
+                    print(f"  {segments}: {start:.2f}-{end:.2f} м")
+            else:
+                print(f"{title}: OK, минимум маркеров в кадре: {int(analysis.counts.min()) if len(analysis.counts) else 0}")
+    return 1 if failed else 0
+
+
+def deconflict_projects(args):
+    failed = 0
+    for path in args.projects:
+        try:
+            project = read_project(path)
+            plans = project["plans"]
+            if args.shift:
+                delays = resolve_conflicts(plans, args.separation, args.step, args.max_shift)
+                for plan, delay in zip(plans, delays):
+                    plan["delay"] = delay
+                project.load("markers", "obstacles", "flight_plan")
+                write_project(
+                    path,
+                    project["markers"],
+                    project["obstacles"],
+                    project["flight_plan"],
+                    binary=is_binary_project(path),
+                    plans=plans,
+                )
+            conflicts = find_conflicts(plans, args.separation, args.workers)
+        except Exception as e:
+            failed += 1
+            print(f"{path}: ошибка\n{str(e)}", file=sys.stderr)
+            continue
+        if args.shift:
+            print(f"{path}: задержки старта: " + ", ".join(f"{plan['name']} {plan['delay']:.1f} с" for plan in plans))
+        if conflicts:
+            failed += 1
+            print(f"{path}: конфликтов: {len(conflicts)}")
+            for i, j, first, second, time, distance in conflicts[:20]:
+                print(
+                    f"  {plans[i]['name']} ({describe_segment(first, plans[i]['points'])}) и "
+                    f"{plans[j]['name']} ({describe_segment(second, plans[j]['points'])}): "
+                    f"t={time:.1f} с, расстояние {distance:.2f} м"
+                )
+        else:
+            print(f"{path}: OK, планов: {len(plans)}")
+    return 1 if failed else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="aruco_planner", description="Планировщик полетов ArUco без графического интерфейса")
+    commands = parser.add_subparsers(dest="command", required=True)
+    validate = commands.add_parser("validate", help="проверить файлы карт ArUco")
+    validate.add_argument("maps", nargs="+", help="файлы карт (.txt)")
+    validate.set_defaults(func=validate_maps)
+    convert = commands.add_parser("convert", help="выгрузить планы полета из проектов")
+    convert.add_argument("projects", nargs="+", help="файлы проектов (.aproject)")
+    convert.add_argument("-o", "--output", help="каталог для планов (по умолчанию рядом с проектом)")
+    convert.add_argument("--format", choices=tuple(PLAN_WRITERS), default="bracket", help="формат плана")
+    convert.add_argument("--precision", type=int, default=PLAN_PRECISION, help="число знаков после запятой")
+    convert.add_argument("--workers", type=int, help="число процессов")
+    convert.set_defaults(func=convert_plans)
+    repack = commands.add_parser("repack", help="пересохранить проекты в формате JSON или бинарном")
+    repack.add_argument("projects", nargs="+", help="файлы проектов (.aproject)")
+    repack.add_argument("--format", choices=("json", "binary"), default="binary", help="формат результата")
+    repack.add_argument("-o", "--output", help="каталог для результата (по умолчанию файл перезаписывается)")
+    repack.set_defaults(func=repack_projects)
+    check = commands.add_parser("check", help="проверить планы полета на пересечение с препятствиями")
+    check.add_argument("projects", nargs="+", help="файлы проектов (.aproject)")
+    check.add_argument("--margin", type=float, default=0.1, help="запас до препятствий")
+    check.set_defaults(func=check_projects)
+    optimize = commands.add_parser("optimize", help="переупорядочить точки планов для сокращения маршрута")
+    optimize.add_argument("projects", nargs="+", help="файлы проектов (.aproject)")
+    optimize.add_argument("-o", "--output", help="каталог для планов (по умолчанию рядом с проектом)")
+    optimize.add_argument("--fixed-start", action="store_true", help="не менять первую точку")
+    optimize.add_argument("--fixed-end", action="store_true", help="не менять последнюю точку")
+    optimize.add_argument("--time", type=float, default=5.0, help="ограничение времени на план, с")
+    optimize.add_argument("--restarts", type=int, default=8, help="число случайных перезапусков")
+    optimize.add_argument("--workers", type=int, help="число процессов")
+    optimize.set_defaults(func=optimize_plans)
+    route = commands.add_parser("route", help="проложить маршрут между маркерами в обход препятствий")
+    route.add_argument("project", help="файл проекта (.aproject)")
+    route.add_argument("--start", type=int, required=True, help="ID начального маркера")
+    route.add_argument("--goal", type=int, required=True, help="ID конечного маркера")
+    route.add_argument("--altitude", type=float, default=1.0, help="высота полета")
+    route.add_argument("--radius", type=float, help="максимальная длина перелета между маркерами")
+    route.add_argument("--margin", type=float, default=0.1, help="запас до препятствий")
+    route.add_argument("-o", "--output", help="файл плана (.txt)")
+    route.set_defaults(func=plan_route)
+    trajectory = commands.add_parser("trajectory", help="построить траекторию с ограничением скорости и ускорения")
+    trajectory.add_argument("projects", nargs="+", help="файлы проектов (.aproject)")
+    trajectory.add_argument("-o", "--output", help="каталог для траекторий .csv (по умолчанию рядом с проектом)")
+    trajectory.add_argument("--speed", type=float, help="максимальная скорость, м/с (по умолчанию скорость плана)")
+    trajectory.add_argument("--accel", type=float, default=1.0, help="максимальное ускорение, м/с²")
+    trajectory.add_argument("--deviation", type=float, default=0.05, help="допустимое отклонение на поворотах, м")
+    trajectory.add_argument("--rate", type=float, default=TRAJECTORY_RATE, help="частота точек, Гц")
+    trajectory.set_defaults(func=export_trajectories)
+    visibility = commands.add_parser("visibility", help="найти участки маршрута без маркеров в кадре камеры")
+    visibility.add_argument("projects", nargs="+", help="файлы проектов (.aproject)")
+    visibility.add_argument("--fov", type=float, default=90.0, help="горизонтальный угол обзора камеры, градусы")
+    visibility.add_argument("--pitch", type=float, default=90.0, help="наклон камеры вниз от горизонта, градусы")
+    visibility.add_argument("--width", type=int, default=320, help="ширина кадра, пиксели")
+    visibility.add_argument("--height", type=int, default=240, help="высота кадра, пиксели")
+    visibility.add_argument("--min-pixels", type=float, default=20.0, help="минимальная сторона маркера в кадре, пиксели")
+    visibility.add_argument("--spacing", type=float, default=VISIBILITY_SPACING, help="шаг проверки вдоль маршрута, м")
+    visibility.add_argument("--min-markers", type=int, default=VISIBILITY_MIN_MARKERS, help="минимум маркеров в кадре")
+    visibility.add_argument("--workers", type=int, help="число процессов")
+    visibility.set_defaults(func=check_visibility)
+    deconflict = commands.add_parser("deconflict", help="проверить планы нескольких дронов на сближение")
+    deconflict.add_argument("projects", nargs="+", help="файлы проектов (.aproject)")
+    deconflict.add_argument("--separation", type=float, default=SEPARATION, help="минимальное расстояние между дронами, м")
+    deconflict.add_argument("--shift", action="store_true", help="развести планы задержкой старта и сохранить проект")
+    deconflict.add_argument("--step", type=float, default=SHIFT_STEP, help="шаг задержки старта, с")
+    deconflict.add_argument("--max-shift", type=float, default=MAX_SHIFT, help="максимальная задержка старта, с")
+    deconflict.add_argument("--workers", type=int, help="число процессов")
+    deconflict.set_defaults(func=deconflict_projects)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
@@ -0,0 +1,68 @@
+import numpy as np
+
+from .obstacles import obstacle_arrays, obstacle_key, segment_hits
+
+
+def plan_segments(flight_plan):
+    points = np.array([point[:2] for point in flight_plan], dtype=float).reshape(-1, 2)
+    if len(points) == 1:
+        return points, points
+    return points[:-1], points[1:]
+
+
+def common_ends(old, new, equal):
+    limit = min(len(old), len(new))
+    prefix = 0
+    while prefix < limit and equal(old[prefix], new[prefix]):
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and equal(old[-1 - suffix], new[-1 - suffix]):
+        suffix += 1
+    return prefix, suffix
+
+
+def common_point_ends(old, new):
+    limit = min(len(old), len(new))
+    same = np.all(old[:limit] == new[:limit], axis=1)
+    prefix = int(np.argmin(same)) if not same.all() else limit
+    same = np.all(old[len(old) - limit + prefix :][::-1] == new[len(new) - limit + prefix :][::-1], axis=1)
+    suffix = int(np.argmin(same)) if not same.all() else limit - prefix
+    return prefix, suffix
+
+
+class CollisionChecker:
+    def __init__(self, margin=0.1):
+        self.margin = margin
+        self.points = np.empty((0, 2))
+        self.keys = []
+        self.hits = np.empty((0, 0), dtype=bool)
+
+    def update(self, flight_plan, obstacles):
+        points = np.array([point[:2] for point in flight_plan], dtype=float).reshape(-1, 2)
+        keys = [obstacle_key(obstacle) for obstacle in obstacles]
+        starts, ends = plan_segments(flight_plan)
+        centers, half, radius = obstacle_arrays(obstacles)
+        old = self.hits
+        point_prefix, point_suffix = common_point_ends(self.points, points)
+        head = min(max(point_prefix - 1, 0), len(starts), len(old))
+        tail = min(max(point_suffix - 1, 0), len(starts) - head, len(old) - head)
+        key_prefix, key_suffix = common_ends(self.keys, keys, lambda a, b: a == b)
+        hits = np.empty((len(starts), len(keys)), dtype=bool)
+        middle = slice(head, len(starts) - tail)
+        hits[middle] = segment_hits(starts[middle], ends[middle], centers, half, radius, self.margin)
+        for new_rows, old_rows in ((slice(0, head), slice(0, head)), (slice(len(starts) - tail, len(starts)), slice(len(old) - tail, len(old)))):
+            hits[new_rows, :key_prefix] = old[old_rows, :key_prefix]
+            hits[new_rows, len(keys) - key_suffix :] = old[old_rows, old.shape[1] - key_suffix :]
+            changed = slice(key_prefix, len(keys) - key_suffix)
+            hits[new_rows, changed] = segment_hits(
+                starts[new_rows], ends[new_rows], centers[changed], half[changed], radius[changed], self.margin
+            )
+        self.points, self.keys, self.hits = points, keys, hits
+        return self.collisions()
+
+    def collisions(self):
+        return [tuple(pair) for pair in np.argwhere(self.hits).tolist()]
+
+
+def check_plan(flight_plan, obstacles, margin=0.1):
+    return CollisionChecker(margin).update(flight_plan, obstacles)
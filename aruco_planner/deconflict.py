@@ -0,0 +1,125 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .markers import expand_ranges
+
+SEPARATION = 1.0
+SHIFT_STEP = 1.0
+MAX_SHIFT = 600.0
+PARALLEL_MIN_SEGMENTS = 20000
+
+
+def plan_times(points, speed, delay=0.0):
+    if speed <= 0:
+        raise ValueError("Скорость дрона должна быть положительной")
+    points = np.asarray(points, dtype=float).reshape(-1, 3)
+    lengths = np.linalg.norm(np.diff(points, axis=0), axis=1)
+    return delay + np.concatenate([[0.0], np.cumsum(lengths)])[: len(points)] / speed
+
+
+def pair_conflicts(a_points, a_times, b_points, b_times, separation=SEPARATION):
+    a_points = np.asarray(a_points, dtype=float).reshape(-1, 3)
+    b_points = np.asarray(b_points, dtype=float).reshape(-1, 3)
+    if len(a_points) < 2 or len(b_points) < 2:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, np.empty(0), np.empty(0)
+    a0, a1, b0, b1 = a_times[:-1], a_times[1:], b_times[:-1], b_times[1:]
+    lo = np.searchsorted(b1, a0, "right")
+    counts = np.maximum(np.searchsorted(b0, a1, "left") - lo, 0)
+    first = np.repeat(np.arange(len(a0)), counts)
+    second = expand_ranges(lo, counts)
+    a_velocity = np.diff(a_points, axis=0) / np.maximum(a1 - a0, 1e-12)[:, None]
+    b_velocity = np.diff(b_points, axis=0) / np.maximum(b1 - b0, 1e-12)[:, None]
+    start = np.maximum(a0[first], b0[second])
+    span = np.minimum(a1[first], b1[second]) - start
+    offset = a_points[first] + a_velocity[first] * (start - a0[first])[:, None]
+    offset -= b_points[second] + b_velocity[second] * (start - b0[second])[:, None]
+    closing = a_velocity[first] - b_velocity[second]
+    rate = np.einsum("ij,ij->i", closing, closing)
+    tau = np.clip(-np.einsum("ij,ij->i", offset, closing) / np.maximum(rate, 1e-12), 0.0, span)
+    distance = np.linalg.norm(offset + closing * tau[:, None], axis=1)
+    close = distance < separation
+    return first[close], second[close], (start + tau)[close], distance[close]
+
+
+def plan_timeline(points, speed, delay, horizon):
+    points = np.asarray(points, dtype=float).reshape(-1, 3)
+    if not len(points):
+        return points, np.empty(0), np.empty(0, dtype=np.int64)
+    times = plan_times(points, speed, delay)
+    points = np.concatenate([points[:1], points, points[-1:]])
+    times = np.concatenate([[0.0], times, [max(horizon, times[-1])]])
+    segments = np.arange(-1, len(points) - 2)
+    first = 0 if times[1] > times[0] else 1
+    last = len(times) if times[-1] > times[-2] else len(times) - 1
+    return points[first:last], times[first:last], segments[first : last - 1]
+
+
+def plan_timelines(plans, delays=None):
+    delays = [plan.get("delay", 0.0) for plan in plans] if delays is None else delays
+    times = [plan_times(plan["points"], plan["speed"], delay) for plan, delay in zip(plans, delays)]
+    horizon = max((t[-1] for t in times if len(t)), default=0.0)
+    return [plan_timeline(plan["points"], plan["speed"], delay, horizon) for plan, delay in zip(plans, delays)]
+
+
+def describe_segment(segment, points):
+    if segment < 0:
+        return "ожидание старта"
+    if segment >= len(points) - 1:
+        return "после финиша"
+    return f"отрезок {segment + 1}"
+
+
+def _check_pairs(jobs, separation):
+    results = []
+    for i, j, (a_points, a_times, a_segments), (b_points, b_times, b_segments) in jobs:
+        first, second, times, distances = pair_conflicts(a_points, a_times, b_points, b_times, separation)
+        results.extend(
+            zip(
+                [i] * len(first),
+                [j] * len(first),
+                a_segments[first].tolist(),
+                b_segments[second].tolist(),
+                times.tolist(),
+                distances.tolist(),
+            )
+        )
+    return results
+
+
+def find_conflicts(plans, separation=SEPARATION, workers=None):
+    timelines = plan_timelines(plans)
+    jobs = [
+        (i, j, timelines[i], timelines[j])
+        for i in range(len(plans))
+        for j in range(i + 1, len(plans))
+        if len(timelines[i][0]) > 1 and len(timelines[j][0]) > 1
+    ]
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    results = None
+    if workers > 1 and sum(len(timeline[0]) for timeline in timelines) >= PARALLEL_MIN_SEGMENTS:
+        try:
+            with ProcessPoolExecutor(workers) as pool:
+                parts = [pool.submit(_check_pairs, jobs[k::workers], separation) for k in range(workers)]
+                results = [conflict for part in parts for conflict in part.result()]
+        except (OSError, RuntimeError):
+            results = None
+    if results is None:
+        results = _check_pairs(jobs, separation)
+    return sorted(results, key=lambda conflict: conflict[4])
+
+
+def resolve_conflicts(plans, separation=SEPARATION, step=SHIFT_STEP, max_shift=MAX_SHIFT):
+    delays = [plan.get("delay", 0.0) for plan in plans]
+    for k in range(1, len(plans)):
+        start = delays[k]
+        while True:
+            timelines = plan_timelines(plans[: k + 1], delays[: k + 1])
+            if not any(len(pair_conflicts(*timelines[k][:2], *timelines[i][:2], separation)[0]) for i in range(k)):
+                break
+            delays[k] += step
+            if delays[k] - start > max_shift:
+                raise ValueError(f"Не удалось развести план «{plans[k]['name']}» сдвигом старта")
+    return delays
@@ -0,0 +1,43 @@
+from collections import deque
+
+HISTORY_LIMIT = 1000
+
+
+class History:
+    def __init__(self, limit=HISTORY_LIMIT):
+        self.undo_stack = deque(maxlen=limit)
+        self.redo_stack = []
+        self.replaying = False
+
+    def record(self, undo, redo):
+        if self.replaying:
+            return
+        self.undo_stack.append((undo, redo))
+        self.redo_stack.clear()
+
+    def undo(self):
+        if not self.undo_stack:
+            return False
+        undo, redo = self.undo_stack.pop()
+        self._replay(undo)
+        self.redo_stack.append((undo, redo))
+        return True
+
+    def redo(self):
+        if not self.redo_stack:
+            return False
+        undo, redo = self.redo_stack.pop()
+        self._replay(redo)
+        self.undo_stack.append((undo, redo))
+        return True
+
+    def clear(self):
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+
+    def _replay(self, action):
+        self.replaying = True
+        try:
+            action()
+        finally:
+            self.replaying = False
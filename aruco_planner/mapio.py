@@ -0,0 +1,117 @@
+import io
+import mmap
+import os
+import re
+import warnings
+
+import numpy as np
+
+from .markers import MARKER_DTYPE, MarkerStore
+
+MAP_CHUNK_BYTES = 1 << 20
+MARKER_ID_MIN, MARKER_ID_MAX = np.iinfo(np.int64).min, np.iinfo(np.int64).max
+MAP_WHITESPACE = np.zeros(256, dtype=bool)
+MAP_WHITESPACE[list(b" \t\r\n\x0b\x0c")] = True
+
+
+class LoadCancelled(Exception):
+    pass
+
+
+def map_stamp(file_path):
+    stat = os.stat(file_path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def read_marker_map(file_path, progress=None, cancel=None):
+    arrays, line_numbers, errors = [], [], []
+    with open(file_path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                start = line_offset = 0
+                while start < size:
+                    if cancel is not None and cancel.is_set():
+                        raise LoadCancelled()
+                    end = buffer.find(b"\n", min(start + MAP_CHUNK_BYTES, size))
+                    end = size if end == -1 else end + 1
+                    raw = buffer[start:end]
+                    data, lines = parse_map_chunk(raw, line_offset, errors)
+                    arrays.append(data)
+                    line_numbers.append(lines)
+                    line_offset += raw.count(b"\n")
+                    start = end
+                    if progress is not None:
+                        progress(start / size)
+    data = np.concatenate(arrays) if arrays else np.empty(0, dtype=MARKER_DTYPE)
+    lines = np.concatenate(line_numbers) if line_numbers else np.empty(0, dtype=np.int64)
+    duplicate = np.ones(len(data), dtype=bool)
+    duplicate[np.unique(data["id"], return_index=True)[1]] = False
+    bad_length = (data["length"] <= 0) & ~duplicate
+    errors.extend((int(n), "Повторяющийся ID") for n in lines[duplicate][:5])
+    errors.extend((int(n), "Недопустимая длина маркера") for n in lines[bad_length][:5])
+    if errors:
+        errors.sort()
+        raise ValueError("\n".join(f"Строка {n}: {message}" for n, message in errors[:5]))
+    return MarkerStore(data)
+
+
+def parse_map_chunk(raw, line_offset, errors):
+    b = np.frombuffer(raw, dtype=np.uint8)
+    line_ends = np.flatnonzero(b == ord("\n"))
+    if len(b) and b[-1] != ord("\n"):
+        line_ends = np.append(line_ends, len(b))
+    line_starts = np.concatenate([[0], line_ends[:-1] + 1])
+    first_char = np.append(b, ord("\n"))[line_starts]
+    is_data = ~MAP_WHITESPACE[first_char] & (first_char != ord("#"))
+    for i in np.flatnonzero(MAP_WHITESPACE[first_char]):
+        line = raw[line_starts[i] : line_ends[i]].strip()
+        is_data[i] = bool(line) and not line.startswith(b"#")
+    lines = line_offset + np.flatnonzero(is_data) + 1
+    if len(lines) == 0:
+        return np.empty(0, dtype=MARKER_DTYPE), lines
+    text = raw.decode("utf-8")
+    hashes = np.flatnonzero(b == ord("#"))
+    if np.any(is_data[np.searchsorted(line_starts, hashes, "right") - 1]):
+        return parse_map_lines(text, line_offset, errors)
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            data = np.loadtxt(io.StringIO(text), dtype=MARKER_DTYPE, comments="#", ndmin=1)
+    except ValueError:
+        return parse_map_lines(text, line_offset, errors)
+    if len(data) != len(lines):
+        return parse_map_lines(text, line_offset, errors)
+    return data, lines
+
+
+def parse_map_lines(text, line_offset, errors):
+    rows, lines = [], []
+    for line_num, line in enumerate(text.split("\n"), line_offset + 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        parts = re.split(r"\s+", line)
+        if len(parts) != 8:
+            errors.append((line_num, "Некорректное количество элементов"))
+            continue
+        try:
+            marker_id = int(parts[0])
+            if not MARKER_ID_MIN <= marker_id <= MARKER_ID_MAX:
+                raise ValueError(parts[0])
+            rows.append((marker_id, *map(float, parts[1:])))
+        except ValueError:
+            errors.append((line_num, "Ошибка формата данных"))
+            continue
+        lines.append(line_num)
+    return np.array(rows, dtype=MARKER_DTYPE), np.array(lines, dtype=np.int64)
+
+
+def write_marker_map(file_path, markers):
+    with open(file_path, "w") as f:
+        f.write("# id\tlength\tx\ty\tz\trot_z\trot_y\trot_x\n")
+        for marker in markers:
+            line = (f"{marker['id']}\t{marker['length']}\t"
+                    f"{marker['x']}\t{marker['y']}\t{marker['z']}\t"
+                    f"{marker['rot_z']}\t{marker['rot_y']}\t{marker['rot_x']}\n")
+            f.write(line)
@@ -0,0 +1,288 @@
+import numpy as np
+
+from .pose import MarkerPoses, marker_corners_3d
+
+MARKER_FIELDS = ("id", "length", "x", "y", "z", "rot_z", "rot_y", "rot_x")
+MARKER_DTYPE = np.dtype([("id", np.int64)] + [(name, np.float64) for name in MARKER_FIELDS[1:]])
+
+
+class MarkerStore:
+    def __init__(self, data=None):
+        if data is None:
+            data = np.empty(0, dtype=MARKER_DTYPE)
+        self._data = np.array(data, dtype=MARKER_DTYPE)
+        self._size = len(self._data)
+        self.version = 0
+        self._listeners = []
+        self._poses = None
+        self._rebuild_index()
+
+    @classmethod
+    def from_dicts(cls, markers):
+        return cls(np.array([tuple(m[name] for name in MARKER_FIELDS) for m in markers], dtype=MARKER_DTYPE))
+
+    @property
+    def data(self):
+        return self._data[: self._size]
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        for row in self.data.tolist():
+            yield dict(zip(MARKER_FIELDS, row))
+
+    def __getitem__(self, index):
+        return dict(zip(MARKER_FIELDS, self.data[index].item()))
+
+    def __setitem__(self, index, marker):
+        if index < 0:
+            index += self._size
+        old = self.data[index]
+        moved = (old["x"], old["y"]) != (marker["x"], marker["y"])
+        self._ids_dirty |= int(old["id"]) != marker["id"]
+        self.data[index] = tuple(marker[name] for name in MARKER_FIELDS)
+        if moved:
+            self._add_pending(index)
+        self.version += 1
+        self._notify("updated", index)
+
+    def __delitem__(self, index):
+        if index < 0:
+            index += self._size
+        self._data[index : self._size - 1] = self._data[index + 1 : self._size]
+        self._size -= 1
+        keep = self._order != index
+        self._keys = self._keys[keep]
+        self._order = self._order[keep]
+        self._order[self._order > index] -= 1
+        self._pending = [i - (i > index) for i in self._pending if i != index]
+        self._ids_dirty = True
+        self.version += 1
+        self._notify("removed", index)
+
+    def append(self, marker):
+        self.insert(self._size, marker)
+
+    def insert(self, index, marker):
+        if index < 0:
+            index += self._size
+        if self._size == len(self._data):
+            grown = np.empty(max(16, 2 * len(self._data)), dtype=MARKER_DTYPE)
+            grown[: self._size] = self.data
+            self._data = grown
+        self._data[index + 1 : self._size + 1] = self._data[index : self._size]
+        self._data[index] = tuple(marker[name] for name in MARKER_FIELDS)
+        self._size += 1
+        self._order[self._order >= index] += 1
+        self._pending = [i + (i >= index) for i in self._pending]
+        self._ids_dirty = True
+        self.version += 1
+        self._add_pending(index)
+        self._notify("added", index)
+
+    def subscribe(self, listener):
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, event, index):
+        for listener in list(self._listeners):
+            listener(event, index)
+
+    @property
+    def poses(self):
+        if self._poses is None:
+            self._poses = MarkerPoses(self)
+        return self._poses
+
+    def copy(self):
+        return MarkerStore(self.data.copy())
+
+    def to_dicts(self):
+        return list(self)
+
+    def position(self, index):
+        row = self.data[index]
+        return float(row["x"]), float(row["y"])
+
+    def index_of(self, marker_id):
+        if self._ids_dirty:
+            ids = self.data["id"]
+            self._id_order = np.argsort(ids, kind="stable")
+            self._id_sorted = ids[self._id_order]
+            self._ids_dirty = False
+        pos = np.searchsorted(self._id_sorted, marker_id)
+        if pos < len(self._id_sorted) and self._id_sorted[pos] == marker_id:
+            return int(self._id_order[pos])
+        return None
+
+    def nearest(self, x, y, max_dist):
+        candidates = self._candidates(x - max_dist, y - max_dist, x + max_dist, y + max_dist)
+        if len(candidates) == 0:
+            return None
+        data = self.data
+        dist = np.hypot(data["x"][candidates] - x, data["y"][candidates] - y)
+        best = np.argmin(dist)
+        if dist[best] > max_dist:
+            return None
+        return int(candidates[best])
+
+    def nearest_many(self, xs, ys, max_dist):
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+        result = np.full(len(xs), -1, dtype=np.int64)
+        if self._pending:
+            self._rebuild_index()
+        if not len(self._keys) or not len(xs):
+            return result
+        data = self.data
+        ox, oy = self._origin
+        qx = np.clip(np.floor((xs - ox) / self._cell), -1, self._nx).astype(np.int64)
+        qy = np.clip(np.floor((ys - oy) / self._cell), -1, self._ny).astype(np.int64)
+        reach = np.ceil(max_dist / self._cell)
+        reach_x, reach_y = int(min(reach, self._nx)), int(min(reach, self._ny))
+        found_query, found_marker, found_dist = [], [], []
+        for dx in range(-reach_x, reach_x + 1):
+            for dy in range(-reach_y, reach_y + 1):
+                cx, cy = qx + dx, qy + dy
+                queries = np.flatnonzero((cx >= 0) & (cx < self._nx) & (cy >= 0) & (cy < self._ny))
+                keys = cx[queries] * self._ny + cy[queries]
+                lo = np.searchsorted(self._keys, keys, "left")
+                counts = np.searchsorted(self._keys, keys, "right") - lo
+                query = np.repeat(queries, counts)
+                marker = self._order[expand_ranges(lo, counts)]
+                dist = np.hypot(data["x"][marker] - xs[query], data["y"][marker] - ys[query])
+                close = dist <= max_dist
+                found_query.append(query[close])
+                found_marker.append(marker[close])
+                found_dist.append(dist[close])
+        query, marker, dist = (np.concatenate(part) for part in (found_query, found_marker, found_dist))
+        order = np.lexsort((marker, dist, query))
+        first = np.unique(query[order], return_index=True)[1]
+        result[query[order][first]] = marker[order][first]
+        return result
+
+    def query_radius(self, x, y, radius):
+        candidates = self._candidates(x - radius, y - radius, x + radius, y + radius)
+        data = self.data
+        dist = np.hypot(data["x"][candidates] - x, data["y"][candidates] - y)
+        return candidates[dist <= radius]
+
+    def query_rect(self, x0, y0, x1, y1):
+        candidates = self._candidates(x0, y0, x1, y1)
+        data = self.data
+        cx, cy = data["x"][candidates], data["y"][candidates]
+        return candidates[(cx >= x0) & (cx <= x1) & (cy >= y0) & (cy <= y1)]
+
+    def pairs_within(self, radius):
+        data = self.data
+        n = len(data)
+        if n < 2:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        x, y = data["x"], data["y"]
+        cx = ((x - x.min()) // radius).astype(np.int64)
+        cy = ((y - y.min()) // radius).astype(np.int64) + 1
+        ny = int(cy.max()) + 2
+        keys = cx * ny + cy
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        first, second = [], []
+        for dx, dy in ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1)):
+            target = keys + dx * ny + dy
+            lo = np.searchsorted(sorted_keys, target, "left")
+            counts = np.searchsorted(sorted_keys, target, "right") - lo
+            a = np.repeat(np.arange(n), counts)
+            b = order[expand_ranges(lo, counts)]
+            keep = np.hypot(x[a] - x[b], y[a] - y[b]) <= radius
+            if (dx, dy) == (0, 0):
+                keep &= a < b
+            first.append(a[keep])
+            second.append(b[keep])
+        return np.concatenate(first), np.concatenate(second)
+
+    def _candidates(self, x0, y0, x1, y1):
+        parts = []
+        if len(self._keys):
+            ox, oy = self._origin
+            cx0 = max(int(np.floor((x0 - ox) / self._cell)), 0)
+            cx1 = min(int(np.floor((x1 - ox) / self._cell)), self._nx - 1)
+            cy0 = max(int(np.floor((y0 - oy) / self._cell)), 0)
+            cy1 = min(int(np.floor((y1 - oy) / self._cell)), self._ny - 1)
+            if cx0 <= cx1 and cy0 <= cy1:
+                columns = np.arange(cx0, cx1 + 1) * self._ny
+                starts = np.searchsorted(self._keys, columns + cy0, "left")
+                ends = np.searchsorted(self._keys, columns + cy1, "right")
+                parts.extend(self._order[s:e] for s, e in zip(starts, ends) if e > s)
+        if self._pending:
+            parts.append(np.array(self._pending, dtype=np.int64))
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(parts))
+
+    def _add_pending(self, index):
+        self._pending.append(index)
+        if len(self._pending) > max(32, self._size // 8):
+            self._rebuild_index()
+
+    def _rebuild_index(self):
+        data = self.data
+        n = len(data)
+        self._pending = []
+        self._ids_dirty = True
+        if n == 0:
+            self._origin = (0.0, 0.0)
+            self._cell = 1.0
+            self._nx = self._ny = 0
+            self._keys = np.empty(0, dtype=np.int64)
+            self._order = np.empty(0, dtype=np.int64)
+            return
+        x, y = data["x"], data["y"]
+        ox, oy = float(x.min()), float(y.min())
+        span_x, span_y = float(x.max()) - ox, float(y.max()) - oy
+        self._cell = max(np.sqrt(span_x * span_y * 2.0 / n), max(span_x, span_y) * 2.0 / n, 1e-9)
+        self._origin = (ox, oy)
+        self._nx = int(span_x // self._cell) + 1
+        self._ny = int(span_y // self._cell) + 1
+        cx = np.minimum(((x - ox) // self._cell).astype(np.int64), self._nx - 1)
+        cy = np.minimum(((y - oy) // self._cell).astype(np.int64), self._ny - 1)
+        keys = cx * self._ny + cy
+        self._order = np.argsort(keys, kind="stable")
+        self._keys = keys[self._order]
+
+
+def marker_corners(data):
+    return marker_corners_3d(data)[:, :, :2]
+
+
+def diff_markers(markers, data):
+    old = markers.data
+    _, old_common, new_common = np.intersect1d(old["id"], data["id"], return_indices=True)
+    removed = np.setdiff1d(np.arange(len(old)), old_common)
+    added = np.setdiff1d(np.arange(len(data)), new_common)
+    differs = np.zeros(len(old_common), dtype=bool)
+    for name in MARKER_FIELDS[1:]:
+        differs |= old[name][old_common] != data[name][new_common]
+    order = np.argsort(old_common[differs])
+    return removed, data[added], old_common[differs][order], data[new_common[differs]][order]
+
+
+def apply_marker_diff(markers, diff):
+    removed, added, changed, rows = diff
+    for index, row in zip(changed.tolist(), rows.tolist()):
+        markers[index] = dict(zip(MARKER_FIELDS, row))
+    for index in removed[::-1].tolist():
+        del markers[index]
+    for row in added.tolist():
+        markers.append(dict(zip(MARKER_FIELDS, row)))
+
+
+def expand_ranges(starts, counts):
+    total = int(counts.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    shifts = np.repeat(starts - np.cumsum(counts) + counts, counts)
+    return shifts + np.arange(total)
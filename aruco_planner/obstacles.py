@@ -0,0 +1,189 @@
+import numpy as np
+
+OBSTACLE_TYPES = ("куб", "арка", "флаг")
+HANDLE_RADIUS = 0.1
+
+
+def new_obstacle(obstacle_type, x, y):
+    obstacle = {"type": obstacle_type, "position": (x, y)}
+    if obstacle_type == "куб":
+        obstacle["size"] = 0.6
+    elif obstacle_type == "арка":
+        obstacle["length"] = 1.0
+        obstacle["thickness"] = 0.2
+    elif obstacle_type == "флаг":
+        obstacle["radius"] = 0.25
+    return obstacle
+
+
+def obstacle_shape(obstacle):
+    x, y = obstacle["position"]
+    if obstacle["type"] == "куб":
+        size = obstacle.get("size", 0.6)
+        return (x - size / 2, y - size / 2, size, size), [(x + size / 2, y + size / 2), (x - size / 2, y - size / 2)]
+    if obstacle["type"] == "арка":
+        length = obstacle.get("length", 1.0)
+        thickness = obstacle.get("thickness", 0.2)
+        return (x - length / 2, y - thickness / 2, length, thickness), [(x + length / 2, y), (x, y + thickness / 2)]
+    radius = obstacle.get("radius", 0.25)
+    return (x, y, radius), [(x + radius, y)]
+
+
+def drag_obstacle(obstacle, handle_idx, x, y):
+    original_x, original_y = obstacle["position"]
+    if handle_idx is None:
+        obstacle["position"] = (x, y)
+    elif obstacle["type"] == "куб":
+        if handle_idx == 0:
+            obstacle["size"] = max(0.2, (x - (original_x - obstacle["size"] / 2)))
+        else:
+            new_size = max(0.2, ((original_x + obstacle["size"] / 2) - x))
+            obstacle["size"] = new_size
+            obstacle["position"] = (x + new_size / 2, y + new_size / 2)
+    elif obstacle["type"] == "арка":
+        if handle_idx == 0:
+            obstacle["length"] = max(0.3, x - (original_x - obstacle["length"] / 2))
+        elif handle_idx == 1:
+            obstacle["thickness"] = max(0.1, y - (original_y - obstacle["thickness"] / 2))
+    elif obstacle["type"] == "флаг":
+        dx = x - original_x
+        dy = y - original_y
+        obstacle["radius"] = max(0.1, (dx**2 + dy**2) ** 0.5)
+
+
+def obstacle_key(obstacle):
+    return tuple(sorted((key, tuple(value) if isinstance(value, list) else value) for key, value in obstacle.items()))
+
+
+def obstacle_arrays(obstacles):
+    centers = np.zeros((len(obstacles), 2))
+    half = np.zeros((len(obstacles), 2))
+    radius = np.zeros(len(obstacles))
+    for i, obstacle in enumerate(obstacles):
+        shape, _ = obstacle_shape(obstacle)
+        if obstacle["type"] == "флаг":
+            centers[i] = shape[:2]
+            radius[i] = shape[2]
+        else:
+            x0, y0, width, height = shape
+            centers[i] = (x0 + width / 2, y0 + height / 2)
+            half[i] = (width / 2, height / 2)
+    return centers, half, radius
+
+
+def point_segment_distance(points, starts, ends):
+    direction = ends - starts
+    length_sq = np.einsum("...i,...i->...", direction, direction)
+    t = np.einsum("...i,...i->...", points - starts, direction) / np.where(length_sq > 0, length_sq, 1.0)
+    closest = starts + np.clip(t, 0.0, 1.0)[..., None] * direction
+    return np.linalg.norm(points - closest, axis=-1)
+
+
+def pair_clearance(p0, p1, centers, half, radius):
+    direction = p1 - p0
+    lower, upper = centers - half, centers + half
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t1 = (lower - p0) / direction
+        t2 = (upper - p0) / direction
+    flat = direction == 0
+    inside_slab = (p0 >= lower) & (p0 <= upper)
+    t_near = np.where(flat, np.where(inside_slab, -np.inf, np.inf), np.minimum(t1, t2)).max(axis=-1)
+    t_far = np.where(flat, np.where(inside_slab, np.inf, -np.inf), np.maximum(t1, t2)).min(axis=-1)
+    crosses = (t_near <= t_far) & (t_far >= 0.0) & (t_near <= 1.0)
+    distance = np.minimum(
+        np.linalg.norm(np.maximum(np.abs(p0 - centers) - half, 0.0), axis=-1),
+        np.linalg.norm(np.maximum(np.abs(p1 - centers) - half, 0.0), axis=-1),
+    )
+    for sx, sy in ((-1, -1), (-1, 1), (1, -1), (1, 1)):
+        corner = centers + half * np.array([sx, sy])
+        distance = np.minimum(distance, point_segment_distance(corner, p0, p1))
+    return np.where(crosses, 0.0, distance) - radius
+
+
+def segment_clearance(starts, ends, centers, half, radius, block_size=1 << 18):
+    starts = np.asarray(starts, dtype=float).reshape(-1, 2)
+    ends = np.asarray(ends, dtype=float).reshape(-1, 2)
+    result = np.empty((len(starts), len(centers)))
+    step = max(1, block_size // max(1, len(centers)))
+    for first in range(0, len(starts), step):
+        rows = slice(first, first + step)
+        result[rows] = pair_clearance(starts[rows, None, :], ends[rows, None, :], centers, half, radius)
+    return result
+
+
+def segment_hits(starts, ends, centers, half, radius, margin, block_size=1 << 20):
+    starts = np.asarray(starts, dtype=float).reshape(-1, 2)
+    ends = np.asarray(ends, dtype=float).reshape(-1, 2)
+    lower = centers - half - radius[:, None] - margin
+    upper = centers + half + radius[:, None] + margin
+    hits = np.zeros((len(starts), len(centers)), dtype=bool)
+    step = max(1, block_size // max(1, len(centers)))
+    for first in range(0, len(starts), step):
+        p0, p1 = starts[first : first + step], ends[first : first + step]
+        near = np.all(
+            (np.minimum(p0, p1)[:, None, :] <= upper) & (np.maximum(p0, p1)[:, None, :] >= lower),
+            axis=-1,
+        )
+        s, m = np.nonzero(near)
+        hits[first + s, m] = pair_clearance(p0[s], p1[s], centers[m], half[m], radius[m]) < margin
+    return hits
+
+
+def sync_obstacles(obstacles, index, clearance):
+    index.rebuild(obstacles)
+    clearance.update(obstacles)
+
+
+class ObstacleIndex:
+    def __init__(self, obstacles=()):
+        self.rebuild(obstacles)
+
+    def rebuild(self, obstacles):
+        self.centers, self.half, self.radius = obstacle_arrays(obstacles)
+        self.handles = [np.array(obstacle_shape(obstacle)[1]) for obstacle in obstacles]
+        self._keys = np.empty(0, dtype=np.int64)
+        self._owners = np.empty(0, dtype=np.int64)
+        if not len(obstacles):
+            return
+        extent = self.half + self.radius[:, None]
+        lower, upper = self.centers - extent, self.centers + extent
+        self._origin = lower.min(axis=0)
+        self._cell = max(float(np.median(2 * extent.max(axis=1))), 1e-6)
+        first = ((lower - self._origin) // self._cell).astype(np.int64)
+        last = ((upper - self._origin) // self._cell).astype(np.int64)
+        self._ny = int(last[:, 1].max()) + 1
+        keys, owners = [], []
+        for i, ((x0, y0), (x1, y1)) in enumerate(zip(first, last)):
+            cells = (np.arange(x0, x1 + 1)[:, None] * self._ny + np.arange(y0, y1 + 1)[None, :]).ravel()
+            keys.append(cells)
+            owners.append(np.full(len(cells), i))
+        keys, owners = np.concatenate(keys), np.concatenate(owners)
+        order = np.argsort(keys, kind="stable")
+        self._keys, self._owners = keys[order], owners[order]
+
+    def handle_at(self, idx, x, y):
+        handles = self.handles[idx]
+        if not len(handles):
+            return None
+        dist = np.hypot(handles[:, 0] - x, handles[:, 1] - y)
+        best = int(np.argmin(dist))
+        return best if dist[best] <= HANDLE_RADIUS else None
+
+    def hit(self, x, y, selected=None):
+        if selected is not None and 0 <= selected < len(self.handles):
+            handle = self.handle_at(selected, x, y)
+            if handle is not None:
+                return selected, handle
+        if not len(self._keys):
+            return None
+        cx, cy = ((np.array([x, y]) - self._origin) // self._cell).astype(np.int64)
+        if cx < 0 or cy < 0 or cy >= self._ny:
+            return None
+        key = cx * self._ny + cy
+        candidates = self._owners[np.searchsorted(self._keys, key, "left") : np.searchsorted(self._keys, key, "right")]
+        outside = np.maximum(np.abs(np.array([x, y]) - self.centers[candidates]) - self.half[candidates], 0.0)
+        inside = candidates[np.hypot(outside[:, 0], outside[:, 1]) <= self.radius[candidates]]
+        if not len(inside):
+            return None
+        idx = int(inside.max())
+        return idx, self.handle_at(idx, x, y)
@@ -0,0 +1,162 @@
+import os
+import re
+
+import numpy as np
+
+DRONE_SPEED = 1.0
+PLAN_MATCH_TOLERANCE = 0.01
+PLAN_CHUNK_CHARS = 1 << 20
+PLAN_CHUNK_POINTS = 65536
+PLAN_PRECISION = 2
+PLAN_NUMBER = r"\s*(-?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)\s*"
+PLAN_POINT = re.compile(rf"\({PLAN_NUMBER},{PLAN_NUMBER},{PLAN_NUMBER}\)")
+PLAN_JUNK = re.compile(r"\([^()]*\)?|[^\s,\[\]()]+")
+
+
+def new_plan(name, points=None, speed=DRONE_SPEED, delay=0.0):
+    return {"name": name, "speed": speed, "delay": delay, "points": [] if points is None else points}
+
+
+def read_plan_points(file_path):
+    chunks = []
+    tail = ""
+    with open(file_path, "r") as f:
+        while True:
+            block = f.read(PLAN_CHUNK_CHARS)
+            text = tail + block
+            cut = len(text) if not block else text.rfind(")") + 1
+            values = [value for match in PLAN_POINT.findall(text[:cut]) for value in match]
+            junk = PLAN_JUNK.search(PLAN_POINT.sub(",", text[:cut]))
+            if junk:
+                raise ValueError(f"Не удалось разобрать фрагмент плана: {junk.group()[:40]}")
+            chunks.append(np.array(values, dtype=float).reshape(-1, 3))
+            tail = text[cut:]
+            if not block:
+                break
+    return np.concatenate(chunks)
+
+
+def read_plan(file_path, markers, tolerance=PLAN_MATCH_TOLERANCE):
+    points = read_plan_points(file_path)
+    if not len(points):
+        raise ValueError("Некорректный формат файла")
+    matched = markers.nearest_many(points[:, 0], points[:, 1], tolerance)
+    missing = np.flatnonzero(matched < 0)
+    if len(missing):
+        lines = [f"Маркер не найден: ({x:.2f}, {y:.2f})" for x, y in points[missing[:10], :2]]
+        if len(missing) > 10:
+            lines.append(f"Всего не найдено точек: {len(missing)}")
+        raise ValueError("\n".join(lines))
+    data = markers.data
+    return list(zip(data["x"][matched].tolist(), data["y"][matched].tolist(), points[:, 2].tolist()))
+
+
+class PlanWriter:
+    extension = ".txt"
+    description = "Текстовые файлы"
+    template = "%f,%f,%f\n"
+    separator = ""
+
+    def __init__(self, precision=PLAN_PRECISION, speed=DRONE_SPEED, delay=0.0):
+        self.row = self.template.replace("%f", f"%.{precision}f")
+        self.precision = precision
+        self.speed = speed
+        self.delay = delay
+
+    def header(self, plan):
+        return ""
+
+    def footer(self):
+        return ""
+
+    def chunk(self, rows, first):
+        text = self.separator.join(map(self.row.__mod__, rows))
+        return self.separator + text if first else text
+
+    def write(self, f, plan, chunk_size=PLAN_CHUNK_POINTS):
+        f.write(self.header(plan))
+        for first in range(0, len(plan), chunk_size):
+            points = np.asarray(plan[first : first + chunk_size], dtype=float).reshape(-1, 3)
+            f.write(self.chunk(map(tuple, points.tolist()), first))
+        f.write(self.footer())
+
+
+class BracketPlanWriter(PlanWriter):
+    template = "(%f,%f,%f)"
+    separator = ","
+
+    def header(self, plan):
+        return "["
+
+    def footer(self):
+        return "]"
+
+
+class CsvPlanWriter(PlanWriter):
+    extension = ".csv"
+    description = "CSV"
+
+    def header(self, plan):
+        return "x,y,z\n"
+
+
+class JsonLinesPlanWriter(PlanWriter):
+    extension = ".jsonl"
+    description = "JSON Lines"
+    template = '{"x": %f, "y": %f, "z": %f}\n'
+
+
+class CloverPlanWriter(PlanWriter):
+    extension = ".py"
+    description = "Скрипт Clover"
+    template = "navigate_wait(x=%f, y=%f, z=%f)\n"
+    script = """import math
+
+import rospy
+from clover import srv
+from std_srvs.srv import Trigger
+
+rospy.init_node("aruco_flight")
+get_telemetry = rospy.ServiceProxy("get_telemetry", srv.GetTelemetry)
+navigate = rospy.ServiceProxy("navigate", srv.Navigate)
+land = rospy.ServiceProxy("land", Trigger)
+
+
+def navigate_wait(x=0, y=0, z=0, speed={speed}, frame_id="aruco_map", auto_arm=False, tolerance=0.2):
+    navigate(x=x, y=y, z=z, yaw=float("nan"), speed=speed, frame_id=frame_id, auto_arm=auto_arm)
+    while not rospy.is_shutdown():
+        telemetry = get_telemetry(frame_id="navigate_target")
+        if math.sqrt(telemetry.x**2 + telemetry.y**2 + telemetry.z**2) < tolerance:
+            break
+        rospy.sleep(0.2)
+
+
+rospy.sleep({delay})
+navigate_wait(z={altitude}, frame_id="body", auto_arm=True)
+"""
+
+    def header(self, plan):
+        altitude = round(float(plan[0][2]), self.precision) if len(plan) else 1.0
+        return self.script.format(speed=self.speed, delay=self.delay, altitude=altitude)
+
+    def footer(self):
+        return "land()\n"
+
+
+PLAN_WRITERS = {
+    "bracket": BracketPlanWriter,
+    "csv": CsvPlanWriter,
+    "jsonl": JsonLinesPlanWriter,
+    "clover": CloverPlanWriter,
+}
+
+
+def plan_format(file_path):
+    extension = os.path.splitext(file_path)[1].lower()
+    return next((name for name, writer in PLAN_WRITERS.items() if writer.extension == extension), "bracket")
+
+
+def write_plan(file_path, plan, fmt=None, precision=PLAN_PRECISION, speed=DRONE_SPEED, delay=0.0, chunk_size=PLAN_CHUNK_POINTS):
+    writer = PLAN_WRITERS[fmt or plan_format(file_path)](precision, speed, delay)
+    with open(file_path, "w") as f:
+        writer.write(f, plan, chunk_size)
@@ -0,0 +1,101 @@
+import numpy as np
+
+MARKER_FLOOR, MARKER_WALL, MARKER_CEILING = 0, 1, 2
+MARKER_KINDS = ("пол", "стена", "потолок")
+SURFACE_TILT = np.cos(np.radians(45))
+CORNER_OFFSETS = np.array([[-0.5, -0.5, 0.0], [0.5, -0.5, 0.0], [0.5, 0.5, 0.0], [-0.5, 0.5, 0.0]])
+
+
+def rotation_matrices(data):
+    cz, sz = np.cos(data["rot_z"]), np.sin(data["rot_z"])
+    cy, sy = np.cos(data["rot_y"]), np.sin(data["rot_y"])
+    cx, sx = np.cos(data["rot_x"]), np.sin(data["rot_x"])
+    rotations = np.empty((len(data), 3, 3))
+    rotations[:, 0, 0] = cz * cy
+    rotations[:, 0, 1] = cz * sy * sx - sz * cx
+    rotations[:, 0, 2] = cz * sy * cx + sz * sx
+    rotations[:, 1, 0] = sz * cy
+    rotations[:, 1, 1] = sz * sy * sx + cz * cx
+    rotations[:, 1, 2] = sz * sy * cx - cz * sx
+    rotations[:, 2, 0] = -sy
+    rotations[:, 2, 1] = cy * sx
+    rotations[:, 2, 2] = cy * cx
+    return rotations
+
+
+def marker_corners_3d(data, rotations=None):
+    if rotations is None:
+        rotations = rotation_matrices(data)
+    centers = np.column_stack([data["x"], data["y"], data["z"]])
+    offsets = np.einsum("nij,kj->nki", rotations, CORNER_OFFSETS)
+    return centers[:, None, :] + offsets * np.asarray(data["length"], dtype=float)[:, None, None]
+
+
+def marker_kinds(rotations):
+    up = rotations[:, 2, 2]
+    kinds = np.full(len(rotations), MARKER_WALL, dtype=np.int8)
+    kinds[up >= SURFACE_TILT] = MARKER_FLOOR
+    kinds[up <= -SURFACE_TILT] = MARKER_CEILING
+    return kinds
+
+
+class MarkerPoses:
+    def __init__(self, store):
+        self.store = store
+        self.version = None
+        self._dirty = []
+        store.subscribe(self._on_change)
+
+    def _on_change(self, event, index):
+        if self.version is None:
+            return
+        if event == "removed":
+            self._rotations = np.delete(self._rotations, index, axis=0)
+            self._corners = np.delete(self._corners, index, axis=0)
+            self._kinds = np.delete(self._kinds, index)
+            self._dirty = [i - (i > index) for i in self._dirty if i != index]
+        else:
+            if event == "added":
+                self._rotations = np.insert(self._rotations, index, np.eye(3), axis=0)
+                self._corners = np.insert(self._corners, index, 0.0, axis=0)
+                self._kinds = np.insert(self._kinds, index, MARKER_FLOOR)
+                self._dirty = [i + (i >= index) for i in self._dirty]
+            self._dirty.append(index)
+        self.version += 1
+
+    def refresh(self):
+        data = self.store.data
+        if self.version != self.store.version or len(self._kinds) != len(data):
+            self._rotations = rotation_matrices(data)
+            self._corners = marker_corners_3d(data, self._rotations)
+            self._kinds = marker_kinds(self._rotations)
+            self._dirty = []
+        elif self._dirty:
+            rows = np.unique(self._dirty)
+            rotations = rotation_matrices(data[rows])
+            self._rotations[rows] = rotations
+            self._corners[rows] = marker_corners_3d(data[rows], rotations)
+            self._kinds[rows] = marker_kinds(rotations)
+            self._dirty = []
+        self.version = self.store.version
+        return self
+
+    @property
+    def rotations(self):
+        return self.refresh()._rotations
+
+    @property
+    def corners(self):
+        return self.refresh()._corners
+
+    @property
+    def kinds(self):
+        return self.refresh()._kinds
+
+    @property
+    def normals(self):
+        return self.rotations[:, :, 2]
+
+    @property
+    def footprints(self):
+        return self.corners[:, :, :2]
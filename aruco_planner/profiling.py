@@ -0,0 +1,95 @@
+import functools
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+PROFILE_WINDOW = 1000
+TRACE_LIMIT = 100000
+
+
+class Profiler:
+    def __init__(self, window=PROFILE_WINDOW, trace_limit=TRACE_LIMIT):
+        self.window = window
+        self.samples = {}
+        self.trace = deque(maxlen=trace_limit)
+        self.origin = time.perf_counter()
+        self._wrapped = []
+
+    def record(self, name, start, duration, category="call"):
+        if name not in self.samples:
+            self.samples[name] = deque(maxlen=self.window)
+        self.samples[name].append(duration)
+        self.trace.append((name, category, start - self.origin, duration, threading.get_ident()))
+
+    @contextmanager
+    def span(self, name, category="call"):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter() - start, category)
+
+    def wrap(self, owner, attribute, name=None, category="call"):
+        original = getattr(owner, attribute)
+        label = name or attribute
+        profiler = self
+
+        @functools.wraps(original)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                span = label(*args, **kwargs) if callable(label) else label
+                profiler.record(span, start, time.perf_counter() - start, category)
+
+        had_own = attribute in vars(owner)
+        setattr(owner, attribute, timed)
+        self._wrapped.append((owner, attribute, original, had_own))
+
+    def restore(self):
+        while self._wrapped:
+            owner, attribute, original, had_own = self._wrapped.pop()
+            if had_own:
+                setattr(owner, attribute, original)
+            else:
+                delattr(owner, attribute)
+
+    def percentiles(self, name, quantiles=(50, 95, 99)):
+        values = self.samples.get(name)
+        if not values:
+            return None
+        return np.percentile(np.fromiter(values, dtype=float, count=len(values)), quantiles)
+
+    def summary(self):
+        return {
+            name: {
+                "count": len(values),
+                "p50": float(p50),
+                "p95": float(p95),
+                "p99": float(p99),
+                "max": max(values),
+            }
+            for name, values in self.samples.items()
+            for p50, p95, p99 in [self.percentiles(name)]
+        }
+
+    def export_chrome_trace(self, file_path):
+        events = [
+            {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": start * 1e6,
+                "dur": duration * 1e6,
+                "pid": 1,
+                "tid": tid,
+            }
+            for name, category, start, duration, tid in list(self.trace)
+        ]
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
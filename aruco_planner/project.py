@@ -0,0 +1,185 @@
+import json
+import struct
+from collections.abc import Mapping
+
+import numpy as np
+
+from .markers import MARKER_DTYPE, MARKER_FIELDS, MarkerStore
+from .plan import new_plan
+
+PROJECT_VERSION = "1.0"
+DEFAULT_PLAN_NAME = "Дрон 1"
+PROJECT_TYPE = "aruco_project"
+BINARY_MAGIC = b"APROJBIN"
+BINARY_ALIGNMENT = 64
+
+
+class LazyProject(Mapping):
+    def __init__(self, loaders, close=None):
+        self._loaders = loaders
+        self._values = {}
+        self._close = close
+
+    def __getitem__(self, key):
+        if key not in self._values:
+            self._values[key] = self._loaders[key]()
+        return self._values[key]
+
+    def __iter__(self):
+        return iter(self._loaders)
+
+    def __len__(self):
+        return len(self._loaders)
+
+    def load(self, *keys):
+        values = {key: self[key] for key in keys or self._loaders}
+        self.close()
+        return values
+
+    def close(self):
+        if self._close is not None:
+            self._close()
+
+
+class BinaryProject:
+    def __init__(self, file_path):
+        self.file_path = file_path
+        with open(file_path, "rb") as f:
+            if f.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+                raise ValueError("Неверный формат файла проекта")
+            (header_size,) = struct.unpack("<I", f.read(4))
+            header = json.loads(f.read(header_size).decode("utf-8"))
+        self.data_offset = aligned(len(BINARY_MAGIC) + 4 + header_size)
+        self.metadata = header.get("metadata", {})
+        if self.metadata.get("type") != PROJECT_TYPE:
+            raise ValueError("Неверный формат файла проекта")
+        self.obstacles = header["obstacles"]
+        self.plan_headers = header.get("plans")
+        self.layout = header["columns"]
+        self._columns = {}
+
+    def column(self, name):
+        if name not in self._columns:
+            spec = self.layout[name]
+            shape = tuple(spec["shape"])
+            if 0 in shape:
+                self._columns[name] = np.empty(shape, dtype=spec["dtype"])
+            else:
+                self._columns[name] = np.memmap(
+                    self.file_path, dtype=spec["dtype"], mode="r", offset=self.data_offset + spec["offset"], shape=shape
+                )
+        return self._columns[name]
+
+    def close(self):
+        self._columns.clear()
+
+    def marker_column(self, name):
+        return self.column(f"markers/{name}")
+
+    @property
+    def markers(self):
+        data = np.empty(len(self.marker_column("id")), dtype=MARKER_DTYPE)
+        for name in MARKER_FIELDS:
+            data[name] = self.marker_column(name)
+        return MarkerStore(data)
+
+    @property
+    def flight_plan(self):
+        return [tuple(point) for point in self.column("flight_plan").tolist()]
+
+    @property
+    def plans(self):
+        if self.plan_headers is None:
+            return [new_plan(DEFAULT_PLAN_NAME, self.flight_plan)]
+        return [
+            dict(plan, points=[tuple(point) for point in self.column(f"plans/{i}").tolist()])
+            for i, plan in enumerate(self.plan_headers)
+        ]
+
+
+def aligned(size):
+    return -(-size // BINARY_ALIGNMENT) * BINARY_ALIGNMENT
+
+
+def is_binary_project(file_path):
+    with open(file_path, "rb") as f:
+        return f.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+
+
+def write_project(file_path, markers, obstacles, flight_plan, binary=False, plans=None):
+    if binary:
+        write_binary_project(file_path, markers, obstacles, flight_plan, plans)
+        return
+    project_data = {
+        "metadata": {"version": PROJECT_VERSION, "type": PROJECT_TYPE},
+        "markers": markers.to_dicts(),
+        "obstacles": obstacles,
+        "flight_plan": flight_plan,
+    }
+    if plans is not None:
+        project_data["plans"] = plans
+    with open(file_path, "w") as f:
+        json.dump(project_data, f, indent=2)
+
+
+def write_binary_project(file_path, markers, obstacles, flight_plan, plans=None):
+    data = markers.data
+    columns = [(f"markers/{name}", np.ascontiguousarray(data[name])) for name in MARKER_FIELDS]
+    columns.append(("flight_plan", np.array(flight_plan, dtype=np.float64).reshape(-1, 3)))
+    for i, plan in enumerate(plans or []):
+        columns.append((f"plans/{i}", np.array(plan["points"], dtype=np.float64).reshape(-1, 3)))
+    layout = {}
+    offset = 0
+    for name, array in columns:
+        layout[name] = {"offset": offset, "dtype": array.dtype.str, "shape": list(array.shape)}
+        offset += aligned(array.nbytes)
+    header = {
+        "metadata": {"version": PROJECT_VERSION, "type": PROJECT_TYPE, "format": "binary"},
+        "obstacles": obstacles,
+        "columns": layout,
+    }
+    if plans is not None:
+        header["plans"] = [{key: value for key, value in plan.items() if key != "points"} for plan in plans]
+    header = json.dumps(header).encode("utf-8")
+    with open(file_path, "wb") as f:
+        f.write(BINARY_MAGIC)
+        f.write(struct.pack("<I", len(header)))
+        f.write(header)
+        f.write(b"\0" * (aligned(f.tell()) - f.tell()))
+        for _, array in columns:
+            f.write(array.tobytes())
+            f.write(b"\0" * (aligned(array.nbytes) - array.nbytes))
+
+
+def read_project(file_path):
+    if is_binary_project(file_path):
+        project = BinaryProject(file_path)
+        return LazyProject(
+            {
+                "metadata": lambda: project.metadata,
+                "markers": lambda: project.markers,
+                "obstacles": lambda: project.obstacles,
+                "flight_plan": lambda: project.flight_plan,
+                "plans": lambda: project.plans,
+            },
+            project.close,
+        )
+    with open(file_path, "r") as f:
+        project_data = json.load(f)
+    if project_data.get("metadata", {}).get("type") != PROJECT_TYPE:
+        raise ValueError("Неверный формат файла проекта")
+    return LazyProject(
+        {
+            "metadata": lambda: project_data["metadata"],
+            "markers": lambda: MarkerStore.from_dicts(project_data["markers"]),
+            "obstacles": lambda: project_data["obstacles"],
+            "flight_plan": lambda: [tuple(point) for point in project_data["flight_plan"]],
+            "plans": lambda: read_plans(project_data),
+        }
+    )
+
+
+def read_plans(project_data):
+    if "plans" not in project_data:
+        return [new_plan(DEFAULT_PLAN_NAME, [tuple(point) for point in project_data["flight_plan"]])]
+    return [dict(plan, points=[tuple(point) for point in plan["points"]]) for plan in project_data["plans"]]
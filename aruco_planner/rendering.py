@@ -0,0 +1,270 @@
+import numpy as np
+from matplotlib.artist import Artist
+from matplotlib.colors import to_rgba
+from matplotlib.font_manager import FontProperties
+from matplotlib.patches import Circle, Rectangle
+from matplotlib.path import Path
+from matplotlib.textpath import TextPath, text_to_path
+from matplotlib.transforms import Affine2D, IdentityTransform
+
+from .markers import expand_ranges
+from .obstacles import HANDLE_RADIUS, obstacle_shape
+
+MARKER_DETAIL_PIXELS = 4.0
+LABEL_MIN_PIXELS = 16.0
+MARKER_PICK_RADIUS = 0.11
+
+
+class MarkerLabels(Artist):
+    chunk_size = 2000
+
+    def __init__(self, x, y, labels, color="blue", fontsize=8):
+        super().__init__()
+        self.color = color
+        self.font = FontProperties(size=fontsize)
+        self._glyph_verts = np.empty((0, 2))
+        self._glyph_codes = np.empty(0, dtype=Path.code_type)
+        self._glyph_counts = np.empty(0, dtype=np.int64)
+        self._glyph_widths = np.empty(0)
+        self._glyph_lookup = np.full(1, self._glyph(0), dtype=np.int32)
+        digit = TextPath((0, 0), "0", prop=self.font).vertices
+        self._middle = (digit[:, 1].max() + digit[:, 1].min()) / 2
+        self.visible_indices = None
+        self.set_data(x, y, labels)
+
+    def set_visible_indices(self, indices):
+        self.visible_indices = indices
+        self.stale = True
+
+    def _glyph(self, codepoint):
+        verts, codes, width = np.empty((0, 2)), np.empty(0, dtype=Path.code_type), 0.0
+        if codepoint:
+            char = chr(codepoint)
+            verts, codes = text_to_path.get_text_path(self.font, char)
+            verts = np.array(verts, dtype=float).reshape(-1, 2) * self.font.get_size_in_points() / text_to_path.FONT_SCALE
+            codes = np.array(codes, dtype=Path.code_type)
+            width = text_to_path.get_text_width_height_descent(char, self.font, ismath=False)[0]
+        self._glyph_verts = np.concatenate([self._glyph_verts, verts])
+        self._glyph_codes = np.concatenate([self._glyph_codes, codes])
+        self._glyph_counts = np.append(self._glyph_counts, len(verts))
+        self._glyph_widths = np.append(self._glyph_widths, width)
+        self._glyph_starts = np.cumsum(self._glyph_counts) - self._glyph_counts
+        return len(self._glyph_widths) - 1
+
+    def _encode(self, labels, width=1):
+        text = np.asarray(labels, dtype=str).reshape(-1)
+        length = text.dtype.itemsize // 4
+        codepoints = np.zeros((len(text), max(length, width)), dtype=np.uint32)
+        if length:
+            codepoints[:, :length] = text.view(np.uint32).reshape(len(text), length)
+        used = np.flatnonzero(codepoints.any(axis=0))
+        codepoints = codepoints[:, : max(used[-1] + 1 if len(used) else 0, width)]
+        unique = np.unique(codepoints)
+        if len(unique) and unique[-1] >= len(self._glyph_lookup):
+            self._glyph_lookup = np.pad(self._glyph_lookup, (0, int(unique[-1]) + 1 - len(self._glyph_lookup)), constant_values=-1)
+        for codepoint in unique[self._glyph_lookup[unique] < 0]:
+            self._glyph_lookup[codepoint] = self._glyph(int(codepoint))
+        return self._glyph_lookup[codepoints]
+
+    def set_data(self, x, y, labels):
+        self.anchors = np.column_stack([x, y]).astype(float)
+        self._labels = self._encode(labels)
+        self.stale = True
+
+    def _fit(self, label):
+        glyphs = self._encode([label], self._labels.shape[1])
+        if glyphs.shape[1] > self._labels.shape[1]:
+            self._labels = np.pad(self._labels, ((0, 0), (0, glyphs.shape[1] - self._labels.shape[1])))
+        return glyphs[0]
+
+    def insert_label(self, index, x, y, label):
+        glyphs = self._fit(label)
+        self._labels = np.insert(self._labels, index, glyphs, axis=0)
+        self.anchors = np.insert(self.anchors, index, (x, y), axis=0)
+        self.stale = True
+
+    def set_label(self, index, x, y, label):
+        self._labels[index] = self._fit(label)
+        self.anchors[index] = (x, y)
+        self.stale = True
+
+    def remove_label(self, index):
+        self._labels = np.delete(self._labels, index, axis=0)
+        self.anchors = np.delete(self.anchors, index, axis=0)
+        self.stale = True
+
+    def _layout(self, indices):
+        glyphs = self._labels[indices]
+        advance = self._glyph_widths[glyphs]
+        offsets = np.cumsum(advance, axis=1) - advance - advance.sum(axis=1, keepdims=True) / 2
+        counts = self._glyph_counts[glyphs]
+        used = counts > 0
+        glyphs, offsets, counts = glyphs[used], offsets[used], counts[used]
+        source = expand_ranges(self._glyph_starts[glyphs], counts)
+        shift = np.column_stack([np.repeat(offsets, counts), np.full(len(source), -self._middle)])
+        label_counts = np.bincount(np.nonzero(used)[0], weights=counts, minlength=len(indices)).astype(np.int64)
+        return self._glyph_verts[source] + shift, self._glyph_codes[source], label_counts
+
+    def draw(self, renderer):
+        if not self.get_visible() or not len(self.anchors):
+            return
+        candidates = np.arange(len(self.anchors)) if self.visible_indices is None else self.visible_indices
+        points = self.get_transform().transform(self.anchors[candidates])
+        width, height = renderer.get_canvas_width_height()
+        inside = (points[:, 0] >= 0) & (points[:, 0] <= width) & (points[:, 1] >= 0) & (points[:, 1] <= height)
+        points = points[inside]
+        inside = candidates[inside]
+        scale = renderer.points_to_pixels(1.0)
+        renderer.open_group("marker_labels", gid=self.get_gid())
+        gc = renderer.new_gc()
+        gc.set_linewidth(0)
+        self._set_gc_clip(gc)
+        for first in range(0, len(inside), self.chunk_size):
+            verts, codes, counts = self._layout(inside[first : first + self.chunk_size])
+            if not len(codes):
+                continue
+            verts = verts * scale + np.repeat(points[first : first + self.chunk_size], counts, axis=0)
+            renderer.draw_path(gc, Path(verts, codes), IdentityTransform(), to_rgba(self.color))
+        gc.restore()
+        renderer.close_group("marker_labels")
+        self.stale = False
+
+
+class MarkerQuads(Artist):
+    chunk_size = 5000
+    point_size = 3.0
+
+    def __init__(self, corners, kinds=None, colors=("blue", "darkorange", "purple"), highlight_color="red"):
+        super().__init__()
+        self.colors = colors
+        self.highlight_color = highlight_color
+        self.highlighted = None
+        self.visible_indices = None
+        self.detailed = True
+        self.corners = np.array(corners, dtype=float).reshape(-1, 4, 2)
+        self.kinds = np.zeros(len(self.corners), dtype=np.int8) if kinds is None else np.array(kinds, dtype=np.int8)
+
+    def insert_quad(self, index, corners, kind=0):
+        self.corners = np.insert(self.corners, index, corners, axis=0)
+        self.kinds = np.insert(self.kinds, index, kind)
+        self.stale = True
+
+    def set_quad(self, index, corners, kind=0):
+        self.corners[index] = corners
+        self.kinds[index] = kind
+        self.stale = True
+
+    def remove_quad(self, index):
+        self.corners = np.delete(self.corners, index, axis=0)
+        self.kinds = np.delete(self.kinds, index)
+        self.stale = True
+
+    def set_visible_indices(self, indices):
+        self.visible_indices = indices
+        self.stale = True
+
+    def set_highlighted(self, index):
+        self.highlighted = index
+        self.stale = True
+
+    def draw(self, renderer):
+        if not self.get_visible() or not len(self.corners):
+            return
+        candidates = np.arange(len(self.corners)) if self.visible_indices is None else self.visible_indices
+        corners = self.corners[candidates]
+        if not len(corners):
+            return
+        transform = self.get_transform()
+        width, height = renderer.get_canvas_width_height()
+        if self.detailed:
+            points = transform.transform(corners.reshape(-1, 2)).reshape(-1, 4, 2)
+            lower, upper = points.min(axis=1), points.max(axis=1)
+        else:
+            points = transform.transform(corners.mean(axis=1))[:, None, :]
+            lower = upper = points[:, 0]
+        inside = (upper[:, 0] >= 0) & (lower[:, 0] <= width) & (upper[:, 1] >= 0) & (lower[:, 1] <= height)
+        points = points[inside]
+        kinds = self.kinds[candidates[inside]]
+        highlighted = np.flatnonzero(candidates[inside] == self.highlighted)
+        renderer.open_group("marker_quads", gid=self.get_gid())
+        gc = renderer.new_gc()
+        self._set_gc_clip(gc)
+        if not self.detailed:
+            sample = transform.transform(corners[:256].reshape(-1, 2)).reshape(-1, 4, 2)
+            size = float(np.clip(np.median(np.ptp(sample, axis=1).max(axis=1)), 1.0, self.point_size))
+        for kind in np.unique(kinds):
+            group = points[kinds == kind]
+            gc.set_foreground(self.colors[kind])
+            if self.detailed:
+                self._draw_outlines(renderer, gc, group)
+            else:
+                self._draw_points(renderer, gc, group[:, 0], size, width, height)
+        gc.set_foreground(self.highlight_color)
+        if self.detailed:
+            self._draw_outlines(renderer, gc, points[highlighted])
+        else:
+            self._draw_points(renderer, gc, points[highlighted, 0], self.point_size, width, height)
+        gc.restore()
+        renderer.close_group("marker_quads")
+        self.stale = False
+
+    def _draw_points(self, renderer, gc, centers, size, width, height):
+        if not len(centers):
+            return
+        columns, rows = int(width // size) + 1, int(height // size) + 1
+        cells = np.clip((centers // size).astype(np.int64), 0, [columns - 1, rows - 1])
+        occupied = np.zeros(columns * rows, dtype=bool)
+        occupied[cells[:, 0] * rows + cells[:, 1]] = True
+        cells = np.flatnonzero(occupied)
+        centers = (np.column_stack([cells // rows, cells % rows]) + 0.5) * size
+        gc.set_linewidth(0)
+        marker = Path.unit_rectangle().transformed(Affine2D().translate(-0.5, -0.5).scale(size))
+        renderer.draw_markers(gc, marker, IdentityTransform(), Path(centers), IdentityTransform(), to_rgba(gc.get_rgb()))
+
+    def _draw_outlines(self, renderer, gc, points):
+        gc.set_linewidth(1.0)
+        codes = np.array([Path.MOVETO, Path.LINETO, Path.LINETO, Path.LINETO, Path.CLOSEPOLY], dtype=Path.code_type)
+        for first in range(0, len(points), self.chunk_size):
+            chunk = points[first : first + self.chunk_size]
+            verts = np.concatenate([chunk, chunk[:, :1]], axis=1).reshape(-1, 2)
+            renderer.draw_path(gc, Path(verts, np.tile(codes, len(chunk))), IdentityTransform())
+
+
+def marker_artists(markers):
+    data, poses = markers.data, markers.poses
+    return MarkerQuads(poses.footprints, poses.kinds), MarkerLabels(data["x"], data["y"], data["id"].astype(str))
+
+
+def marker_scale(markers):
+    lengths = markers.data["length"]
+    if not len(lengths):
+        return 0.0, 0.0
+    return float(np.median(lengths)), float(lengths.max()) / np.sqrt(2)
+
+
+def set_marker_view(markers, quads, labels, xlim, ylim, width, size, pad):
+    (x0, x1), (y0, y1) = xlim, ylim
+    visible = markers.query_rect(min(x0, x1) - pad, min(y0, y1) - pad, max(x0, x1) + pad, max(y0, y1) + pad)
+    quads.set_visible_indices(visible)
+    labels.set_visible_indices(visible)
+    pixels = size * width / max(abs(x1 - x0), 1e-9)
+    quads.detailed = pixels >= MARKER_DETAIL_PIXELS
+    labels.set_visible(pixels >= LABEL_MIN_PIXELS)
+
+
+def obstacle_artists(obstacle, selected=False):
+    color = "yellow" if selected else "gray"
+    shape, handle_centers = obstacle_shape(obstacle)
+    if obstacle["type"] == "флаг":
+        patch = Circle(shape[:2], shape[2], facecolor=color, alpha=0.7, edgecolor="black")
+    else:
+        patch = Rectangle(shape[:2], shape[2], shape[3], facecolor=color, alpha=0.7, edgecolor="black")
+    handles = [Circle(center, HANDLE_RADIUS, facecolor="red") for center in handle_centers] if selected else []
+    return patch, handles
+
+
+def pick_target(obstacle_index, markers, x, y, selected=None):
+    hit = obstacle_index.hit(x, y, selected)
+    if hit is not None or markers is None:
+        return hit, None
+    return None, markers.nearest(x, y, MARKER_PICK_RADIUS)
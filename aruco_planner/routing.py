@@ -0,0 +1,97 @@
+import heapq
+import math
+from collections import Counter
+
+import numpy as np
+
+from .obstacles import obstacle_arrays, obstacle_key, segment_clearance
+
+
+class RoutePlanner:
+    def __init__(self, markers, connect_radius=None, margin=0.1):
+        self.markers = markers
+        self.version = markers.version
+        self.margin = margin
+        data = markers.data
+        if connect_radius is None:
+            span_x = float(np.ptp(data["x"])) if len(data) else 0.0
+            span_y = float(np.ptp(data["y"])) if len(data) else 0.0
+            spacing = np.sqrt(max(span_x * span_y, max(span_x, span_y) ** 2 / max(len(data), 1)) / max(len(data), 1))
+            connect_radius = max(3.0 * spacing, 1e-6)
+        self.connect_radius = connect_radius
+        self.edge_a, self.edge_b = markers.pairs_within(connect_radius)
+        self.edge_length = np.hypot(data["x"][self.edge_a] - data["x"][self.edge_b], data["y"][self.edge_a] - data["y"][self.edge_b])
+        nodes = np.concatenate([self.edge_a, self.edge_b])
+        order = np.argsort(nodes, kind="stable")
+        self.adj_node = np.concatenate([self.edge_b, self.edge_a])[order]
+        self.adj_edge = np.tile(np.arange(len(self.edge_a)), 2)[order]
+        self.adj_start = np.searchsorted(nodes[order], np.arange(len(data) + 1))
+        self.blocked = np.zeros(len(self.edge_a), dtype=np.int32)
+        self._blocking = {}
+
+    def is_current(self, markers):
+        return markers is self.markers and markers.version == self.version
+
+    def sync(self, obstacles):
+        wanted = Counter()
+        samples = {}
+        for obstacle in obstacles:
+            key = obstacle_key(obstacle)
+            wanted[key] += 1
+            samples.setdefault(key, obstacle)
+        for key in set(wanted) | set(self._blocking):
+            count, edges = self._blocking.get(key, (0, None))
+            delta = wanted[key] - count
+            if delta == 0:
+                continue
+            if edges is None:
+                edges = self._blocked_edges(samples[key])
+            self.blocked[edges] += delta
+            if wanted[key]:
+                self._blocking[key] = (wanted[key], edges)
+            else:
+                del self._blocking[key]
+
+    def _blocked_edges(self, obstacle):
+        centers, half, radius = obstacle_arrays([obstacle])
+        reach = half[0] + radius[0] + self.margin + self.connect_radius
+        near = self.markers.query_rect(*(centers[0] - reach), *(centers[0] + reach))
+        if len(near) == 0:
+            return np.empty(0, dtype=np.int64)
+        edges = np.unique(np.concatenate([self.adj_edge[self.adj_start[u] : self.adj_start[u + 1]] for u in near]))
+        data = self.markers.data
+        starts = np.column_stack([data["x"][self.edge_a[edges]], data["y"][self.edge_a[edges]]])
+        ends = np.column_stack([data["x"][self.edge_b[edges]], data["y"][self.edge_b[edges]]])
+        clearance = segment_clearance(starts, ends, centers, half, radius)[:, 0]
+        return edges[clearance <= self.margin]
+
+    def plan(self, start, goal, altitude, obstacles=None):
+        if obstacles is not None:
+            self.sync(obstacles)
+        xs = self.markers.data["x"].tolist()
+        ys = self.markers.data["y"].tolist()
+        gx, gy = xs[goal], ys[goal]
+        best = {start: 0.0}
+        came_from = {}
+        heap = [(math.hypot(xs[start] - gx, ys[start] - gy), 0.0, start)]
+        while heap:
+            _, cost, node = heapq.heappop(heap)
+            if node == goal:
+                break
+            if cost > best[node]:
+                continue
+            lo, hi = self.adj_start[node], self.adj_start[node + 1]
+            edges = self.adj_edge[lo:hi]
+            free = self.blocked[edges] == 0
+            for neighbor, length in zip(self.adj_node[lo:hi][free].tolist(), self.edge_length[edges[free]].tolist()):
+                new_cost = cost + length
+                if new_cost < best.get(neighbor, math.inf):
+                    best[neighbor] = new_cost
+                    came_from[neighbor] = node
+                    heapq.heappush(heap, (new_cost + math.hypot(xs[neighbor] - gx, ys[neighbor] - gy), new_cost, neighbor))
+        else:
+            raise ValueError("Маршрут в обход препятствий не найден")
+        path = [goal]
+        while path[-1] != start:
+            path.append(came_from[path[-1]])
+        return [(xs[i], ys[i], altitude) for i in reversed(path)]
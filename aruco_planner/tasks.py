@@ -0,0 +1,102 @@
+import threading
+from concurrent.futures import CancelledError, ProcessPoolExecutor, ThreadPoolExecutor
+
+TASK_POLL_MS = 50
+TASK_THREADS = 4
+
+
+class Task:
+    def __init__(self, name, on_done=None, on_error=None):
+        self.name = name
+        self.on_done = on_done
+        self.on_error = on_error
+        self.progress = None
+        self.cancel_event = threading.Event()
+        self.future = None
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def report(self, fraction):
+        self.progress = fraction
+
+    def cancel(self):
+        self.cancel_event.set()
+        if self.future is not None:
+            self.future.cancel()
+
+
+class TaskRunner:
+    def __init__(self, root, threads=TASK_THREADS, processes=None, poll_ms=TASK_POLL_MS, on_status=None):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.on_status = on_status
+        self.tasks = []
+        self._threads = ThreadPoolExecutor(threads, thread_name_prefix="aruco-task")
+        self._process_count = processes
+        self._processes = None
+        self._job = None
+
+    def submit(self, name, func, *args, on_done=None, on_error=None):
+        task = Task(name, on_done, on_error)
+        task.future = self._threads.submit(func, task, *args)
+        return self._track(task)
+
+    def submit_process(self, name, func, *args, on_done=None, on_error=None):
+        try:
+            if self._processes is None:
+                self._processes = ProcessPoolExecutor(self._process_count)
+            task = Task(name, on_done, on_error)
+            task.future = self._processes.submit(func, *args)
+        except (OSError, RuntimeError):
+            return self.submit(name, lambda task: func(*args), on_done=on_done, on_error=on_error)
+        return self._track(task)
+
+    def cancel_all(self):
+        for task in self.tasks:
+            task.cancel()
+
+    def shutdown(self):
+        self.cancel_all()
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+            self._job = None
+        self._threads.shutdown(wait=False, cancel_futures=True)
+        if self._processes is not None:
+            self._processes.shutdown(wait=False, cancel_futures=True)
+
+    def _track(self, task):
+        self.tasks.append(task)
+        if self._job is None:
+            self._job = self.root.after(self.poll_ms, self._poll)
+        self._notify()
+        return task
+
+    def _poll(self):
+        self._job = None
+        done = [task.future.done() for task in self.tasks]
+        finished = [task for task, flag in zip(self.tasks, done) if flag]
+        self.tasks = [task for task, flag in zip(self.tasks, done) if not flag]
+        if self.tasks:
+            self._job = self.root.after(self.poll_ms, self._poll)
+        self._notify()
+        for task in finished:
+            self._finish(task)
+
+    def _finish(self, task):
+        if task.cancelled or task.future.cancelled():
+            if task.on_error is not None:
+                task.on_error(CancelledError())
+            return
+        error = task.future.exception()
+        if error is not None:
+            if task.on_error is None:
+                raise error
+            task.on_error(error)
+        elif task.on_done is not None:
+            task.on_done(task.future.result())
+
+    def _notify(self):
+        if self.on_status is not None:
+            self.on_status(self.tasks)
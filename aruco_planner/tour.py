@@ -0,0 +1,167 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+PARALLEL_MIN_POINTS = 300
+
+_shared_dist = None
+
+
+def distance_matrix(points, block_size=1024, out=None):
+    points = np.asarray(points, dtype=float)
+    dist = np.empty((len(points), len(points))) if out is None else out
+    for first in range(0, len(points), block_size):
+        diff = points[first : first + block_size, None, :] - points[None, :, :]
+        dist[first : first + block_size] = np.sqrt(np.einsum("ijk,ijk->ij", diff, diff))
+    return dist
+
+
+def path_length(points, order=None):
+    points = np.asarray(points, dtype=float)
+    if order is not None:
+        points = points[order]
+    return float(np.linalg.norm(np.diff(points, axis=0), axis=1).sum())
+
+
+def tour_matrix(points, fixed_start, fixed_end):
+    n = len(points)
+    dist = np.zeros((n + 1, n + 1))
+    distance_matrix(points, out=dist[:n, :n])
+    if fixed_start or fixed_end:
+        big = dist.max() * (n + 1) + 1.0
+        dist[n, :n] = dist[:n, n] = big
+        for index in ([0] if fixed_start else []) + ([n - 1] if fixed_end else []):
+            dist[n, index] = dist[index, n] = 0.0
+    return dist
+
+
+def tour_length(tour, dist):
+    return float(dist[tour, np.roll(tour, -1)].sum())
+
+
+def two_opt(tour, dist, deadline):
+    n = len(tour)
+    improved = False
+    for i in range(n - 2):
+        if time.time() > deadline:
+            break
+        a, b = tour[i], tour[i + 1]
+        c = tour[i + 2 :]
+        d = np.append(tour[i + 3 :], tour[0])
+        delta = dist[a, c] + dist[b, d] - dist[a, b] - dist[c, d]
+        j = int(np.argmin(delta))
+        if delta[j] < -1e-9:
+            tour[i + 1 : i + j + 3] = tour[i + 1 : i + j + 3][::-1].copy()
+            improved = True
+    return improved
+
+
+def or_opt(tour, dist, deadline):
+    n = len(tour)
+    improved = False
+    for length in (1, 2, 3):
+        i = 1
+        while i + length <= n:
+            if time.time() > deadline:
+                return improved
+            segment = tour[i : i + length]
+            first, last = segment[0], segment[-1]
+            prev, following = tour[i - 1], tour[(i + length) % n]
+            gain = dist[prev, first] + dist[last, following] - dist[prev, following]
+            rest = np.concatenate([tour[:i], tour[i + length :]])
+            u, v = rest, np.roll(rest, -1)
+            forward = dist[u, first] + dist[last, v]
+            backward = dist[u, last] + dist[first, v]
+            cost = np.minimum(forward, backward) - dist[u, v]
+            cost[i - 1] = np.inf
+            k = int(np.argmin(cost))
+            if cost[k] - gain < -1e-9:
+                moved = segment if forward[k] <= backward[k] else segment[::-1]
+                tour[:] = np.concatenate([rest[: k + 1], moved, rest[k + 1 :]])
+                improved = True
+            i += 1
+    return improved
+
+
+def nearest_neighbor_tour(dist, rng):
+    n = len(dist)
+    tour = [n - 1]
+    left = np.ones(n, dtype=bool)
+    left[n - 1] = False
+    current = n - 1 if rng is None else int(rng.integers(n - 1))
+    if current != n - 1:
+        tour.append(current)
+        left[current] = False
+    while left.any():
+        candidates = np.flatnonzero(left)
+        current = int(candidates[np.argmin(dist[current, candidates])])
+        tour.append(current)
+        left[current] = False
+    return np.array(tour)
+
+
+def improve(tour, dist, deadline):
+    while time.time() < deadline:
+        if not (two_opt(tour, dist, deadline) | or_opt(tour, dist, deadline)):
+            break
+    return tour
+
+
+def search_tours(dist, seed, restarts, deadline):
+    n = len(dist)
+    rng = np.random.default_rng(seed)
+    best, best_length = None, np.inf
+    for attempt in range(restarts):
+        if best is not None and time.time() > deadline:
+            break
+        if seed == 0 and attempt == 0:
+            tour = np.roll(np.arange(n), 1)
+        elif seed == 0 and attempt == 1:
+            tour = nearest_neighbor_tour(dist, None)
+        elif attempt % 2:
+            tour = nearest_neighbor_tour(dist, rng)
+        else:
+            tour = np.concatenate([[n - 1], rng.permutation(n - 1)])
+        tour = improve(tour, dist, deadline)
+        length = tour_length(tour, dist)
+        if length < best_length:
+            best, best_length = tour.copy(), length
+    return best, best_length
+
+
+def _share_matrix(dist):
+    global _shared_dist
+    _shared_dist = dist
+
+
+def _search_shared(seed, restarts, deadline):
+    return search_tours(_shared_dist, seed, restarts, deadline)
+
+
+def optimize_order(points, fixed_start=False, fixed_end=False, time_budget=2.0, restarts=8, workers=None):
+    points = np.asarray(points, dtype=float)
+    n = len(points)
+    if n < 3:
+        return list(range(n))
+    deadline = time.time() + time_budget
+    dist = tour_matrix(points, fixed_start, fixed_end)
+    workers = min(workers or os.cpu_count() or 1, restarts)
+    results = []
+    if workers > 1 and n >= PARALLEL_MIN_POINTS:
+        shares = [len(part) for part in np.array_split(np.arange(restarts), workers)]
+        try:
+            with ProcessPoolExecutor(workers, initializer=_share_matrix, initargs=(dist,)) as pool:
+                futures = [pool.submit(_search_shared, seed, share, deadline) for seed, share in enumerate(shares)]
+                results = [future.result() for future in futures]
+        except (OSError, RuntimeError):
+            results = []
+    if not results:
+        results = [search_tours(dist, 0, restarts, deadline)]
+    tour = min(results, key=lambda result: result[1])[0]
+    start = int(np.flatnonzero(tour == n)[0])
+    order = np.roll(tour, -start)[1:]
+    if (fixed_start and order[0] != 0) or (not fixed_start and fixed_end and order[-1] != n - 1):
+        order = order[::-1]
+    return order.tolist()
@@ -0,0 +1,96 @@
+import numpy as np
+
+TRAJECTORY_RATE = 50.0
+TRAJECTORY_CHUNK = 100000
+TRAJECTORY_COLUMNS = ("t", "x", "y", "z", "vx", "vy", "vz")
+
+
+class Trajectory:
+    def __init__(self, plan, max_speed=1.0, max_accel=1.0, junction_deviation=0.05):
+        if max_speed <= 0 or max_accel <= 0:
+            raise ValueError("Скорость и ускорение должны быть положительными")
+        points = np.asarray(plan, dtype=float).reshape(-1, 3)
+        if len(points):
+            keep = np.concatenate([[True], np.any(np.diff(points, axis=0) != 0, axis=1)])
+            points = points[keep]
+        if len(points) < 2:
+            raise ValueError("Для траектории нужны хотя бы две различные точки")
+        self.points = points
+        self.max_speed = max_speed
+        self.max_accel = max_accel
+        delta = np.diff(points, axis=0)
+        self.lengths = np.linalg.norm(delta, axis=1)
+        self.directions = delta / np.maximum(self.lengths, 1e-12)[:, None]
+        self._plan_speeds(junction_deviation)
+        self._plan_segments()
+
+    def _plan_speeds(self, junction_deviation):
+        n = len(self.lengths)
+        limit = np.zeros(n + 1)
+        if n > 1:
+            alignment = np.clip(np.einsum("ij,ij->i", self.directions[:-1], self.directions[1:]), -1.0, 1.0)
+            sin_half = np.sqrt((1.0 + alignment) / 2)
+            corner = np.sqrt(self.max_accel * junction_deviation * sin_half / np.maximum(1.0 - sin_half, 1e-12))
+            limit[1:-1] = np.minimum(corner, self.max_speed)
+        reach = 2 * self.max_accel * self.lengths
+        speeds = limit.tolist()
+        for i in range(n):
+            speeds[i + 1] = min(speeds[i + 1], (speeds[i] ** 2 + reach[i]) ** 0.5)
+        for i in range(n - 1, -1, -1):
+            speeds[i] = min(speeds[i], (speeds[i + 1] ** 2 + reach[i]) ** 0.5)
+        self.junction_speeds = np.array(speeds)
+
+    def _plan_segments(self):
+        a = self.max_accel
+        v0, v1 = self.junction_speeds[:-1], self.junction_speeds[1:]
+        self.start_speeds, self.end_speeds = v0, v1
+        peak = np.minimum(self.max_speed, np.sqrt((2 * a * self.lengths + v0**2 + v1**2) / 2))
+        self.peak_speeds = peak = np.maximum(peak, np.maximum(v0, v1))
+        self.accel_times = (peak - v0) / a
+        self.decel_times = (peak - v1) / a
+        self.accel_lengths = (peak**2 - v0**2) / (2 * a)
+        decel_lengths = (peak**2 - v1**2) / (2 * a)
+        cruise = np.maximum(self.lengths - self.accel_lengths - decel_lengths, 0.0)
+        self.cruise_times = np.divide(cruise, peak, out=np.zeros_like(cruise), where=peak > 0)
+        durations = self.accel_times + self.cruise_times + self.decel_times
+        self.start_times = np.concatenate([[0.0], np.cumsum(durations)])
+
+    @property
+    def duration(self):
+        return float(self.start_times[-1])
+
+    def evaluate(self, times):
+        times = np.clip(np.asarray(times, dtype=float), 0.0, self.duration)
+        segment = np.clip(np.searchsorted(self.start_times, times, "right") - 1, 0, len(self.lengths) - 1)
+        tau = times - self.start_times[segment]
+        a = self.max_accel
+        v0, peak = self.start_speeds[segment], self.peak_speeds[segment]
+        t_acc, t_cruise = self.accel_times[segment], self.cruise_times[segment]
+        t_dec_start = t_acc + t_cruise
+        accel_tau = np.minimum(tau, t_acc)
+        cruise_tau = np.clip(tau - t_acc, 0.0, t_cruise)
+        decel_tau = np.clip(tau - t_dec_start, 0.0, self.decel_times[segment])
+        distance = v0 * accel_tau + a * accel_tau**2 / 2 + peak * cruise_tau + peak * decel_tau - a * decel_tau**2 / 2
+        speed = np.where(tau < t_acc, v0 + a * accel_tau, np.where(tau < t_dec_start, peak, peak - a * decel_tau))
+        distance = np.minimum(distance, self.lengths[segment])
+        direction = self.directions[segment]
+        positions = self.points[segment] + direction * distance[:, None]
+        return positions, direction * speed[:, None]
+
+    def samples(self, rate=TRAJECTORY_RATE, chunk_size=TRAJECTORY_CHUNK):
+        count = int(np.floor(self.duration * rate)) + 1
+        for first in range(0, count, chunk_size):
+            times = np.arange(first, min(count, first + chunk_size)) / rate
+            positions, velocities = self.evaluate(times)
+            yield np.column_stack([times, positions, velocities])
+        if (count - 1) / rate < self.duration:
+            positions, velocities = self.evaluate([self.duration])
+            yield np.column_stack([[self.duration], positions, velocities])
+
+
+def write_trajectory(file_path, trajectory, rate=TRAJECTORY_RATE):
+    row = ",".join(["%.4f"] * len(TRAJECTORY_COLUMNS)) + "\n"
+    with open(file_path, "w") as f:
+        f.write(",".join(TRAJECTORY_COLUMNS) + "\n")
+        for chunk in trajectory.samples(rate):
+            f.write("".join(map(row.__mod__, map(tuple, chunk.tolist()))))
@@ -0,0 +1,160 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .markers import expand_ranges
+
+VISIBILITY_SPACING = 0.1
+VISIBILITY_MIN_MARKERS = 1
+VISIBILITY_CHUNK = 4096
+PARALLEL_MIN_SAMPLES = 20000
+CAMERA_NEAR = 0.05
+
+
+class Camera:
+    def __init__(self, fov=90.0, pitch=90.0, width=320, height=240, min_pixels=20.0, yaw=None):
+        if fov <= 0 or fov >= 180 or width <= 0 or height <= 0 or min_pixels <= 0:
+            raise ValueError("Некорректные параметры камеры")
+        self.fov = fov
+        self.pitch = pitch
+        self.width = width
+        self.height = height
+        self.min_pixels = min_pixels
+        self.yaw = yaw
+
+    @property
+    def focal(self):
+        return self.width / 2 / np.tan(np.radians(self.fov) / 2)
+
+    def detection_range(self, length):
+        return length * self.focal / self.min_pixels + length
+
+    def axes(self, yaws):
+        pitch = np.radians(self.pitch)
+        heading = np.column_stack([np.cos(yaws), np.sin(yaws), np.zeros(len(yaws))])
+        right = np.column_stack([np.sin(yaws), -np.cos(yaws), np.zeros(len(yaws))])
+        forward = heading * np.cos(pitch) - np.array([0.0, 0.0, 1.0]) * np.sin(pitch)
+        return forward, right, np.cross(forward, right)
+
+
+def sample_plan(plan, spacing=VISIBILITY_SPACING):
+    points = np.asarray(plan, dtype=float).reshape(-1, 3)
+    if len(points) < 2:
+        return points, np.zeros(len(points), dtype=np.int64), np.zeros(len(points))
+    delta = np.diff(points, axis=0)
+    lengths = np.linalg.norm(delta, axis=1)
+    counts = np.maximum(np.ceil(lengths / spacing).astype(np.int64), 1)
+    segments = np.repeat(np.arange(len(lengths)), counts)
+    offsets = np.arange(len(segments)) - np.repeat(np.cumsum(counts) - counts, counts)
+    fraction = offsets / counts[segments]
+    positions = np.concatenate([points[segments] + delta[segments] * fraction[:, None], points[-1:]])
+    segments = np.append(segments, len(lengths) - 1)
+    yaws = np.arctan2(delta[:, 1], delta[:, 0])[segments]
+    return positions, segments, yaws
+
+
+def marker_grid(centers, reach):
+    origin = centers.min(axis=0)
+    cells = ((centers - origin) // reach).astype(np.int64) + 1
+    nx, ny = int(cells[:, 0].max()) + 2, int(cells[:, 1].max()) + 2
+    keys = cells[:, 0] * ny + cells[:, 1]
+    order = np.argsort(keys, kind="stable")
+    return origin, reach, nx, ny, order, keys[order]
+
+
+def candidate_pairs(points, grid):
+    origin, reach, nx, ny, order, sorted_keys = grid
+    query = np.floor((points - origin) / reach).astype(np.int64) + 1
+    samples, markers = [], []
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            cx, cy = query[:, 0] + dx, query[:, 1] + dy
+            rows = np.flatnonzero((cx >= 0) & (cx < nx) & (cy >= 0) & (cy < ny))
+            target = cx[rows] * ny + cy[rows]
+            lo = np.searchsorted(sorted_keys, target, "left")
+            counts = np.searchsorted(sorted_keys, target, "right") - lo
+            samples.append(np.repeat(rows, counts))
+            markers.append(order[expand_ranges(lo, counts)])
+    return np.concatenate(samples), np.concatenate(markers)
+
+
+def project(relative, forward, right, down, camera):
+    depth = np.einsum("...j,...j->...", relative, forward)
+    ahead = np.maximum(depth, CAMERA_NEAR)
+    u = camera.focal * np.einsum("...j,...j->...", relative, right) / ahead + camera.width / 2
+    v = camera.focal * np.einsum("...j,...j->...", relative, down) / ahead + camera.height / 2
+    return u, v, (depth > CAMERA_NEAR) & (u >= 0) & (u <= camera.width) & (v >= 0) & (v <= camera.height)
+
+
+def count_visible(positions, yaws, corners, normals, camera, reach, chunk_size=VISIBILITY_CHUNK):
+    counts = np.zeros(len(positions), dtype=np.int64)
+    if not len(corners) or not len(positions):
+        return counts
+    forward, right, down = camera.axes(yaws)
+    centers = corners.mean(axis=1)
+    grid = marker_grid(centers[:, :2], reach)
+    for first in range(0, len(positions), chunk_size):
+        rows = np.arange(first, min(first + chunk_size, len(positions)))
+        sample, marker = candidate_pairs(positions[rows, :2], grid)
+        sample = rows[sample]
+        relative = centers[marker] - positions[sample]
+        facing = np.einsum("pj,pj->p", normals[marker], relative) < 0
+        near = facing & project(relative, forward[sample], right[sample], down[sample], camera)[2]
+        sample, marker = sample[near], marker[near]
+        relative = corners[marker] - positions[sample, None, :]
+        axes = (axis[sample, None, :] for axis in (forward, right, down))
+        u, v, inside = project(relative, *axes, camera)
+        edges = np.hypot(u - np.roll(u, -1, axis=1), v - np.roll(v, -1, axis=1)).min(axis=1)
+        seen = inside.all(axis=1) & (edges >= camera.min_pixels)
+        counts[rows] = np.bincount(sample[seen] - first, minlength=len(rows))
+    return counts
+
+
+def _count_share(positions, yaws, corners, normals, camera, reach):
+    centers = corners.mean(axis=1)[:, :2]
+    low, high = positions[:, :2].min(axis=0) - reach, positions[:, :2].max(axis=0) + reach
+    near = np.flatnonzero(np.all((centers >= low) & (centers <= high), axis=1))
+    return count_visible(positions, yaws, corners[near], normals[near], camera, reach)
+
+
+class VisibilityAnalysis:
+    def __init__(self, plan, markers, camera=None, spacing=VISIBILITY_SPACING, min_markers=VISIBILITY_MIN_MARKERS, workers=None):
+        self.camera = camera or Camera()
+        self.min_markers = min_markers
+        self.positions, self.segments, yaws = sample_plan(plan, spacing)
+        if self.camera.yaw is not None:
+            yaws = np.full(len(yaws), np.radians(self.camera.yaw))
+        self.distances = np.concatenate([[0.0], np.cumsum(np.linalg.norm(np.diff(self.positions, axis=0), axis=1))])
+        self.counts = self._count(markers, yaws, workers)
+
+    def _count(self, markers, yaws, workers):
+        poses = markers.poses
+        corners, normals = poses.corners, poses.normals
+        if not len(corners):
+            return np.zeros(len(self.positions), dtype=np.int64)
+        reach = self.camera.detection_range(float(markers.data["length"].max()))
+        workers = workers or os.cpu_count() or 1
+        if workers > 1 and len(self.positions) >= PARALLEL_MIN_SAMPLES:
+            try:
+                with ProcessPoolExecutor(workers) as pool:
+                    parts = [
+                        pool.submit(_count_share, self.positions[rows], yaws[rows], corners, normals, self.camera, reach)
+                        for rows in np.array_split(np.arange(len(self.positions)), workers)
+                    ]
+                    return np.concatenate([part.result() for part in parts])
+            except (OSError, RuntimeError):
+                pass
+        return count_visible(self.positions, yaws, corners, normals, self.camera, reach)
+
+    @property
+    def quality(self):
+        return np.minimum(self.counts / max(self.min_markers, 1), 1.0)
+
+    def weak_spans(self):
+        weak = np.concatenate([[False], self.counts < self.min_markers, [False]])
+        edges = np.flatnonzero(np.diff(weak.astype(np.int8)))
+        return [
+            (int(self.segments[first]), int(self.segments[last - 1]), float(self.distances[first]), float(self.distances[last - 1]))
+            for first, last in zip(edges[::2], edges[1::2])
+        ]
@@ -0,0 +1,136 @@
+import tkinter as tk
+from tkinter import font as tkfont
+from tkinter import ttk
+
+
+def format_waypoint(point):
+    return f"({point[0]:.2f}, {point[1]:.2f}, {point[2]:.2f})"
+
+
+class PlanListView(ttk.Frame):
+    def __init__(self, master, items, formatter=format_waypoint, width=30, height=20):
+        super().__init__(master)
+        self.items = items
+        self.formatter = formatter
+        self.top = 0
+        self.rows = height
+        self.selected = None
+        self.listbox = tk.Listbox(self, width=width, height=height, exportselection=False, activestyle="none")
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.on_scroll)
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.line_height = tkfont.Font(font=self.listbox.cget("font")).metrics("linespace") + 1
+        self.listbox.bind("<<ListboxSelect>>", self.on_select)
+        self.listbox.bind("<Configure>", self.on_resize)
+        self.listbox.bind("<MouseWheel>", lambda e: self.scroll_to(self.top - e.delta // 120 * 3))
+        self.listbox.bind("<Button-4>", lambda e: self.scroll_to(self.top - 3))
+        self.listbox.bind("<Button-5>", lambda e: self.scroll_to(self.top + 3))
+        self.listbox.bind("<Up>", lambda e: self.move_selection(-1))
+        self.listbox.bind("<Down>", lambda e: self.move_selection(1))
+        self.render()
+
+    def curselection(self):
+        if self.selected is None or self.selected >= len(self.items):
+            return ()
+        return (self.selected,)
+
+    def reset(self, items=None):
+        if items is not None:
+            self.items = items
+        if self.selected is not None and self.selected >= len(self.items):
+            self.selected = None
+        self.render()
+
+    def inserted(self, index, count=1):
+        if self.selected is not None and self.selected >= index:
+            self.selected += count
+        if index < self.top:
+            self.top += count
+        elif index < self.top + self.rows:
+            offset = index - self.top
+            shown = min(count, self.rows - offset)
+            self.listbox.insert(offset, *(self.formatter(self.items[i]) for i in range(index, index + shown)))
+            self.listbox.delete(self.rows, tk.END)
+            self.show_selection()
+        self.update_scrollbar()
+
+    def removed(self, index, count=1):
+        if self.selected is not None:
+            if self.selected >= index + count:
+                self.selected -= count
+            elif self.selected >= index:
+                self.selected = None
+        if index + count <= self.top:
+            self.top -= count
+        elif index < self.top + self.rows:
+            self.top = min(self.top, index)
+            self.render()
+            return
+        self.update_scrollbar()
+
+    def changed(self, index):
+        if self.top <= index < self.top + self.rows:
+            self.listbox.delete(index - self.top)
+            self.listbox.insert(index - self.top, self.formatter(self.items[index]))
+            self.show_selection()
+
+    def render(self):
+        self.top = max(0, min(self.top, len(self.items) - self.rows))
+        end = min(len(self.items), self.top + self.rows)
+        self.listbox.delete(0, tk.END)
+        if end > self.top:
+            self.listbox.insert(tk.END, *(self.formatter(self.items[i]) for i in range(self.top, end)))
+        self.show_selection()
+        self.update_scrollbar()
+
+    def show_selection(self):
+        self.listbox.selection_clear(0, tk.END)
+        if self.selected is not None and self.top <= self.selected < self.top + self.rows:
+            self.listbox.selection_set(self.selected - self.top)
+
+    def update_scrollbar(self):
+        total = len(self.items)
+        if total <= self.rows:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.top / total, min(1.0, (self.top + self.rows) / total))
+
+    def scroll_to(self, top):
+        top = max(0, min(top, len(self.items) - self.rows))
+        if top != self.top:
+            self.top = top
+            self.render()
+        return "break"
+
+    def see(self, index):
+        if index < self.top:
+            self.scroll_to(index)
+        elif index >= self.top + self.rows:
+            self.scroll_to(index - self.rows + 1)
+
+    def on_scroll(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(int(float(amount) * len(self.items)))
+        elif action == "scroll":
+            step = self.rows if unit == "pages" else 1
+            self.scroll_to(self.top + int(amount) * step)
+
+    def on_select(self, event):
+        selection = self.listbox.curselection()
+        if selection:
+            self.selected = self.top + selection[0]
+
+    def on_resize(self, event):
+        rows = max(1, event.height // self.line_height)
+        if rows != self.rows:
+            self.rows = rows
+            self.render()
+
+    def move_selection(self, step):
+        if not self.items:
+            return "break"
+        current = self.selected if self.selected is not None else self.top - step
+        self.selected = max(0, min(len(self.items) - 1, current + step))
+        self.see(self.selected)
+        self.show_selection()
+        return "break"
@@ -0,0 +1,307 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from aruco_planner import (  # noqa: E402
+    MARKER_DTYPE,
+    OBSTACLE_TYPES,
+    ClearanceGrid,
+    CollisionChecker,
+    MarkerStore,
+    ObstacleIndex,
+    drag_obstacle,
+    new_obstacle,
+    read_marker_map,
+    read_plan,
+    read_project,
+    sync_obstacles,
+    write_marker_map,
+    write_plan,
+    write_project,
+)
+from aruco_planner.rendering import (  # noqa: E402
+    marker_artists,
+    marker_scale,
+    obstacle_artists,
+    pick_target,
+    set_marker_view,
+)
+
+DEFAULT_SIZES = (1000, 10000, 100000, 1000000)
+
+
+def synthetic_markers(count, seed=0):
+    rng = np.random.default_rng(seed)
+    side = int(np.ceil(np.sqrt(count)))
+    data = np.zeros(count, dtype=MARKER_DTYPE)
+    data["id"] = np.arange(count)
+    data["length"] = 0.33
+    data["x"] = np.arange(count) // side + rng.uniform(-0.1, 0.1, count)
+    data["y"] = np.arange(count) % side + rng.uniform(-0.1, 0.1, count)
+    return MarkerStore(data)
+
+
+def synthetic_obstacles(markers, count, seed=0):
+    rng = np.random.default_rng(seed)
+    data = markers.data
+    x0, x1, y0, y1 = data["x"].min(), data["x"].max(), data["y"].min(), data["y"].max()
+    return [
+        new_obstacle(OBSTACLE_TYPES[i % len(OBSTACLE_TYPES)], float(rng.uniform(x0, x1)), float(rng.uniform(y0, y1)))
+        for i in range(count)
+    ]
+
+
+def synthetic_plan(markers, count, seed=0):
+    rng = np.random.default_rng(seed)
+    data = markers.data[rng.integers(len(markers), size=count)]
+    return list(zip(data["x"].tolist(), data["y"].tolist(), rng.uniform(0.5, 2.0, count).round(2).tolist()))
+
+
+def new_axes():
+    figure = Figure(figsize=(10, 8))
+    FigureCanvasAgg(figure)
+    ax = figure.add_subplot()
+    ax.set_aspect("equal")
+    return figure, ax
+
+
+def set_view(ax, markers, quads, labels, x0, x1, y0, y1):
+    ax.set_xlim(x0, x1)
+    ax.set_ylim(y0, y1)
+    set_marker_view(markers, quads, labels, (x0, x1), (y0, y1), ax.bbox.width, *marker_scale(markers))
+
+
+def bench_load_map(ctx):
+    path = os.path.join(ctx["workdir"], "map.txt")
+    write_marker_map(path, ctx["markers"])
+    return lambda: read_marker_map(path)
+
+
+def bench_draw_markers(ctx):
+    markers = ctx["markers"]
+
+    def run():
+        figure, ax = new_axes()
+        data = markers.data
+        quads, labels = marker_artists(markers)
+        ax.add_artist(quads)
+        ax.add_artist(labels)
+        x0, x1, y0, y1 = data["x"].min() - 1, data["x"].max() + 1, data["y"].min() - 1, data["y"].max() + 1
+        set_view(ax, markers, quads, labels, x0, x1, y0, y1)
+        figure.canvas.draw()
+        set_view(ax, markers, quads, labels, x0, x0 + 15, y0, y0 + 12)
+        figure.canvas.draw()
+
+    return run
+
+
+def bench_draw_obstacles(ctx):
+    obstacles = ctx["obstacles"]
+
+    def run():
+        figure, ax = new_axes()
+        sync_obstacles(obstacles, ObstacleIndex(), ClearanceGrid())
+        for obstacle in obstacles:
+            patch, _ = obstacle_artists(obstacle)
+            ax.add_patch(patch)
+        CollisionChecker().update(ctx["plan"], obstacles)
+        ax.relim()
+        ax.autoscale_view()
+        figure.canvas.draw()
+
+    return run
+
+
+def bench_click(ctx):
+    markers, index = ctx["markers"], ObstacleIndex(ctx["obstacles"])
+    data = markers.data
+    rng = np.random.default_rng(1)
+    clicks = np.column_stack([
+        rng.uniform(data["x"].min(), data["x"].max(), ctx["clicks"]),
+        rng.uniform(data["y"].min(), data["y"].max(), ctx["clicks"]),
+    ])
+
+    def run():
+        for x, y in clicks:
+            pick_target(index, markers, x, y)
+
+    return run
+
+
+def bench_drag(ctx):
+    obstacles = [dict(obstacle) for obstacle in ctx["obstacles"]]
+    plan = ctx["plan"]
+    checker = CollisionChecker()
+    checker.update(plan, obstacles)
+    index, clearance = ObstacleIndex(), ClearanceGrid()
+    sync_obstacles(obstacles, index, clearance)
+    x, y = obstacles[0]["position"]
+    path = np.column_stack([x + np.linspace(0, 5, ctx["drag_steps"]), y + np.sin(np.linspace(0, 3, ctx["drag_steps"]))])
+
+    def run():
+        obstacle = obstacles[0]
+        pick_target(index, None, *obstacle["position"])
+        for px, py in path:
+            drag_obstacle(obstacle, None, px, py)
+            clearance.update(obstacles)
+        sync_obstacles(obstacles, index, clearance)
+        checker.update(plan, obstacles)
+        obstacle["position"] = (x, y)
+        sync_obstacles(obstacles, index, clearance)
+
+    return run
+
+
+def bench_load_plan(ctx):
+    path = os.path.join(ctx["workdir"], "plan.txt")
+    write_plan(path, ctx["plan"])
+    return lambda: read_plan(path, ctx["markers"])
+
+
+def bench_save_project(ctx):
+    json_path = os.path.join(ctx["workdir"], "save.aproject")
+    binary_path = os.path.join(ctx["workdir"], "save_binary.aproject")
+
+    def run():
+        write_project(json_path, ctx["markers"], ctx["obstacles"], ctx["plan"])
+        write_project(binary_path, ctx["markers"], ctx["obstacles"], ctx["plan"], binary=True)
+
+    return run
+
+
+def bench_load_project(ctx):
+    json_path = os.path.join(ctx["workdir"], "load.aproject")
+    binary_path = os.path.join(ctx["workdir"], "load_binary.aproject")
+    write_project(json_path, ctx["markers"], ctx["obstacles"], ctx["plan"])
+    write_project(binary_path, ctx["markers"], ctx["obstacles"], ctx["plan"], binary=True)
+
+    def run():
+        len(read_project(json_path)["markers"])
+        len(read_project(binary_path)["markers"])
+
+    return run
+
+
+BENCHMARKS = {
+    "load_map": bench_load_map,
+    "draw_markers": bench_draw_markers,
+    "draw_obstacles": bench_draw_obstacles,
+    "click": bench_click,
+    "drag": bench_drag,
+    "load_plan": bench_load_plan,
+    "save_project": bench_save_project,
+    "load_project": bench_load_project,
+}
+RENDER_BENCHMARKS = ("draw_markers",)
+
+
+def measure(run, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"best": min(timings), "mean": sum(timings) / len(timings), "peak_bytes": peak}
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(args):
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in args.sizes:
+            markers = synthetic_markers(size)
+            ctx = {
+                "workdir": workdir,
+                "markers": markers,
+                "obstacles": synthetic_obstacles(markers, args.obstacles),
+                "plan": synthetic_plan(markers, min(size, args.plan_points)),
+                "clicks": args.clicks,
+                "drag_steps": args.drag_steps,
+            }
+            for name in args.benchmarks:
+                if name in RENDER_BENCHMARKS and size > args.max_render_markers:
+                    continue
+                result = measure(BENCHMARKS[name](ctx), args.repeat)
+                result.update(benchmark=name, markers=size)
+                results.append(result)
+                print(f"{name:16s} {size:>9d}  {result['best']:9.4f} с  {result['peak_bytes'] / 2**20:9.1f} МБ", flush=True)
+    return results
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {(r["benchmark"], r["markers"]): r for r in json.load(f)["results"]}
+    for result in results:
+        old = baseline.get((result["benchmark"], result["markers"]))
+        if old:
+            print(f"{result['benchmark']:16s} {result['markers']:>9d}  x{old['best'] / result['best']:.2f}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Замеры производительности планировщика (без GUI, Agg)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="Размеры карт")
+    parser.add_argument("--benchmarks", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument("--repeat", type=int, default=3, help="Число повторов")
+    parser.add_argument("--obstacles", type=int, default=200, help="Число препятствий")
+    parser.add_argument("--plan-points", type=int, default=10000, help="Максимальная длина плана")
+    parser.add_argument("--clicks", type=int, default=1000, help="Число щелчков по карте")
+    parser.add_argument("--drag-steps", type=int, default=500, help="Число шагов перетаскивания")
+    parser.add_argument("--max-render-markers", type=int, default=100000, help="Предел карты для отрисовки")
+    parser.add_argument("-o", "--output", help="JSON-файл с результатами")
+    parser.add_argument("--baseline", help="JSON-файл прошлого запуска для сравнения")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    commit = current_commit()
+    results = run_suite(args)
+    report = {
+        "commit": commit,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "matplotlib": matplotlib.__version__,
+        "platform": platform.platform(),
+        "results": results,
+    }
+    output = args.output or f"benchmark-{(commit or 'unknown')[:8]}.json"
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Результаты: {output}")
+    if args.baseline:
+        compare(results, args.baseline)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from aruco_planner import OBSTACLE_TYPES, new_obstacle, obstacle_arrays
+
+
+@pytest.fixture(params=range(10))
+def rng(request):
+    return np.random.default_rng(request.param)
+
+
+@pytest.fixture
+def random_obstacle(rng):
+    def make(low=0.0, high=6.0):
+        x, y = rng.uniform(low, high, 2).tolist()
+        return new_obstacle(OBSTACLE_TYPES[rng.integers(len(OBSTACLE_TYPES))], x, y)
+
+    return make
+
+
+@pytest.fixture
+def sampled_clearance():
+    def measure(starts, ends, obstacles, samples=2001):
+        centers, half, radius = obstacle_arrays(obstacles)
+        t = np.linspace(0.0, 1.0, samples)[:, None]
+        clearance = np.empty((len(starts), len(obstacles)))
+        for s, (p0, p1) in enumerate(zip(np.asarray(starts, dtype=float), np.asarray(ends, dtype=float))):
+            path = p0 + (p1 - p0) * t
+            for m in range(len(obstacles)):
+                outside = np.maximum(np.abs(path - centers[m]) - half[m], 0.0)
+                clearance[s, m] = np.hypot(outside[:, 0], outside[:, 1]).min() - radius[m]
+        return clearance
+
+    return measure
+
+
+@pytest.fixture
+def edit_list(rng):
+    def edit(items, factory):
+        action = rng.integers(3) if len(items) > 1 else 0
+        if action == 0:
+            items.insert(int(rng.integers(len(items) + 1)), factory())
+        elif action == 1:
+            items[int(rng.integers(len(items)))] = factory()
+        else:
+            del items[int(rng.integers(len(items)))]
+
+    return edit
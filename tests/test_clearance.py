@@ -0,0 +1,45 @@
+import numpy as np
+
+from aruco_planner import ClearanceGrid, drag_obstacle, new_obstacle, obstacle_arrays
+
+
+def brute_field(grid, obstacles):
+    ny, nx = grid.field.shape
+    xs = grid.origin[0] + (np.arange(nx) + 0.5) * grid.cell
+    ys = grid.origin[1] + (np.arange(ny) + 0.5) * grid.cell
+    px, py = np.meshgrid(xs, ys)
+    field = np.full((ny, nx), grid.truncation)
+    centers, half, radius = obstacle_arrays(obstacles)
+    for center, extent, r in zip(centers, half, radius):
+        dx = np.abs(px - center[0]) - extent[0]
+        dy = np.abs(py - center[1]) - extent[1]
+        distance = np.hypot(np.maximum(dx, 0.0), np.maximum(dy, 0.0)) + np.minimum(np.maximum(dx, dy), 0.0) - r
+        field = np.minimum(field, distance)
+    return np.maximum(field, -grid.truncation)
+
+
+def test_window_updates_match_brute_force(rng, random_obstacle):
+    obstacles = [random_obstacle(0.0, 8.0) for _ in range(6)]
+    grid = ClearanceGrid(resolution=0.1, truncation=1.0, padding=1.0)
+    grid.update(obstacles)
+    for _ in range(30):
+        action = rng.integers(4)
+        if action == 0 or len(obstacles) < 2:
+            obstacles.insert(int(rng.integers(len(obstacles) + 1)), random_obstacle(0.0, 8.0))
+        elif action == 1:
+            del obstacles[int(rng.integers(len(obstacles)))]
+        else:
+            obstacle = obstacles[int(rng.integers(len(obstacles)))]
+            x, y = obstacle["position"]
+            drag_obstacle(obstacle, None, x + float(rng.normal(0, 0.5)), y + float(rng.normal(0, 0.5)))
+        grid.update(obstacles)
+        np.testing.assert_allclose(grid.field, brute_field(grid, obstacles), atol=1e-5)
+
+
+def test_unchanged_obstacles_skip_update():
+    obstacles = [new_obstacle("куб", 1.0, 1.0)]
+    grid = ClearanceGrid()
+    assert grid.update(obstacles)
+    assert not grid.update([dict(obstacle) for obstacle in obstacles])
+    assert grid.update([])
+    assert np.all(grid.field == grid.truncation)
@@ -0,0 +1,41 @@
+import numpy as np
+
+from aruco_planner import CollisionChecker, check_plan, obstacle_arrays, segment_clearance
+
+MARGIN = 0.1
+
+
+def test_segment_clearance_matches_sampling(rng, random_obstacle, sampled_clearance):
+    starts, ends = rng.uniform(0, 6, (2, 20, 2))
+    ends[:3] = starts[:3]
+    obstacles = [random_obstacle() for _ in range(8)]
+    expected = sampled_clearance(starts, ends, obstacles)
+    found = segment_clearance(starts, ends, *obstacle_arrays(obstacles))
+    np.testing.assert_allclose(np.maximum(found, 0.0), np.maximum(expected, 0.0), atol=0.005)
+
+
+def test_check_plan_matches_sampling(rng, random_obstacle, sampled_clearance):
+    flight_plan = [tuple(rng.uniform(0, 6, 2).tolist()) + (1.0,) for _ in range(rng.integers(1, 12))]
+    obstacles = [random_obstacle() for _ in range(rng.integers(0, 12))]
+    points = np.array([point[:2] for point in flight_plan]).reshape(-1, 2)
+    if len(points) == 1:
+        points = np.concatenate([points, points])
+    clearance = sampled_clearance(points[:-1], points[1:], obstacles)
+    found = set(check_plan(flight_plan, obstacles, MARGIN))
+    for s, m in np.argwhere(np.abs(clearance - MARGIN) > 0.005).tolist():
+        assert ((s, m) in found) == (clearance[s, m] < MARGIN)
+
+
+def test_incremental_update_matches_full_check(rng, random_obstacle, edit_list):
+    def random_point():
+        return tuple(rng.uniform(0, 6, 2).tolist()) + (1.0,)
+
+    flight_plan = [random_point() for _ in range(8)]
+    obstacles = [random_obstacle() for _ in range(8)]
+    checker = CollisionChecker(MARGIN)
+    for _ in range(40):
+        if rng.integers(2):
+            edit_list(flight_plan, random_point)
+        else:
+            edit_list(obstacles, random_obstacle)
+        assert checker.update(flight_plan, obstacles) == check_plan(flight_plan, obstacles, MARGIN)
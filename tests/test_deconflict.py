@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from aruco_planner import find_conflicts, new_plan, plan_times, resolve_conflicts
+
+SEPARATION = 1.0
+TIME_STEP = 0.002
+
+
+def random_plan(rng, index, parked=False):
+    points = [tuple(rng.uniform(0, 5, 2).tolist()) + (1.0,) for _ in range(rng.integers(1, 5))]
+    if parked:
+        points = [(4.0 * index, -8.0, 1.0)] + points + [(4.0 * index, 14.0, 1.0)]
+    return new_plan(f"plan {index}", points, speed=float(rng.uniform(0.5, 2.0)), delay=float(rng.uniform(0, 3)))
+
+
+def sampled_distances(plans, delays):
+    times = [plan_times(plan["points"], plan["speed"], delay) for plan, delay in zip(plans, delays)]
+    t = np.arange(0.0, max(time[-1] for time in times) + 1.0, TIME_STEP)
+    tracks = [
+        np.column_stack([np.interp(t, time, np.asarray(plan["points"])[:, axis]) for axis in range(3)])
+        for plan, time in zip(plans, times)
+    ]
+    return {
+        (i, j): float(np.linalg.norm(tracks[i] - tracks[j], axis=1).min())
+        for i in range(len(plans))
+        for j in range(i + 1, len(plans))
+    }
+
+
+@pytest.mark.parametrize("parked", [False, True])
+def test_find_conflicts_matches_sampling(rng, parked):
+    plans = [random_plan(rng, i, parked) for i in range(3)]
+    found = {(i, j) for i, j, *_ in find_conflicts(plans, SEPARATION, workers=1)}
+    for pair, distance in sampled_distances(plans, [plan["delay"] for plan in plans]).items():
+        if distance < SEPARATION - 0.01:
+            assert pair in found
+        elif distance > SEPARATION + 0.01:
+            assert pair not in found
+
+
+def test_resolve_conflicts_matches_sampling(rng):
+    plans = [random_plan(rng, i, parked=True) for i in range(3)]
+    delays = resolve_conflicts(plans, SEPARATION, step=0.5)
+    assert delays[0] == plans[0]["delay"]
+    assert all(delay >= plan["delay"] for plan, delay in zip(plans, delays))
+    distances = sampled_distances(plans, delays)
+    assert min(distances.values()) > SEPARATION - 0.01
+    for k in range(1, len(plans)):
+        if delays[k] > plans[k]["delay"]:
+            earlier = delays[: k] + [delays[k] - 0.5]
+            distances = sampled_distances(plans[: k + 1], earlier)
+            assert min(distances[(i, k)] for i in range(k)) < SEPARATION + 0.01
+
+
+def test_waiting_drone_conflicts_before_its_start():
+    plans = [new_plan("a", [(0.0, 0.0, 1.0), (4.0, 0.0, 1.0)]), new_plan("b", [(2.0, 0.0, 1.0), (2.0, 4.0, 1.0)], delay=10.0)]
+    conflicts = find_conflicts(plans, SEPARATION, workers=1)
+    assert conflicts and all(second == -1 for _, _, _, second, *_ in conflicts)
+
+
+def test_resolve_conflicts_gives_up_after_max_shift():
+    plans = [new_plan("a", [(0.0, 0.0, 1.0)]), new_plan("b", [(0.0, 0.0, 1.0), (1.0, 0.0, 1.0)])]
+    with pytest.raises(ValueError, match="«b»"):
+        resolve_conflicts(plans, max_shift=5.0)
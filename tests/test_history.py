@@ -0,0 +1,49 @@
+from aruco_planner import History
+
+
+def test_undo_redo_matches_snapshots(rng):
+    history = History()
+    values = []
+
+    def set_value(index, old, new):
+        if old is None:
+            values.insert(index, new)
+        elif new is None:
+            del values[index]
+        else:
+            values[index] = new
+        history.record(lambda: set_value(index, new, old), lambda: set_value(index, old, new))
+
+    snapshots, position = [[]], 0
+    for step in range(200):
+        action = rng.integers(4)
+        if action == 0:
+            assert history.undo() == (position > 0)
+            position = max(position - 1, 0)
+        elif action == 1:
+            assert history.redo() == (position < len(snapshots) - 1)
+            position = min(position + 1, len(snapshots) - 1)
+        else:
+            index = int(rng.integers(len(values) + 1))
+            if index < len(values) and rng.integers(2):
+                set_value(index, values[index], None)
+            elif index < len(values):
+                set_value(index, values[index], step)
+            else:
+                set_value(index, None, step)
+            snapshots = snapshots[: position + 1] + [list(values)]
+            position += 1
+        assert values == snapshots[position]
+
+
+def test_limit_drops_oldest_steps():
+    history = History(limit=3)
+    log = []
+    for i in range(5):
+        history.record(lambda i=i: log.append(-i), lambda i=i: log.append(i))
+    while history.undo():
+        pass
+    assert log == [-4, -3, -2]
+    history.redo()
+    history.record(lambda: None, lambda: None)
+    assert not history.redo()
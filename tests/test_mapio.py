@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+
+from aruco_planner import MARKER_DTYPE, LoadCancelled, MarkerStore, mapio, read_marker_map, write_marker_map
+
+KINDS = ["row", "comment", "blank", "indented", "count", "token", "duplicate", "length", "float_id", "huge_id", "tail"]
+VALID_WEIGHTS = [0.7, 0.1, 0.1, 0.1, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0]
+BROKEN_WEIGHTS = [0.69, 0.08, 0.08, 0.08, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01]
+
+
+def random_map(rng, count, broken):
+    lines = []
+    for _ in range(count):
+        kind = rng.choice(KINDS, p=BROKEN_WEIGHTS if broken else VALID_WEIGHTS)
+        marker_id = {"duplicate": "0", "float_id": f"{len(lines)}.0", "huge_id": str(2**63 + len(lines))}.get(kind, str(len(lines)))
+        values = [0.33 if kind != "length" else -0.33] + rng.uniform(-10, 10, 6).round(3).tolist()
+        row = " ".join([marker_id] + [repr(value) for value in values])
+        if kind == "comment":
+            row = "# " + row
+        elif kind == "blank":
+            row = "   "
+        elif kind == "indented":
+            row = "\t " + row
+        elif kind == "count":
+            row = row + " 1.0"
+        elif kind == "token":
+            row = row.replace(" ", " x", 1)
+        elif kind == "tail":
+            row = row + " # note"
+        lines.append(row)
+    return lines
+
+
+def reference_map(lines):
+    rows, errors, seen = [], [], set()
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        parts = line.split()
+        if len(parts) != 8:
+            errors.append(number)
+            continue
+        try:
+            row = (int(parts[0]), *map(float, parts[1:]))
+            if not -(2**63) <= row[0] < 2**63:
+                raise ValueError(parts[0])
+        except ValueError:
+            errors.append(number)
+            continue
+        if row[0] in seen or row[1] <= 0:
+            errors.append(number)
+        seen.add(row[0])
+        rows.append(row)
+    return rows, errors
+
+
+@pytest.mark.parametrize("broken", [False, True])
+def test_read_marker_map_matches_line_parser(rng, tmp_path, monkeypatch, broken):
+    monkeypatch.setattr(mapio, "MAP_CHUNK_BYTES", 256)
+    lines = random_map(rng, 300, broken)
+    path = tmp_path / "map.txt"
+    path.write_text("\n".join(lines) + rng.choice(["", "\n"]))
+    rows, errors = reference_map(lines)
+    if errors:
+        with pytest.raises(ValueError, match=rf"^Строка {errors[0]}:"):
+            read_marker_map(str(path))
+        return
+    store = read_marker_map(str(path))
+    assert store.data.tolist() == np.array(rows, dtype=MARKER_DTYPE).tolist()
+
+
+def test_read_marker_map_reports_progress_and_cancels(tmp_path, monkeypatch):
+    monkeypatch.setattr(mapio, "MAP_CHUNK_BYTES", 64)
+    path = tmp_path / "map.txt"
+    path.write_text("".join(f"{i} 0.33 {i} 0 0 0 0 0\n" for i in range(50)))
+    fractions = []
+    assert len(read_marker_map(str(path), progress=fractions.append)) == 50
+    assert fractions == sorted(fractions) and fractions[-1] == 1.0
+
+    class Cancel:
+        def is_set(self):
+            return True
+
+    with pytest.raises(LoadCancelled):
+        read_marker_map(str(path), cancel=Cancel())
+
+
+def test_empty_map(tmp_path):
+    path = tmp_path / "map.txt"
+    path.write_text("")
+    assert len(read_marker_map(str(path))) == 0
+
+
+def test_write_marker_map_round_trip(rng, tmp_path):
+    data = np.zeros(50, dtype=MARKER_DTYPE)
+    data["id"] = rng.permutation(1000)[:50]
+    for name in MARKER_DTYPE.names[1:]:
+        data[name] = rng.uniform(0.1, 10, 50)
+    path = tmp_path / "map.txt"
+    write_marker_map(str(path), MarkerStore(data))
+    assert read_marker_map(str(path)).data.tolist() == data.tolist()
@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+
+from aruco_planner import MARKER_DTYPE, MarkerStore
+
+
+def random_data(rng, count):
+    data = np.zeros(count, dtype=MARKER_DTYPE)
+    data["id"] = rng.permutation(count)
+    data["length"] = 0.33
+    data["x"] = rng.uniform(-5, 5, count)
+    data["y"] = rng.uniform(-3, 3, count)
+    return data
+
+
+def random_marker(rng, marker_id):
+    return {
+        "id": marker_id,
+        "length": 0.33,
+        "x": float(rng.uniform(-7, 7)),
+        "y": float(rng.uniform(-5, 5)),
+        "z": 0.0,
+        "rot_z": 0.0,
+        "rot_y": 0.0,
+        "rot_x": 0.0,
+    }
+
+
+def edit_store(rng, store, next_id):
+    action = rng.integers(3) if len(store) else 0
+    if action == 0:
+        store.append(random_marker(rng, next_id))
+    elif action == 1:
+        index = int(rng.integers(len(store)))
+        store[index] = random_marker(rng, store[index]["id"])
+    else:
+        del store[int(rng.integers(len(store)))]
+
+
+def check_queries(rng, store):
+    x, y = store.data["x"], store.data["y"]
+    for _ in range(20):
+        qx, qy = rng.uniform(-8, 8), rng.uniform(-6, 6)
+        width, height = rng.uniform(0, 6, 2)
+        found = store.query_rect(qx, qy, qx + width, qy + height)
+        expected = np.flatnonzero((x >= qx) & (x <= qx + width) & (y >= qy) & (y <= qy + height))
+        assert sorted(found.tolist()) == expected.tolist()
+        radius = rng.uniform(0, 3)
+        dist = np.hypot(x - qx, y - qy)
+        assert sorted(store.query_radius(qx, qy, radius).tolist()) == np.flatnonzero(dist <= radius).tolist()
+        index = store.nearest(qx, qy, radius)
+        if index is None:
+            assert not np.any(dist <= radius)
+        else:
+            assert dist[index] == dist.min()
+    qx, qy = rng.uniform(-8, 8, 50), rng.uniform(-6, 6, 50)
+    dist = np.hypot(x[None, :] - qx[:, None], y[None, :] - qy[:, None])
+    found = store.nearest_many(qx, qy, 1.0)
+    expected = np.where((dist <= 1.0).any(axis=1), dist.argmin(axis=1), -1)
+    assert found.tolist() == expected.tolist()
+
+
+def test_grid_queries_match_brute_force(rng):
+    check_queries(rng, MarkerStore(random_data(rng, int(rng.integers(1, 300)))))
+
+
+@pytest.mark.parametrize("count", [1, 20])
+def test_colocated_markers_match_brute_force(rng, count):
+    data = random_data(rng, count)
+    data["x"], data["y"] = data["x"][0], data["y"][0]
+    check_queries(rng, MarkerStore(data))
+
+
+def test_pending_edits_match_brute_force(rng):
+    store = MarkerStore(random_data(rng, 200))
+    for step in range(80):
+        edit_store(rng, store, 200 + step)
+        if step % 5 == 0:
+            check_queries(rng, store)
+    ids = store.data["id"]
+    for position in rng.integers(len(store), size=20):
+        assert store.index_of(ids[position]) == position
+
+
+def test_pending_list_tracks_moves(rng):
+    store = MarkerStore(random_data(rng, 100))
+    store[5] = dict(store[5], x=20.0, y=20.0)
+    assert store._pending == [5]
+    del store[2]
+    assert store._pending == [4]
+    store.append(random_marker(rng, 1000))
+    assert store._pending == [4, 99]
+    assert store.nearest(20.0, 20.0, 0.01) == 4
+    assert store.query_rect(19, 19, 21, 21).tolist() == [4]
+
+
+def test_pairs_within_match_brute_force(rng):
+    store = MarkerStore(random_data(rng, int(rng.integers(0, 150))))
+    radius = rng.uniform(0.1, 2.0)
+    x, y = store.data["x"], store.data["y"]
+    dist = np.hypot(x[:, None] - x[None, :], y[:, None] - y[None, :])
+    first, second = store.pairs_within(radius)
+    found = sorted(tuple(sorted(pair)) for pair in zip(first.tolist(), second.tolist()))
+    assert found == [tuple(pair) for pair in np.argwhere(np.triu(dist <= radius, 1)).tolist()]
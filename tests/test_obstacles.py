@@ -0,0 +1,49 @@
+import numpy as np
+
+from aruco_planner import HANDLE_RADIUS, ObstacleIndex, drag_obstacle, obstacle_shape
+
+
+def contains(obstacle, x, y):
+    shape, _ = obstacle_shape(obstacle)
+    if obstacle["type"] == "флаг":
+        return np.hypot(x - shape[0], y - shape[1]) <= shape[2]
+    x0, y0, width, height = shape
+    return x0 <= x <= x0 + width and y0 <= y <= y0 + height
+
+
+def nearest_handle(obstacle, x, y):
+    _, handles = obstacle_shape(obstacle)
+    dist = [np.hypot(x - hx, y - hy) for hx, hy in handles]
+    best = int(np.argmin(dist))
+    return best if dist[best] <= HANDLE_RADIUS else None
+
+
+def brute_hit(obstacles, x, y, selected):
+    if selected is not None:
+        handle = nearest_handle(obstacles[selected], x, y)
+        if handle is not None:
+            return selected, handle
+    inside = [i for i, obstacle in enumerate(obstacles) if contains(obstacle, x, y)]
+    if not inside:
+        return None
+    return inside[-1], nearest_handle(obstacles[inside[-1]], x, y)
+
+
+def test_hit_matches_brute_force(rng, random_obstacle):
+    obstacles = [random_obstacle() for _ in range(rng.integers(0, 25))]
+    for obstacle in obstacles:
+        if rng.integers(2):
+            x, y = obstacle["position"]
+            drag_obstacle(obstacle, int(rng.integers(2)), x + rng.uniform(-1, 1), y + rng.uniform(-1, 1))
+    index = ObstacleIndex(obstacles)
+    for x, y in rng.uniform(-1, 7, (300, 2)).tolist():
+        selected = int(rng.integers(len(obstacles))) if obstacles and rng.integers(2) else None
+        assert index.hit(x, y, selected) == brute_hit(obstacles, x, y, selected)
+
+
+def test_handles_are_hit_exactly(rng, random_obstacle):
+    obstacles = [random_obstacle() for _ in range(5)]
+    index = ObstacleIndex(obstacles)
+    for idx, obstacle in enumerate(obstacles):
+        for handle, (x, y) in enumerate(obstacle_shape(obstacle)[1]):
+            assert index.hit(x, y, idx) == (idx, handle)
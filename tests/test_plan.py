@@ -0,0 +1,134 @@
+import json
+import re
+
+import numpy as np
+import pytest
+
+from aruco_planner import (
+    MARKER_DTYPE,
+    PLAN_MATCH_TOLERANCE,
+    PLAN_WRITERS,
+    MarkerStore,
+    plan,
+    plan_format,
+    read_plan,
+    read_plan_points,
+    write_plan,
+)
+
+
+def random_markers(rng, count):
+    data = np.zeros(count, dtype=MARKER_DTYPE)
+    data["id"] = np.arange(count)
+    data["length"] = 0.33
+    data["x"] = rng.uniform(-20, 20, count).round(2)
+    data["y"] = rng.uniform(-20, 20, count).round(2)
+    return MarkerStore(data)
+
+
+def random_plan(rng, markers, count):
+    data = markers.data[rng.integers(len(markers), size=count)]
+    return list(zip(data["x"].tolist(), data["y"].tolist(), rng.uniform(0.5, 2.0, count).round(2).tolist()))
+
+
+def format_number(rng, value):
+    return rng.choice([f"{value}", f"{value:.6e}", f" {value!r} ", f"{value:.4f}"])
+
+
+def test_read_plan_points_matches_split(rng, tmp_path, monkeypatch):
+    monkeypatch.setattr(plan, "PLAN_CHUNK_CHARS", 32)
+    points = rng.uniform(-50, 50, (int(rng.integers(1, 60)), 3)).round(3)
+    text = ",".join("(" + ",".join(format_number(rng, value) for value in point) + ")" for point in points.tolist())
+    path = tmp_path / "plan.txt"
+    path.write_text(f"[{text}]")
+    expected = [[float(value) for value in item.split(",")] for item in text[1:-1].split("),(")]
+    np.testing.assert_allclose(read_plan_points(str(path)), expected, rtol=1e-6)
+
+
+def test_read_plan_points_accepts_bare_fractions(tmp_path):
+    path = tmp_path / "plan.txt"
+    path.write_text("[(.5,1,1), (-.25, 2., 1e0),\n(3,-0.5,.75E1)]")
+    np.testing.assert_allclose(read_plan_points(str(path)), [(0.5, 1, 1), (-0.25, 2, 1), (3, -0.5, 7.5)])
+
+
+@pytest.mark.parametrize("junk", ["(1,2)", "(1,x,2)", "abc", "(1,2,3"])
+def test_read_plan_points_reports_unparsed_text(rng, tmp_path, monkeypatch, junk):
+    monkeypatch.setattr(plan, "PLAN_CHUNK_CHARS", 16)
+    points = [f"({x},{y},{z})" for x, y, z in rng.uniform(-5, 5, (10, 3)).round(2).tolist()]
+    points.insert(int(rng.integers(len(points) + 1)), junk)
+    path = tmp_path / "plan.txt"
+    path.write_text("[" + ",".join(points) + "]")
+    with pytest.raises(ValueError, match=re.escape(junk)):
+        read_plan_points(str(path))
+
+
+def test_plan_round_trip(rng, tmp_path):
+    markers = random_markers(rng, 100)
+    flight_plan = random_plan(rng, markers, int(rng.integers(1, 50)))
+    path = tmp_path / "plan.txt"
+    write_plan(str(path), flight_plan)
+    assert read_plan(str(path), markers) == flight_plan
+
+
+def test_read_plan_snaps_to_markers(rng, tmp_path):
+    markers = random_markers(rng, 100)
+    flight_plan = random_plan(rng, markers, 30)
+    jitter = rng.uniform(-0.7, 0.7, (30, 2)) * PLAN_MATCH_TOLERANCE
+    path = tmp_path / "plan.txt"
+    path.write_text("[" + ",".join(f"({float(x + dx)!r},{float(y + dy)!r},{z})" for (x, y, z), (dx, dy) in zip(flight_plan, jitter)) + "]")
+    assert read_plan(str(path), markers) == flight_plan
+
+
+def test_read_plan_rejects_unknown_markers(rng, tmp_path):
+    markers = random_markers(rng, 10)
+    path = tmp_path / "plan.txt"
+    write_plan(str(path), [(50.0, 50.0, 1.0)] * 12)
+    with pytest.raises(ValueError, match="Всего не найдено точек: 12"):
+        read_plan(str(path), markers)
+    path.write_text("[]")
+    with pytest.raises(ValueError):
+        read_plan(str(path), markers)
+
+
+def parse_written(fmt, text):
+    if fmt == "bracket":
+        return [[float(value) for value in item.split(",")] for item in text[2:-2].split("),(")]
+    if fmt == "csv":
+        assert text.startswith("x,y,z\n")
+        return [[float(value) for value in line.split(",")] for line in text.splitlines()[1:]]
+    if fmt == "jsonl":
+        return [[row["x"], row["y"], row["z"]] for row in map(json.loads, text.splitlines())]
+    compile(text, "plan.py", "exec")
+    lines = [line for line in text.splitlines() if line.startswith("navigate_wait(x=")]
+    return [[float(part.split("=")[1]) for part in line[len("navigate_wait(") : -1].split(", ")] for line in lines]
+
+
+@pytest.mark.parametrize("fmt", sorted(PLAN_WRITERS))
+def test_writers_round_trip(fmt, rng, tmp_path):
+    points = rng.uniform(-50, 50, (int(rng.integers(1, 40)), 3))
+    precision = int(rng.integers(0, 5))
+    path = tmp_path / f"plan{PLAN_WRITERS[fmt].extension}"
+    write_plan(str(path), points.tolist(), precision=precision, chunk_size=int(rng.integers(1, 8)))
+    assert plan_format(str(path)) == fmt
+    chunked = path.read_text()
+    write_plan(str(path), points.tolist(), fmt, precision=precision)
+    assert path.read_text() == chunked
+    np.testing.assert_allclose(parse_written(fmt, chunked), points, atol=0.51 * 10.0**-precision)
+    if fmt == "bracket":
+        np.testing.assert_allclose(read_plan_points(str(path)), points, atol=0.51 * 10.0**-precision)
+
+
+def test_clover_script_uses_speed_and_delay(tmp_path):
+    path = tmp_path / "plan.py"
+    write_plan(str(path), [(1.0, 2.0, 1.5), (3.0, 4.0, 1.5)], speed=0.75, delay=12.5)
+    text = path.read_text()
+    assert "speed=0.75" in text
+    assert "rospy.sleep(12.5)" in text
+    assert "navigate_wait(z=1.5, frame_id=\"body\", auto_arm=True)" in text
+    assert text.endswith("land()\n")
+
+
+def test_unknown_extension_falls_back_to_bracket():
+    assert plan_format("plan.TXT") == "bracket"
+    assert plan_format("plan") == "bracket"
+    assert plan_format("plan.CSV") == "csv"
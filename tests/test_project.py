@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from aruco_planner import (
+    MARKER_DTYPE,
+    BinaryProject,
+    OBSTACLE_TYPES,
+    MarkerStore,
+    is_binary_project,
+    new_obstacle,
+    read_project,
+    write_project,
+)
+
+
+def random_project(rng, markers, obstacles, points):
+    data = np.zeros(markers, dtype=MARKER_DTYPE)
+    data["id"] = rng.permutation(10 * markers)[:markers]
+    for name in MARKER_DTYPE.names[1:]:
+        data[name] = rng.uniform(0, 10, markers)
+    obstacles = [new_obstacle(OBSTACLE_TYPES[i % len(OBSTACLE_TYPES)], *rng.uniform(0, 10, 2).tolist()) for i in range(obstacles)]
+    plan = [tuple(point) for point in rng.uniform(0, 10, (points, 3)).tolist()]
+    return MarkerStore(data), obstacles, plan
+
+
+@pytest.mark.parametrize("binary", [False, True])
+def test_project_round_trip(rng, tmp_path, binary):
+    markers, obstacles, plan = random_project(rng, *rng.integers(0, 30, 3).tolist())
+    path = tmp_path / "project.aproject"
+    write_project(str(path), markers, obstacles, plan, binary=binary)
+    assert is_binary_project(str(path)) == binary
+    project = read_project(str(path))
+    assert project["markers"].data.tolist() == markers.data.tolist()
+    assert [dict(obstacle, position=tuple(obstacle["position"])) for obstacle in project["obstacles"]] == obstacles
+    assert project["flight_plan"] == plan
+
+
+def test_loaded_project_survives_rewrite(rng, tmp_path, monkeypatch):
+    closed = []
+    close = BinaryProject.close
+    monkeypatch.setattr(BinaryProject, "close", lambda self: closed.append(self) or close(self))
+    path = tmp_path / "project.aproject"
+    markers, obstacles, plan = random_project(rng, 40, 3, 20)
+    write_project(str(path), markers, obstacles, plan, binary=True)
+    loaded = read_project(str(path)).load()
+    assert [project._columns for project in closed] == [{}]
+    other = random_project(rng, 5, 1, 2)
+    write_project(str(path), *other, binary=True)
+    assert loaded["markers"].data.tolist() == markers.data.tolist()
+    assert loaded["flight_plan"] == plan
+    assert read_project(str(path))["markers"].data.tolist() == other[0].data.tolist()
+
+
+def test_binary_project_rejects_other_files(tmp_path):
+    path = tmp_path / "project.aproject"
+    path.write_bytes(b"APROJBIN" + b"\0" * 4)
+    with pytest.raises(ValueError):
+        read_project(str(path))
+    path.write_text('{"metadata": {"type": "other"}}')
+    with pytest.raises(ValueError):
+        read_project(str(path))
@@ -0,0 +1,36 @@
+import warnings
+
+import numpy as np
+import pytest
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from aruco_planner import MARKER_DTYPE, MarkerStore
+from aruco_planner.rendering import marker_artists, marker_scale, set_marker_view
+
+
+def draw_view(markers, xlim, ylim):
+    figure = Figure(figsize=(4, 3), dpi=50)
+    canvas = FigureCanvasAgg(figure)
+    ax = figure.add_subplot()
+    quads, labels = marker_artists(markers)
+    ax.add_artist(quads)
+    ax.add_artist(labels)
+    ax.set_xlim(*xlim)
+    ax.set_ylim(*ylim)
+    set_marker_view(markers, quads, labels, xlim, ylim, ax.bbox.width, *marker_scale(markers))
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        canvas.draw()
+    return quads
+
+
+@pytest.mark.parametrize("span", [2.0, 1000.0])
+def test_empty_view_draws_without_warnings(rng, span):
+    data = np.zeros(50, dtype=MARKER_DTYPE)
+    data["id"] = np.arange(50)
+    data["length"] = 0.33
+    data["x"], data["y"] = rng.uniform(0, 10, (2, 50))
+    quads = draw_view(MarkerStore(data), (5000.0, 5000.0 + span), (5000.0, 5000.0 + span))
+    assert len(quads.visible_indices) == 0
+    assert quads.detailed == (span == 2.0)
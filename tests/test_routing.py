@@ -0,0 +1,78 @@
+import heapq
+
+import numpy as np
+import pytest
+
+from aruco_planner import MARKER_DTYPE, MarkerStore, RoutePlanner
+
+MARGIN = 0.1
+
+
+def random_markers(rng, count):
+    data = np.zeros(count, dtype=MARKER_DTYPE)
+    data["id"] = np.arange(count)
+    data["length"] = 0.33
+    data["x"], data["y"] = rng.uniform(0, 6, (2, count))
+    return MarkerStore(data)
+
+
+def brute_route(markers, radius, obstacles, start, goal, sampled_clearance):
+    points = np.column_stack([markers.data["x"], markers.data["y"]])
+    first, second = np.nonzero(np.triu(np.hypot(*(points[:, None] - points[None, :]).T) <= radius, 1))
+    clearance = sampled_clearance(points[first], points[second], obstacles).min(axis=1, initial=np.inf)
+    if np.any(np.abs(clearance - MARGIN) < 0.001):
+        pytest.skip("ребро на границе запаса")
+    free = clearance > MARGIN
+    neighbors = {node: [] for node in range(len(points))}
+    for a, b in zip(first[free].tolist(), second[free].tolist()):
+        length = float(np.hypot(*(points[a] - points[b])))
+        neighbors[a].append((b, length))
+        neighbors[b].append((a, length))
+    best, heap = {start: 0.0}, [(0.0, start)]
+    while heap:
+        cost, node = heapq.heappop(heap)
+        if node == goal:
+            return cost
+        if cost > best[node]:
+            continue
+        for neighbor, length in neighbors[node]:
+            if cost + length < best.get(neighbor, np.inf):
+                best[neighbor] = cost + length
+                heapq.heappush(heap, (cost + length, neighbor))
+    return None
+
+
+def test_route_matches_dijkstra(rng, random_obstacle, sampled_clearance):
+    markers = random_markers(rng, 60)
+    obstacles = [random_obstacle() for _ in range(6)]
+    planner = RoutePlanner(markers, 1.5, MARGIN)
+    for start, goal in rng.integers(len(markers), size=(5, 2)).tolist():
+        expected = brute_route(markers, 1.5, obstacles, start, goal, sampled_clearance)
+        if expected is None:
+            with pytest.raises(ValueError):
+                planner.plan(start, goal, 1.0, obstacles)
+            continue
+        route = planner.plan(start, goal, 1.0, obstacles)
+        assert route[0][:2] == markers.position(start) and route[-1][:2] == markers.position(goal)
+        assert all(z == 1.0 for _, _, z in route)
+        xy = np.array([point[:2] for point in route])
+        assert np.hypot(*np.diff(xy, axis=0).T).sum() == pytest.approx(expected)
+
+
+def test_sync_matches_fresh_planner(rng, random_obstacle):
+    markers = random_markers(rng, 80)
+    obstacles = [random_obstacle() for _ in range(5)]
+    planner = RoutePlanner(markers, 1.0, MARGIN)
+    planner.sync(obstacles)
+    for _ in range(10):
+        index = int(rng.integers(len(obstacles)))
+        if rng.integers(2):
+            obstacles[index] = random_obstacle()
+        else:
+            obstacles.append(dict(obstacles[index]))
+        planner.sync(obstacles)
+        fresh = RoutePlanner(markers, 1.0, MARGIN)
+        fresh.sync(obstacles)
+        assert np.array_equal(planner.blocked, fresh.blocked)
+    planner.sync([])
+    assert not planner.blocked.any()
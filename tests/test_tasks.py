@@ -0,0 +1,63 @@
+from aruco_planner.tasks import Task, TaskRunner
+
+
+class FakeRoot:
+    def __init__(self):
+        self.jobs = []
+
+    def after(self, delay, callback):
+        self.jobs.append(callback)
+        return len(self.jobs)
+
+    def after_cancel(self, job):
+        pass
+
+    def run(self):
+        while self.jobs:
+            self.jobs.pop(0)()
+
+
+class LateFuture:
+    def __init__(self, checks):
+        self.checks = checks
+
+    def done(self):
+        self.checks -= 1
+        return self.checks < 0
+
+    def cancelled(self):
+        return False
+
+    def exception(self):
+        return None
+
+    def result(self):
+        return "готово"
+
+
+def test_task_finishing_during_poll_is_not_lost():
+    root = FakeRoot()
+    runner = TaskRunner(root, threads=1)
+    results, statuses = [], []
+    runner.on_status = lambda tasks: statuses.append(len(tasks))
+    for checks in range(4):
+        task = Task(f"задача {checks}", on_done=results.append)
+        task.future = LateFuture(checks)
+        runner._track(task)
+    root.run()
+    runner.shutdown()
+    assert results == ["готово"] * 4
+    assert statuses[-1] == 0
+
+
+def test_submit_runs_callbacks_on_poll():
+    root = FakeRoot()
+    runner = TaskRunner(root, threads=2)
+    results, errors = [], []
+    runner.submit("сумма", lambda task, a, b: a + b, 2, 3, on_done=results.append)
+    runner.submit("ошибка", lambda task: 1 / 0, on_error=errors.append)
+    while runner.tasks:
+        root.run()
+    runner.shutdown()
+    assert results == [5]
+    assert [type(error) for error in errors] == [ZeroDivisionError]
@@ -0,0 +1,40 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from aruco_planner import optimize_order, path_length, tour
+
+
+def brute_length(points, fixed_start, fixed_end):
+    n = len(points)
+    return min(
+        path_length(points, list(order))
+        for order in itertools.permutations(range(n))
+        if (not fixed_start or order[0] == 0) and (not fixed_end or order[-1] == n - 1)
+    )
+
+
+@pytest.mark.parametrize("fixed_start, fixed_end", [(False, False), (True, False), (False, True), (True, True)])
+def test_fixed_endpoints_match_brute_force(rng, fixed_start, fixed_end):
+    points = rng.uniform(0, 10, (int(rng.integers(3, 8)), 2))
+    order = optimize_order(points, fixed_start, fixed_end, workers=1)
+    assert sorted(order) == list(range(len(points)))
+    if fixed_start:
+        assert order[0] == 0
+    if fixed_end:
+        assert order[-1] == len(points) - 1
+    assert path_length(points, order) == pytest.approx(brute_length(points, fixed_start, fixed_end))
+
+
+def test_worker_pool_matches_brute_force(rng, monkeypatch):
+    monkeypatch.setattr(tour, "PARALLEL_MIN_POINTS", 0)
+    points = rng.uniform(0, 10, (7, 2))
+    order = optimize_order(points, True, False, restarts=4, workers=2)
+    assert order[0] == 0 and sorted(order) == list(range(len(points)))
+    assert path_length(points, order) == pytest.approx(brute_length(points, True, False))
+
+
+@pytest.mark.parametrize("count", range(3))
+def test_short_plans_keep_order(count):
+    assert optimize_order(np.zeros((count, 2)), True, True) == list(range(count))
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from aruco_planner import Trajectory, write_trajectory
+
+
+def random_plan(rng):
+    points = rng.uniform(0, 5, (int(rng.integers(2, 8)), 3))
+    if rng.integers(2):
+        points = np.insert(points, 1, points[0], axis=0)
+    return [tuple(point) for point in points.tolist()]
+
+
+def test_limits_hold_along_sampled_trajectory(rng):
+    max_speed, max_accel = rng.uniform(0.5, 2.0, 2)
+    trajectory = Trajectory(random_plan(rng), max_speed, max_accel)
+    times = np.linspace(0.0, trajectory.duration, 20001)
+    positions, velocities = trajectory.evaluate(times)
+    speed = np.linalg.norm(velocities, axis=1)
+    step = times[1] - times[0]
+    assert speed.max() <= max_speed + 1e-9
+    assert np.abs(np.diff(speed)).max() <= max_accel * step + 1e-9
+    assert np.linalg.norm(np.diff(positions, axis=0), axis=1).max() <= max_speed * step + 1e-9
+    assert speed[0] == pytest.approx(0.0) and speed[-1] == pytest.approx(0.0)
+    assert trajectory.duration >= trajectory.lengths.sum() / max_speed
+
+
+def test_trajectory_passes_through_waypoints(rng):
+    trajectory = Trajectory(random_plan(rng), 1.5, 1.0)
+    positions, _ = trajectory.evaluate(trajectory.start_times)
+    np.testing.assert_allclose(positions, trajectory.points, atol=1e-9)
+
+
+def test_single_segment_matches_closed_form(rng):
+    length, max_speed, max_accel = rng.uniform(0.1, 5.0, 3)
+    trajectory = Trajectory([(0.0, 0.0, 1.0), (length, 0.0, 1.0)], max_speed, max_accel)
+    if length >= max_speed**2 / max_accel:
+        expected = length / max_speed + max_speed / max_accel
+    else:
+        expected = 2 * np.sqrt(length / max_accel)
+    assert trajectory.duration == pytest.approx(expected)
+
+
+def test_samples_cover_duration(rng, tmp_path):
+    trajectory = Trajectory(random_plan(rng), 1.0, 1.0)
+    rate = float(rng.uniform(5, 50))
+    rows = np.concatenate(list(trajectory.samples(rate, chunk_size=7)))
+    assert rows[0, 0] == 0.0 and rows[-1, 0] == pytest.approx(trajectory.duration)
+    assert np.all(np.diff(rows[:, 0]) > 0) and np.diff(rows[:, 0]).max() <= 1 / rate + 1e-9
+    path = tmp_path / "trajectory.csv"
+    write_trajectory(str(path), trajectory, rate)
+    np.testing.assert_allclose(np.loadtxt(path, delimiter=",", skiprows=1), rows, atol=1e-4)
+
+
+def test_invalid_limits_are_rejected():
+    with pytest.raises(ValueError):
+        Trajectory([(0, 0, 0), (1, 0, 0)], 0.0, 1.0)
+
+
+@pytest.mark.parametrize("plan", [[], [(1.0, 2.0, 1.0)], [(1.0, 2.0, 1.0)] * 3])
+def test_degenerate_plans_are_rejected(plan):
+    with pytest.raises(ValueError, match="две различные точки"):
+        Trajectory(plan)
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from aruco_planner import MARKER_DTYPE, Camera, MarkerStore, VisibilityAnalysis
+
+
+def random_markers(rng, count):
+    data = np.zeros(count, dtype=MARKER_DTYPE)
+    data["id"] = np.arange(count)
+    data["length"] = rng.uniform(0.2, 0.5, count)
+    data["x"], data["y"] = rng.uniform(0, 6, (2, count))
+    for name in ("rot_z", "rot_y", "rot_x"):
+        data[name] = rng.uniform(-0.5, 0.5, count)
+    return MarkerStore(data)
+
+
+def brute_counts(analysis, markers, camera, yaws):
+    focal = camera.width / 2 / np.tan(np.radians(camera.fov) / 2)
+    corners, normals = markers.poses.corners, markers.poses.normals
+    forward, right, down = camera.axes(yaws)
+    counts = []
+    for position, f, r, d in zip(analysis.positions, forward, right, down):
+        seen = 0
+        for quad, normal in zip(corners, normals):
+            relative = quad - position
+            depth = relative @ f
+            if normal @ (quad.mean(axis=0) - position) >= 0 or np.any(depth <= 0.05):
+                continue
+            u = focal * (relative @ r) / depth + camera.width / 2
+            v = focal * (relative @ d) / depth + camera.height / 2
+            inside = np.all((u >= 0) & (u <= camera.width) & (v >= 0) & (v <= camera.height))
+            edges = np.hypot(u - np.roll(u, -1), v - np.roll(v, -1))
+            seen += bool(inside and edges.min() >= camera.min_pixels)
+        counts.append(seen)
+    return np.array(counts)
+
+
+@pytest.mark.parametrize("pitch", [90.0, 60.0])
+def test_counts_match_brute_force(rng, pitch):
+    markers = random_markers(rng, 40)
+    plan = [tuple(point) for point in np.column_stack([rng.uniform(0, 6, (4, 2)), rng.uniform(0.5, 2.5, 4)]).tolist()]
+    camera = Camera(fov=float(rng.uniform(60, 120)), pitch=pitch, min_pixels=float(rng.uniform(10, 30)))
+    analysis = VisibilityAnalysis(plan, markers, camera, spacing=0.25, workers=1)
+    points = np.asarray(plan)
+    delta = np.diff(points, axis=0)
+    yaws = np.arctan2(delta[:, 1], delta[:, 0])[analysis.segments]
+    assert analysis.counts.tolist() == brute_counts(analysis, markers, camera, yaws).tolist()
+
+
+def test_samples_and_weak_spans(rng):
+    markers = random_markers(rng, 30)
+    plan = [tuple(point) for point in np.column_stack([rng.uniform(0, 6, (5, 2)), np.full(5, 1.5)]).tolist()]
+    analysis = VisibilityAnalysis(plan, markers, spacing=0.2, min_markers=2, workers=1)
+    steps = np.linalg.norm(np.diff(analysis.positions, axis=0), axis=1)
+    assert steps.max() <= 0.2 + 1e-9
+    np.testing.assert_allclose(analysis.positions[[0, -1]], np.asarray(plan)[[0, -1]])
+    weak = analysis.counts < 2
+    spans = analysis.weak_spans()
+    covered = np.zeros(len(weak), dtype=bool)
+    for _, _, start, end in spans:
+        covered |= (analysis.distances >= start) & (analysis.distances <= end)
+    assert covered.tolist() == weak.tolist()
+    np.testing.assert_allclose(analysis.quality, np.minimum(analysis.counts / 2, 1.0))